@@ -0,0 +1,28 @@
+"""wait_list product_id, id index
+
+Revision ID: 042bdb7f4315
+Revises: 0be639612097
+Create Date: 2026-10-19 12:07:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '042bdb7f4315'
+down_revision: Union[str, None] = '0be639612097'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_wait_list_product_id_id', 'wait_list', ['product_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_wait_list_product_id_id', table_name='wait_list')
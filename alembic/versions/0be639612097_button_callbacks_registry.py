@@ -0,0 +1,37 @@
+"""button_callbacks registry table
+
+Revision ID: 0be639612097
+Revises: 7f923a0018d5
+Create Date: 2026-10-19 12:06:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0be639612097'
+down_revision: Union[str, None] = '7f923a0018d5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('button_callbacks',
+    sa.Column('product_hash', sa.String(length=32), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=True),
+    sa.Column('item', sa.JSON(), nullable=False),
+    sa.Column('chat_ids', sa.JSON(), nullable=False),
+    sa.Column('created', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('product_hash')
+    )
+    op.create_index(op.f('ix_button_callbacks_created'), 'button_callbacks', ['created'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_button_callbacks_created'), table_name='button_callbacks')
+    op.drop_table('button_callbacks')
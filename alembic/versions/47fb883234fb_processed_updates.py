@@ -0,0 +1,34 @@
+"""processed updates
+
+Revision ID: 47fb883234fb
+Revises: 8938b82862af
+Create Date: 2026-10-19 12:12:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '47fb883234fb'
+down_revision: Union[str, None] = '8938b82862af'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('processed_updates',
+    sa.Column('update_id', sa.BigInteger(), autoincrement=False, nullable=False),
+    sa.Column('created', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('update_id')
+    )
+    op.create_index(op.f('ix_processed_updates_created'), 'processed_updates', ['created'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_processed_updates_created'), table_name='processed_updates')
+    op.drop_table('processed_updates')
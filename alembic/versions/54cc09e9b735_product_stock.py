@@ -0,0 +1,33 @@
+"""product stock
+
+Revision ID: 54cc09e9b735
+Revises: ef7d8b9b2597
+Create Date: 2026-10-19 12:14:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '54cc09e9b735'
+down_revision: Union[str, None] = 'ef7d8b9b2597'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('products', sa.Column('stock', sa.Integer(), nullable=True))
+    # SQLite не умеет добавлять ограничения в существующую таблицу
+    if op.get_bind().dialect.name == 'postgresql':
+        op.create_check_constraint('ck_products_stock_non_negative', 'products', 'stock >= 0')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_constraint('ck_products_stock_non_negative', 'products', type_='check')
+    op.drop_column('products', 'stock')
@@ -0,0 +1,49 @@
+"""shared json stores
+
+Revision ID: 7327e5e50ece
+Revises: f806f6ca3463
+Create Date: 2026-10-19 12:17:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7327e5e50ece'
+down_revision: Union[str, None] = 'f806f6ca3463'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('admins',
+    sa.Column('user_id', sa.BigInteger(), autoincrement=False, nullable=False),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_table('group_chats',
+    sa.Column('chat_id', sa.BigInteger(), autoincrement=False, nullable=False),
+    sa.PrimaryKeyConstraint('chat_id')
+    )
+    op.create_table('added_goods',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('item', sa.JSON(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('sharing_data',
+    sa.Column('user_id', sa.BigInteger(), autoincrement=False, nullable=False),
+    sa.Column('data', sa.JSON(), nullable=False),
+    sa.Column('updated', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('sharing_data')
+    op.drop_table('added_goods')
+    op.drop_table('group_chats')
+    op.drop_table('admins')
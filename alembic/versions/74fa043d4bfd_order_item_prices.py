@@ -0,0 +1,46 @@
+"""order_item price snapshot
+
+Revision ID: 74fa043d4bfd
+Revises: 7327e5e50ece
+Create Date: 2026-10-19 12:18:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '74fa043d4bfd'
+down_revision: Union[str, None] = '7327e5e50ece'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('order_item', sa.Column('price', sa.Numeric(precision=10, scale=2), nullable=True))
+    op.add_column('order_item', sa.Column('purchase_price', sa.Numeric(precision=10, scale=2), nullable=True))
+    # Цен на момент оформления у старых заказов нет - берутся текущие цены товаров
+    op.execute(
+        "UPDATE order_item SET "
+        "price = (SELECT p.price FROM products p WHERE p.id = order_item.product_id), "
+        "purchase_price = (SELECT p.purchase_price FROM products p WHERE p.id = order_item.product_id)"
+    )
+    if op.get_bind().dialect.name == 'postgresql':
+        op.alter_column('order_item', 'price', nullable=False)
+        op.alter_column('order_item', 'purchase_price', nullable=False)
+    # Выручка итога дня - сумма строк по товарам, как считает теперь orm_complete_order
+    op.execute(
+        "UPDATE sales_daily SET revenue = ("
+        "  SELECT coalesce(sum(s.revenue), 0) FROM sales_daily s "
+        "  WHERE s.dimension = 'product' AND s.day = sales_daily.day"
+        ") WHERE dimension = 'total'"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('order_item', 'purchase_price')
+    op.drop_column('order_item', 'price')
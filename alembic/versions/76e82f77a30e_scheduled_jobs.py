@@ -0,0 +1,46 @@
+"""scheduled_jobs table
+
+Revision ID: 76e82f77a30e
+Revises: 042bdb7f4315
+Create Date: 2026-10-19 12:08:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '76e82f77a30e'
+down_revision: Union[str, None] = '042bdb7f4315'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('scheduled_jobs',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('name', sa.String(length=150), nullable=False),
+    sa.Column('kind', sa.String(length=50), nullable=False),
+    sa.Column('chat_id', sa.BigInteger(), nullable=True),
+    sa.Column('window_start', sa.Time(), nullable=True),
+    sa.Column('window_end', sa.Time(), nullable=True),
+    sa.Column('interval', sa.Integer(), nullable=False),
+    sa.Column('jitter', sa.Integer(), nullable=False),
+    sa.Column('misfire_policy', sa.String(length=10), nullable=False),
+    sa.Column('next_run', sa.DateTime(), nullable=False),
+    sa.Column('last_run', sa.DateTime(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('is_paused', sa.Boolean(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.create_index(op.f('ix_scheduled_jobs_next_run'), 'scheduled_jobs', ['next_run'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_scheduled_jobs_next_run'), table_name='scheduled_jobs')
+    op.drop_table('scheduled_jobs')
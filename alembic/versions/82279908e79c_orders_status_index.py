@@ -0,0 +1,28 @@
+"""orders status, id index
+
+Revision ID: 82279908e79c
+Revises: 76e82f77a30e
+Create Date: 2026-10-19 12:09:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '82279908e79c'
+down_revision: Union[str, None] = '76e82f77a30e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_orders_status_id', 'orders', ['status', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_orders_status_id', table_name='orders')
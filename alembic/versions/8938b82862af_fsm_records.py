@@ -0,0 +1,36 @@
+"""fsm records
+
+Revision ID: 8938b82862af
+Revises: d33e382a49b4
+Create Date: 2026-10-19 12:11:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8938b82862af'
+down_revision: Union[str, None] = 'd33e382a49b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('fsm_records',
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('state', sa.String(length=150), nullable=True),
+    sa.Column('data', sa.JSON(), nullable=False),
+    sa.Column('updated', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(op.f('ix_fsm_records_updated'), 'fsm_records', ['updated'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_fsm_records_updated'), table_name='fsm_records')
+    op.drop_table('fsm_records')
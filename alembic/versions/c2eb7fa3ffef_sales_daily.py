@@ -0,0 +1,57 @@
+"""sales daily rollup
+
+Revision ID: c2eb7fa3ffef
+Revises: 54cc09e9b735
+Create Date: 2026-10-19 12:15:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2eb7fa3ffef'
+down_revision: Union[str, None] = '54cc09e9b735'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('sales_daily',
+    sa.Column('dimension', sa.String(length=10), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('key_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('orders', sa.Integer(), nullable=False),
+    sa.Column('units', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('cost', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.PrimaryKeyConstraint('dimension', 'day', 'key_id')
+    )
+    # Итоги по уже выполненным заказам; дальше таблицу пополняет orm_complete_order.
+    # День выполнения - время последнего изменения заказа
+    op.execute(
+        "INSERT INTO sales_daily (dimension, day, key_id, orders, units, revenue, cost) "
+        "SELECT 'total', date(o.updated), 0, count(*), sum(i.units), sum(o.total_price), sum(i.cost) "
+        "FROM orders o JOIN ("
+        "  SELECT oi.order_id, sum(oi.quantity) AS units, sum(oi.quantity * p.purchase_price) AS cost "
+        "  FROM order_item oi JOIN products p ON p.id = oi.product_id GROUP BY oi.order_id"
+        ") i ON i.order_id = o.id "
+        "WHERE o.status = 'Выполнен' GROUP BY date(o.updated)"
+    )
+    for dimension, key in (('product', 'p.id'), ('category', 'p.category_id'), ('seller', 'p.seller_id')):
+        op.execute(
+            "INSERT INTO sales_daily (dimension, day, key_id, orders, units, revenue, cost) "
+            f"SELECT '{dimension}', date(o.updated), {key}, count(DISTINCT o.id), sum(oi.quantity), "
+            "sum(oi.quantity * p.price), sum(oi.quantity * p.purchase_price) "
+            "FROM orders o JOIN order_item oi ON oi.order_id = o.id "
+            "JOIN products p ON p.id = oi.product_id "
+            f"WHERE o.status = 'Выполнен' GROUP BY date(o.updated), {key}"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('sales_daily')
@@ -0,0 +1,54 @@
+"""product search indexes
+
+Revision ID: ef7d8b9b2597
+Revises: 47fb883234fb
+Create Date: 2026-10-19 12:13:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ef7d8b9b2597'
+down_revision: Union[str, None] = '47fb883234fb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Индексы поиска есть только в PostgreSQL (см. orm_search_products)
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'ix_products_search',
+        'products',
+        [
+            sa.text(
+                "to_tsvector('russian'::regconfig, "
+                "coalesce(name, '') || ' ' || coalesce(description, ''))"
+            )
+        ],
+        unique=False,
+        postgresql_using='gin',
+    )
+    op.create_index(
+        'ix_products_name_trgm',
+        'products',
+        ['name'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_products_name_trgm', table_name='products')
+    op.drop_index('ix_products_search', table_name='products')
@@ -0,0 +1,28 @@
+"""orders user history index
+
+Revision ID: f806f6ca3463
+Revises: c2eb7fa3ffef
+Create Date: 2026-10-19 12:16:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f806f6ca3463'
+down_revision: Union[str, None] = 'c2eb7fa3ffef'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_orders_user_id_created_id', 'orders', ['user_id', 'created', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_orders_user_id_created_id', table_name='orders')
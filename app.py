@@ -1,10 +1,12 @@
 import asyncio
+import functools
 import os
-import json
 import logging
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.enums import ParseMode
 
 from dotenv import find_dotenv, load_dotenv
@@ -12,13 +14,36 @@ from dotenv import find_dotenv, load_dotenv
 
 load_dotenv(find_dotenv())
 
-from config import ADMIN_FILE
 from middlewares.db import DataBaseSession
-
-from database.engine import create_db, session_maker
+from middlewares.deduplication import UpdateDeduplication
+from middlewares.metrics import ApiMetrics, UpdateMetrics, setup_handler_metrics
+from middlewares.query_counter import install_query_counter, setup_query_counter
+from middlewares.throttling import UserThrottling
+
+from config import METRICS_HOST, METRICS_PORT, TELEGRAM_SEND_RATE, WORKER_CONCURRENCY
+from database.engine import create_db, engine, session_maker
+from utils.delivery_feed import delivery_feed
+from utils.fsm_storage import create_fsm_storage
+from utils.json_operations import import_legacy_json, load_admins
+from utils.json_storage import flush_all
+from utils.metrics import metrics, pool_usage
+from utils.product_search import product_search
+from utils.render_cache import render_cache
+from utils.restock_notifier import restock_notifier
+from utils.scheduler import scheduler
+from utils.send_queue import send_queue
+from utils.sharding import (
+    KeyedExecutor,
+    Shard,
+    ShardRouter,
+    event_bus,
+    poll_updates,
+    serve_webhook,
+    update_user_id,
+)
 
 from handlers.user_private import user_private_router
-from handlers.user_group import send_random_item_periodically, user_group_router
+from handlers.user_group import ensure_random_item_jobs, user_group_router
 from handlers.admin_private import admin_router
 from handlers.menu_processing import menu_progressing_router
 from handlers.deliverer_private import deliverer_private_router
@@ -40,8 +65,12 @@ logging.info("Приложение запущено")
 
 # ALLOWED_UPDATES = ['message', 'edited_message', 'callback_query']
 
+# TELEGRAM_API_URL - другой сервер Bot API: локальный telegram-bot-api
+# или фейковый для нагрузочных проверок (benchmarks/fake_bot_api.py)
+api_url = os.getenv("TELEGRAM_API_URL")
 bot = Bot(
     token=os.getenv("TELEGRAM_TOKEN"),
+    session=AiohttpSession(api=TelegramAPIServer.from_base(api_url)) if api_url else None,
     default=DefaultBotProperties(parse_mode=ParseMode.HTML),
 )
 
@@ -50,15 +79,16 @@ async def initialize_bot_data(bot: Bot, session_maker):
     """
     Инициализация данных для бота, таких как список администраторов и доставщиков.
     """
-    if os.path.exists(ADMIN_FILE):
-        with open(ADMIN_FILE, "r", encoding="utf-8") as file:
-            admin_list = json.load(file)
-            bot.my_admins_list = admin_list
-    else:
-        bot.my_admins_list = []
+    async def load_admins_list(_=None):
+        async with session_maker() as session:
+            bot.my_admins_list = await load_admins(session)
+
+    await load_admins_list()
+    # Админ может добавиться в другом воркере - список перечитывается по событию
+    event_bus.subscribe("admins_changed", load_admins_list)
 
 
-dp = Dispatcher()
+dp = Dispatcher(storage=create_fsm_storage(session_maker))
 
 dp.include_router(user_private_router)
 dp.include_router(user_group_router)
@@ -66,25 +96,152 @@ dp.include_router(admin_router)
 dp.include_router(menu_progressing_router)
 dp.include_router(deliverer_private_router)
 
+update_deduplication = UpdateDeduplication(session_pool=session_maker)
+user_throttling = UserThrottling()
+
+# Метрики, повторы и частота - outer middleware: отброшенный апдейт не доходит
+# до inner middleware и хендлеров. Outer выполняются в порядке регистрации.
+# Метрики - самыми первыми, чтобы учитывать и отброшенные апдейты
+dp.update.outer_middleware(UpdateMetrics())
+# Повторы апдейтов отбрасываются до всего остального
+dp.update.outer_middleware(update_deduplication)
+# Затем ограничение частоты: отброшенным апдейтам сессия БД не нужна
+dp.update.outer_middleware(user_throttling)
+dp.update.middleware(DataBaseSession(session_pool=session_maker))
+setup_handler_metrics(dp)
+install_query_counter(engine)
+setup_query_counter(dp, strict=os.getenv("QUERY_BUDGET_STRICT") == "1")
+bot.session.middleware(ApiMetrics())
+
+metrics.export_stats(
+    "bot_update_dedup_total", "Проверка повторов апдейтов", update_deduplication.stats
+)
+metrics.export_stats(
+    "bot_throttling_total", "Ограничение частоты апдейтов", user_throttling.stats
+)
+metrics.export_stats(
+    "bot_render_cache_total", "Правки сообщений меню по видам", render_cache.stats
+)
+metrics.export_stats(
+    "bot_search_cache_total", "Кэш инлайн-поиска товаров", product_search.stats
+)
+metrics.collect(
+    "bot_db_pool_connections", "Соединения в пуле БД", lambda: pool_usage(engine.pool)
+)
 
-async def on_startup(bot):
 
-    await create_db()
+async def on_startup(bot, leader: bool = True, workers: int = 1, shard_index: int = 0):
+    """
+    leader - процесс, который запускает фоновые задачи в одном экземпляре
+    (планировщик, возобновление рассылок). В обычном режиме это единственный процесс.
+    """
+    metrics_port = int(os.getenv("METRICS_PORT", METRICS_PORT))
+    if metrics_port:
+        try:
+            await metrics.serve(METRICS_HOST, metrics_port + shard_index)
+        except OSError as e:
+            # Метрики не должны мешать запуску бота
+            logging.warning(
+                f"Метрики не запущены на порту {metrics_port + shard_index}: {e}"
+            )
+
+    if leader:
+        await create_db()
+        await import_legacy_json(session_maker)
 
     await initialize_bot_data(bot, session_maker)
 
-    asyncio.create_task(send_random_item_periodically(session_maker, bot))
+    # Лимит Telegram общий на бота - делим его между воркерами
+    send_queue.start(bot, rate=TELEGRAM_SEND_RATE / workers)
+    restock_notifier.setup(session_maker)
+    delivery_feed.setup(session_maker, bot)
+    # Управление задачами (/job_*) доступно в любом воркере, цикл - только у лидера
+    scheduler.setup(session_maker, bot)
+
+    if leader:
+        await restock_notifier.resume()
+        await ensure_random_item_jobs(session_maker)
+        await scheduler.start()
 
 
 async def on_shutdown(bot):
+    await scheduler.stop()
+    await send_queue.stop()
+    await flush_all()
+    await metrics.stop()
     print("бот лег")
 
 
-async def main():
-    dp.startup.register(on_startup)
-    dp.shutdown.register(on_shutdown)
+dp.startup.register(on_startup)
+dp.shutdown.register(on_shutdown)
+
 
-    dp.update.middleware(DataBaseSession(session_pool=session_maker))
+async def serve_shard(shard: Shard):
+    """
+    Воркер: обрабатывает апдейты своей доли пользователей теми же роутерами.
+    Апдейты одного пользователя выполняются по порядку, разных - параллельно.
+    """
+    event_bus.connect(shard.publish)
+    await dp.emit_startup(
+        bot=bot, leader=shard.is_leader, workers=shard.workers, shard_index=shard.index
+    )
+    shard.ready()
+
+    executor = KeyedExecutor(WORKER_CONCURRENCY)
+    try:
+        async for kind, payload in shard.messages():
+            if kind == "event":
+                await executor.submit("events", functools.partial(event_bus.dispatch, *payload))
+            else:
+                await executor.submit(
+                    update_user_id(payload),
+                    functools.partial(dp.feed_raw_update, bot, payload),
+                )
+        await executor.drain()
+    finally:
+        await dp.emit_shutdown(bot=bot)
+        await bot.session.close()
+
+
+async def run_sharded(workers: int):
+    """
+    Фронт: получает апдейты (webhook, если задан WEBHOOK_URL, иначе polling)
+    и раскладывает их по воркерам по from_user.id.
+    """
+    await create_db()
+    # До запуска воркеров: иначе они прочитают список админов до переноса из файла
+    await import_legacy_json(session_maker)
+    router = ShardRouter(workers)
+    router.start(serve_shard)
+    await router.wait_ready()
+    logging.info(f"Запущено воркеров: {workers}")
+
+    allowed_updates = dp.resolve_used_update_types()
+    try:
+        if os.getenv("WEBHOOK_URL"):
+            await serve_webhook(
+                bot,
+                router,
+                allowed_updates,
+                url=os.getenv("WEBHOOK_URL"),
+                host=os.getenv("WEBHOOK_HOST", "0.0.0.0"),
+                port=int(os.getenv("WEBHOOK_PORT", "8080")),
+                path=os.getenv("WEBHOOK_PATH", "/webhook"),
+                secret=os.getenv("WEBHOOK_SECRET"),
+            )
+        else:
+            await bot.delete_webhook(drop_pending_updates=True)
+            await poll_updates(bot, router, allowed_updates)
+    finally:
+        await router.stop()
+        await bot.session.close()
+
+
+async def main():
+    workers = int(os.getenv("BOT_WORKERS", "1"))
+    if workers > 1:
+        await run_sharded(workers)
+        return
 
     await bot.delete_webhook(drop_pending_updates=True)
     # await bot.delete_my_commands(scope=types.BotCommandScopeAllPrivateChats())
@@ -92,4 +249,5 @@ async def main():
     await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
 
 
-asyncio.run(main())
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,336 @@
+"""
+Сквозной замер: синтетические апдейты через настоящий Dispatcher и роутеры бота.
+
+Запуск из корня проекта:
+    python -m benchmarks.e2e [--rounds 50] [--users 20] [--products 200] [--api-latency 0]
+
+Работает без сети: запросы к Bot API перехватывает RecordingSession
+(записывает вызовы и возвращает правдоподобные ответы), БД - временный
+SQLite с засеянным каталогом, JSON-файлы бота тоже пишутся во временную папку.
+
+Один раунд - путь покупателя и доставщика:
+    start       /start
+    catalog     каталог категорий
+    pagination  листание товаров категории
+    add_to_cart товар в корзину
+    checkout    зона доставки, оформление, подтверждение телефона и адреса
+    accept      доставщик принимает созданный заказ
+
+Печатается updates/sec, p50/p95/p99 по каждому сценарию, SQL-запросы
+на апдейт и число вызовов Bot API по методам. Middleware ограничения частоты
+и защиты от повторов не подключаются - они отбрасывали бы синтетические апдейты.
+"""
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+import typing
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.base import BaseSession
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import Message
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from database.models import (
+    Banner,
+    Base,
+    Category,
+    Deliverer,
+    Orders,
+    PickupPoint,
+    Product,
+    Seller,
+    Users,
+)
+from kbds.inline import MenuCallBack
+from middlewares.db import DataBaseSession
+
+ADMIN_ID = 1000
+DELIVERER_ID = 2000
+FIRST_USER_ID = 10000
+DELIVERY_CATEGORY = "Доставка/Курьер"
+BANNERS = ("main", "about", "payment", "shipping", "catalog", "cart", "orders", "pickup")
+
+
+class RecordingSession(BaseSession):
+    """
+    Сессия бота без сети: считает вызовы методов Bot API и возвращает
+    ответ нужного типа (сообщение, True или пустой список).
+    """
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__()
+        self.latency = latency
+        self.calls: Counter[str] = Counter()
+        self._message_id = 0
+
+    async def make_request(self, bot: Bot, method, timeout: int | None = None):
+        self.calls[method.__api_method__] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        returning = method.__returning__
+        variants = typing.get_args(returning) or (returning,)
+        if Message in variants:
+            self._message_id += 1
+            chat_id = getattr(method, "chat_id", None) or 0
+            return Message.model_validate(
+                {
+                    "message_id": getattr(method, "message_id", None) or self._message_id,
+                    "date": datetime.now(),
+                    "chat": {"id": chat_id, "type": "private"},
+                },
+                context={"bot": bot},
+            )
+        if typing.get_origin(returning) is list:
+            return []
+        return True
+
+    async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+
+class Updates:
+    """Фабрика "сырых" апдейтов от имени пользователя."""
+
+    def __init__(self):
+        self._update_id = 0
+
+    def _next(self) -> int:
+        self._update_id += 1
+        return self._update_id
+
+    def _user(self, user_id: int) -> dict:
+        return {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"}
+
+    def message(self, user_id: int, text: str) -> dict:
+        update_id = self._next()
+        return {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": self._user(user_id),
+                "text": text,
+            },
+        }
+
+    def callback(self, user_id: int, data: str) -> dict:
+        update_id = self._next()
+        return {
+            "update_id": update_id,
+            "callback_query": {
+                "id": str(update_id),
+                "from": self._user(user_id),
+                "chat_instance": str(user_id),
+                "data": data,
+                "message": {
+                    "message_id": update_id,
+                    "date": int(time.time()),
+                    "chat": {"id": user_id, "type": "private"},
+                    "photo": [
+                        {"file_id": "banner", "file_unique_id": "banner", "width": 1, "height": 1}
+                    ],
+                },
+            },
+        }
+
+
+async def seed(session: AsyncSession, users: int, categories: int, products: int) -> None:
+    session.add_all(
+        Banner(name=name, image="banner", description=f"Баннер {name}") for name in BANNERS
+    )
+    seller = Seller(name="Продавец")
+    delivery = Category(name=DELIVERY_CATEGORY)
+    session.add_all([seller, delivery])
+    category_rows = [Category(name=f"Категория {index}") for index in range(categories)]
+    session.add_all(category_rows)
+    await session.flush()
+
+    session.add(
+        Product(
+            name="Зона доставки 1",
+            description="Доставка",
+            purchase_price=0,
+            price=50,
+            image="zone",
+            category_id=delivery.id,
+            seller_id=seller.id,
+        )
+    )
+    session.add_all(
+        Product(
+            name=f"Товар {index}",
+            description=f"Описание товара {index}",
+            purchase_price=10 + index % 50,
+            price=20 + index % 50,
+            image=f"product{index}",
+            category_id=category_rows[index % categories].id,
+            seller_id=seller.id,
+        )
+        for index in range(products)
+    )
+    session.add_all(
+        Users(
+            user_id=FIRST_USER_ID + index,
+            first_name=f"user{index}",
+            phone="+201234567890",
+            address=f"ул. Тестовая, {index}",
+        )
+        for index in range(users)
+    )
+    session.add(
+        Deliverer(
+            telegram_id=DELIVERER_ID,
+            telegram_name="courier",
+            first_name="Курьер",
+            phone="+201000000000",
+        )
+    )
+    session.add(PickupPoint(district="Центр", address="ул. Центральная, 1"))
+    await session.commit()
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def run(args) -> None:
+    workdir = tempfile.mkdtemp(prefix="bot-bench-")
+
+    engine = create_async_engine(args.db or f"sqlite+aiosqlite:///{workdir}/bench.db")
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with session_maker() as session:
+        await seed(session, args.users, args.categories, args.products)
+        delivery_zone_id = await session.scalar(
+            select(Product.id).where(Product.name == "Зона доставки 1")
+        )
+        category_id = await session.scalar(
+            select(func.min(Category.id)).where(Category.name != DELIVERY_CATEGORY)
+        )
+        product_ids = (
+            await session.scalars(select(Product.id).where(Product.category_id == category_id))
+        ).all()
+
+    statements = 0
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def count_statement(*_):
+        nonlocal statements
+        statements += 1
+
+    from handlers.admin_private import admin_router
+    from handlers.deliverer_private import deliverer_private_router
+    from handlers.menu_processing import menu_progressing_router
+    from handlers.user_group import user_group_router
+    from handlers.user_private import user_private_router
+
+    dp = Dispatcher(storage=MemoryStorage())
+    dp.include_routers(
+        user_private_router,
+        user_group_router,
+        admin_router,
+        menu_progressing_router,
+        deliverer_private_router,
+    )
+    dp.update.middleware(DataBaseSession(session_pool=session_maker))
+
+    api = RecordingSession(latency=args.api_latency)
+    bot = Bot("123456:bench-token", session=api)
+    bot.my_admins_list = [ADMIN_ID]
+
+    updates = Updates()
+    latencies: dict[str, list[float]] = defaultdict(list)
+    queries: dict[str, list[int]] = defaultdict(list)
+
+    async def feed(flow: str, update: dict) -> None:
+        before = statements
+        started = time.perf_counter()
+        await dp.feed_raw_update(bot, update)
+        latencies[flow].append(time.perf_counter() - started)
+        queries[flow].append(statements - before)
+
+    started = time.perf_counter()
+    for round_index in range(args.rounds):
+        user_id = FIRST_USER_ID + round_index % args.users
+        await feed("start", updates.message(user_id, "/start"))
+        await feed(
+            "catalog",
+            updates.callback(user_id, MenuCallBack(level=1, menu_name="catalog").pack()),
+        )
+        for page in range(1, args.pages + 1):
+            await feed(
+                "pagination",
+                updates.callback(
+                    user_id,
+                    MenuCallBack(
+                        level=2, menu_name="products", category=category_id, page=page
+                    ).pack(),
+                ),
+            )
+        product_id = product_ids[round_index % len(product_ids)]
+        await feed(
+            "add_to_cart",
+            updates.callback(
+                user_id,
+                MenuCallBack(level=2, menu_name="add_to_cart", product_id=product_id).pack(),
+            ),
+        )
+        for data in (f"delivery_zone_{delivery_zone_id}", "make_order", "confirm_phone", "confirm_address"):
+            await feed("checkout", updates.callback(user_id, data))
+
+        async with session_maker() as session:
+            order_id = await session.scalar(select(func.max(Orders.id)))
+        await feed("accept", updates.callback(DELIVERER_ID, f"accept_order_{order_id}"))
+    elapsed = time.perf_counter() - started
+
+    total = sum(len(values) for values in latencies.values())
+    async with session_maker() as session:
+        orders = await session.scalar(select(func.count()).select_from(Orders))
+    print(
+        f"\n{total} апдейтов за {elapsed:.2f} с: {total / elapsed:.1f} updates/sec, "
+        f"создано заказов: {orders}"
+    )
+    print(f"{'сценарий':<12} {'апдейтов':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'SQL/апд':>8}")
+    for flow, values in latencies.items():
+        ms = [value * 1000 for value in values]
+        print(
+            f"{flow:<12} {len(ms):>8} {statistics.median(ms):>8.2f} "
+            f"{percentile(ms, 0.95):>8.2f} {percentile(ms, 0.99):>8.2f} "
+            f"{statistics.mean(queries[flow]):>8.1f}"
+        )
+    print("(задержки в мс)\n\nВызовы Bot API:")
+    for method, count in api.calls.most_common():
+        print(f"  {method:<24} {count}")
+
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--categories", type=int, default=5)
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--pages", type=int, default=3, help="страниц листания за раунд")
+    parser.add_argument(
+        "--api-latency", type=float, default=0.0, help="задержка ответа Bot API, с"
+    )
+    parser.add_argument("--db", help="URL БД (по умолчанию временный SQLite)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""
+Локальная замена Telegram Bot API для нагрузочных и интеграционных проверок.
+
+Запуск из корня проекта:
+    python -m benchmarks.fake_bot_api [--port 8081] [--latency 0.05] [--error-429 0.01]
+
+Бот подключается к нему через TELEGRAM_API_URL=http://127.0.0.1:8081 (см. app.py).
+
+Что умеет:
+    - getUpdates (long polling) с апдейтами, добавленными через POST /_inject;
+    - send*/copyMessage/forwardMessage возвращают сообщение, edit* - изменённое
+      сообщение, остальные методы - true;
+    - задержка ответа latency ± jitter;
+    - флуд-лимиты как у Telegram: не больше --chat-rate сообщений в секунду в чат
+      и --global-rate в секунду всего, иначе 429 с retry_after;
+    - случайные ошибки: 429 с вероятностью --error-429 и
+      400 "message is not modified" для edit* с вероятностью --error-not-modified;
+      повторная правка тем же содержимым всегда даёт "not modified", как в Telegram.
+
+GET /_stats - счётчики вызовов и ошибок по методам (JSON), POST /_reset - сброс.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import Counter, defaultdict
+
+from aiohttp import web
+
+BOT_USER = {"id": 123456, "is_bot": True, "first_name": "FakeBot", "username": "fake_bot"}
+
+# Методы, на которые распространяются флуд-лимиты отправки
+SEND_PREFIXES = ("send", "copyMessage", "forwardMessage", "edit")
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Забирает токен; возвращает 0 или сколько секунд ждать до следующего."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class FakeBotApi:
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        chat_rate: float = 1.0,
+        chat_burst: float = 3.0,
+        global_rate: float = 30.0,
+        error_429: float = 0.0,
+        error_not_modified: float = 0.0,
+        seed: int | None = None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.error_429 = error_429
+        self.error_not_modified = error_not_modified
+        self.random = random.Random(seed)
+        self.reset()
+
+    def reset(self) -> None:
+        self.calls: Counter[str] = Counter()
+        self.errors: Counter[str] = Counter()
+        self._chat_buckets: dict[str, TokenBucket] = {}
+        self._message_ids: dict[str, int] = defaultdict(int)
+        self._rendered: dict[tuple[str, str], str] = {}
+        self._updates: list[dict] = []
+        self._next_update_id = 1
+        self._new_updates = asyncio.Event()
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=50 * 1024 * 1024)
+        app.router.add_post("/_inject", self.handle_inject)
+        app.router.add_get("/_stats", self.handle_stats)
+        app.router.add_post("/_reset", self.handle_reset)
+        app.router.add_route("*", "/bot{token}/{method}", self.handle_method)
+        return app
+
+    async def start(self, host: str, port: int) -> web.AppRunner:
+        runner = web.AppRunner(self.app(), access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        return runner
+
+    # --- служебные эндпоинты ---
+
+    async def handle_inject(self, request: web.Request) -> web.Response:
+        """Добавляет апдейт (или список) в очередь getUpdates; update_id проставляется сам."""
+        payload = await request.json()
+        for update in payload if isinstance(payload, list) else [payload]:
+            update["update_id"] = self._next_update_id
+            self._next_update_id += 1
+            self._updates.append(update)
+        self._new_updates.set()
+        return web.json_response({"ok": True, "queued": len(self._updates)})
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response({"calls": self.calls, "errors": self.errors})
+
+    async def handle_reset(self, request: web.Request) -> web.Response:
+        self.reset()
+        return web.json_response({"ok": True})
+
+    # --- Bot API ---
+
+    async def handle_method(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = dict(await request.post()) if request.can_read_body else {}
+        params.update(request.query)
+        self.calls[method] += 1
+
+        if method == "getUpdates":
+            return self._ok(await self._get_updates(params))
+
+        delay = self.latency + self.random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if method.startswith(SEND_PREFIXES):
+            retry_after = self._flood_wait(str(params.get("chat_id", "")))
+            if retry_after is None and self.random.random() < self.error_429:
+                retry_after = 1 + self.random.randrange(5)
+            if retry_after is not None:
+                return self._error(
+                    method,
+                    429,
+                    f"Too Many Requests: retry after {retry_after}",
+                    {"retry_after": retry_after},
+                )
+
+        if method.startswith("edit"):
+            return self._edit(method, params)
+        if method.startswith(("send", "copyMessage", "forwardMessage")):
+            return self._ok(self._message(params, params.get("chat_id", "0")))
+        if method == "getMe":
+            return self._ok(BOT_USER)
+        if method == "getChat":
+            return self._ok({"id": int(params.get("chat_id", 0)), "type": "private"})
+        return self._ok(True)
+
+    async def _get_updates(self, params) -> list[dict]:
+        offset = int(params.get("offset") or 0)
+        limit = int(params.get("limit") or 100)
+        timeout = float(params.get("timeout") or 0)
+        # Подтверждённые (update_id < offset) апдейты больше не отдаются
+        self._updates = [u for u in self._updates if u["update_id"] >= offset]
+        if not self._updates and timeout:
+            self._new_updates.clear()
+            try:
+                await asyncio.wait_for(self._new_updates.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self._updates[:limit]
+
+    def _flood_wait(self, chat_id: str) -> int | None:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        wait = max(bucket.take(), self.global_bucket.take())
+        if wait:
+            return max(1, round(wait))
+        return None
+
+    def _edit(self, method: str, params) -> web.Response:
+        if "inline_message_id" in params:
+            return self._ok(True)
+        chat_id = str(params.get("chat_id", "0"))
+        message_id = str(params.get("message_id", "0"))
+        content = json.dumps(
+            {key: value for key, value in params.items() if isinstance(value, str)},
+            sort_keys=True,
+        )
+        key = (chat_id, message_id)
+        if self._rendered.get(key) == content or (
+            self.random.random() < self.error_not_modified
+        ):
+            return self._error(
+                method,
+                400,
+                "Bad Request: message is not modified: specified new message content "
+                "and reply markup are exactly the same as a current content and reply "
+                "markup of the message",
+            )
+        self._rendered[key] = content
+        return self._ok(self._message(params, chat_id, int(message_id)))
+
+    def _message(self, params, chat_id, message_id: int | None = None) -> dict:
+        if message_id is None:
+            self._message_ids[str(chat_id)] += 1
+            message_id = self._message_ids[str(chat_id)]
+        message = {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": int(chat_id or 0), "type": "private"},
+            "from": BOT_USER,
+        }
+        if "text" in params:
+            message["text"] = params["text"]
+        if "caption" in params:
+            message["caption"] = params["caption"]
+        if "reply_markup" in params:
+            try:
+                message["reply_markup"] = json.loads(params["reply_markup"])
+            except (TypeError, ValueError):
+                pass
+        return message
+
+    def _ok(self, result) -> web.Response:
+        return web.json_response({"ok": True, "result": result})
+
+    def _error(self, method, code, description, parameters=None) -> web.Response:
+        self.errors[f"{method}:{code}"] += 1
+        body = {"ok": False, "error_code": code, "description": description}
+        if parameters:
+            body["parameters"] = parameters
+        return web.json_response(body, status=code)
+
+
+async def serve(args) -> None:
+    api = FakeBotApi(
+        latency=args.latency,
+        jitter=args.jitter,
+        chat_rate=args.chat_rate,
+        global_rate=args.global_rate,
+        error_429=args.error_429,
+        error_not_modified=args.error_not_modified,
+        seed=args.seed,
+    )
+    runner = await api.start(args.host, args.port)
+    logging.info(f"Фейковый Bot API: TELEGRAM_API_URL=http://{args.host}:{args.port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальная замена Telegram Bot API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка ответа, с")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--chat-rate", type=float, default=1.0, help="сообщений/с в один чат")
+    parser.add_argument("--global-rate", type=float, default=30.0, help="сообщений/с всего")
+    parser.add_argument("--error-429", type=float, default=0.0, help="вероятность 429")
+    parser.add_argument(
+        "--error-not-modified", type=float, default=0.0, help='вероятность 400 "not modified"'
+    )
+    parser.add_argument("--seed", type=int)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    asyncio.run(serve(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
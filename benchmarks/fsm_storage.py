@@ -0,0 +1,95 @@
+"""
+Замер задержек get/set хранилищ FSM.
+
+Запуск из корня проекта:
+    python -m benchmarks.fsm_storage [--users 1000] [--db sqlite+aiosqlite:///fsm_bench.db]
+
+Для каждого хранилища имитируется шаг сценария: get_state, get_data,
+set_state + update_data. Печатаются p50/p95/p99 в миллисекундах
+и время сброса накопленных изменений в БД.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from database.models import FsmRecord
+from utils.fsm_storage import SqlStorage
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def report(name: str, timings: dict[str, list[float]]) -> None:
+    print(f"\n{name}")
+    for operation, values in timings.items():
+        ms = [value * 1000 for value in values]
+        print(
+            f"  {operation:<12} p50={statistics.median(ms):7.3f}  "
+            f"p95={percentile(ms, 0.95):7.3f}  p99={percentile(ms, 0.99):7.3f} ms"
+        )
+
+
+async def run_steps(storage, users: int, steps: int) -> dict[str, list[float]]:
+    timings = {"get_state": [], "get_data": [], "set": []}
+    for step in range(steps):
+        for user_id in range(users):
+            key = StorageKey(bot_id=1, chat_id=user_id, user_id=user_id)
+
+            started = time.perf_counter()
+            await storage.get_state(key)
+            timings["get_state"].append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await storage.get_data(key)
+            timings["get_data"].append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await storage.set_state(key, f"OrderState:step{step}")
+            await storage.update_data(key, {"phone_number": "+201234567890", "step": step})
+            timings["set"].append(time.perf_counter() - started)
+    return timings
+
+
+async def main(users: int, steps: int, db_url: str) -> None:
+    engine = create_async_engine(db_url)
+    session_maker = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(FsmRecord.__table__.drop, checkfirst=True)
+        await conn.run_sync(FsmRecord.__table__.create)
+
+    report("MemoryStorage", await run_steps(MemoryStorage(), users, steps))
+
+    storage = SqlStorage(session_maker)
+    report("SqlStorage (холодный кэш, затем кэш)", await run_steps(storage, users, steps))
+    started = time.perf_counter()
+    await storage.flush()
+    print(f"  сброс в БД: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    # Новый процесс: кэш пуст, всё читается из БД
+    cold = SqlStorage(session_maker)
+    report("SqlStorage (чтение из БД после перезапуска)", await run_steps(cold, users, 1))
+    await cold.close()
+    await storage.close()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--steps", type=int, default=3)
+    parser.add_argument(
+        "--db",
+        default=os.getenv("DB_URL")
+        or f"sqlite+aiosqlite:///{os.path.join(tempfile.gettempdir(), 'fsm_bench.db')}",
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.steps, args.db))
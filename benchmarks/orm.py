@@ -0,0 +1,472 @@
+"""
+Замер функций database/orm_query.py на засеянных данных разного объёма.
+
+Запуск из корня проекта:
+    python -m benchmarks.orm [--scales 10000 100000 1000000] [--report orm_report.json]
+    python -m benchmarks.orm --scales 10000 --save-baseline benchmarks/orm_baseline.json
+    python -m benchmarks.orm --scales 10000 --baseline benchmarks/orm_baseline.json
+
+Для каждого масштаба создаётся свежий SQLite (или --db для другой БД) и
+заполняется benchmarks.seed. Каждая orm_* функция вызывается в своей сессии,
+как из хендлера, пока не наберётся --repeat вызовов или не выйдет --budget секунд.
+Функции без сценария в CASES попадают в отчёт как "no_case".
+
+С --baseline сравниваются p50 с сохранённым отчётом: если функция стала
+медленнее больше чем в (1 + tolerance) раз и разница больше --min-ms,
+печатается регрессия и процесс завершается с кодом 1.
+"""
+import argparse
+import asyncio
+import contextlib
+import inspect
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Awaitable, Callable
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import database.orm_query as orm_query
+from benchmarks.seed import Dataset, seed
+from common.order_statuses import ORDER_STATUS_NEW
+
+Case = Callable[[AsyncSession, Dataset, int], Awaitable]
+OLD = datetime(2000, 1, 1)
+
+
+def _product(ds: Dataset, i: int) -> int:
+    return 4 + (i * 7919) % (ds.products - 3)
+
+
+def _order(ds: Dataset, i: int) -> int:
+    return 1 + (i * 104729) % ds.orders
+
+
+def _new_order(ds: Dataset, i: int) -> int:
+    # Статусы засеяны по кругу, ORDER_STATUS_NEW - у каждого третьего с первого
+    return 1 + (i * 3) % ds.orders
+
+
+def _category(ds: Dataset, i: int) -> int:
+    return 2 + i % (ds.categories - 1)
+
+
+def _review(ds: Dataset, i: int) -> dict:
+    return {
+        "user_id": ds.user_id(i),
+        "deliverer_id": 1 + i % ds.deliverers,
+        "order_id": _order(ds, i),
+    }
+
+
+def _import_rows(ds: Dataset, i: int) -> list[dict]:
+    # Половина строк обновляет засеянные товары, половина добавляет новые
+    return [
+        {
+            "name": f"Товар {_product(ds, i + j) - 1}" if j % 2 else f"Импорт {i}-{j}",
+            "description": "Описание",
+            "image": "image",
+            "category_id": _category(ds, i),
+            "seller_id": 1,
+            "price": 20 + j,
+        }
+        for j in range(50)
+    ]
+
+
+# Сценарии вызова: (сессия, данные, номер вызова). Порядок важен:
+# orm_create_order идёт после orm_add_to_cart того же пользователя.
+CASES: dict[str, Case] = {
+    "orm_get_banner": lambda s, ds, i: orm_query.orm_get_banner(s, "main"),
+    "orm_get_info_pages": lambda s, ds, i: orm_query.orm_get_info_pages(s),
+    "orm_add_banner_description": lambda s, ds, i: (
+        orm_query.orm_add_banner_description(s, {"main": "Баннер main"})
+    ),
+    "orm_change_banner_image": lambda s, ds, i: (
+        orm_query.orm_change_banner_image(s, "main", "banner")
+    ),
+    "orm_update_orders_banner_description": lambda s, ds, i: (
+        orm_query.orm_update_orders_banner_description(s, ds.user_id(i))
+    ),
+    "orm_get_categories": lambda s, ds, i: orm_query.orm_get_categories(s),
+    "orm_create_categories": lambda s, ds, i: (
+        orm_query.orm_create_categories(s, ["Категория 1"])
+    ),
+    "orm_add_category": lambda s, ds, i: (
+        orm_query.orm_add_category(s, f"Новая категория {i}")
+    ),
+    "orm_get_or_create_categories": lambda s, ds, i: (
+        orm_query.orm_get_or_create_categories(
+            s, {f"Категория {_category(ds, i) - 1}", f"Импорт {i}"}
+        )
+    ),
+    "orm_get_product": lambda s, ds, i: orm_query.orm_get_product(s, _product(ds, i)),
+    "orm_get_product_by_name": lambda s, ds, i: (
+        orm_query.orm_get_product_by_name(s, f"Товар {_product(ds, i) - 1}")
+    ),
+    "orm_get_products": lambda s, ds, i: (
+        orm_query.orm_get_products(s, category_id=_category(ds, i))
+    ),
+    "orm_get_products_page": lambda s, ds, i: (
+        orm_query.orm_get_products_page(s, category_id=_category(ds, i))
+    ),
+    "orm_search_products": lambda s, ds, i: (
+        orm_query.orm_search_products(s, f"товар {_product(ds, i) % 100}")
+    ),
+    "orm_add_product": lambda s, ds, i: orm_query.orm_add_product(
+        s,
+        {
+            "name": f"Новый товар {i}",
+            "description": "Описание",
+            "category": _category(ds, i),
+            "seller": 1,
+            "purchase_price": 10,
+            "price": 20,
+            "image": "image",
+        },
+    ),
+    "orm_update_product": lambda s, ds, i: orm_query.orm_update_product(
+        s,
+        _product(ds, i),
+        {
+            "name": f"Товар {_product(ds, i) - 1}",
+            "description": "Описание",
+            "category": _category(ds, i),
+            "seller": 1,
+            "purchase_price": 10,
+            "price": 20 + i % 10,
+            "image": "image",
+        },
+    ),
+    "orm_update_product_availability": lambda s, ds, i: (
+        orm_query.orm_update_product_availability(s, _product(ds, i), True)
+    ),
+    "orm_set_product_stock": lambda s, ds, i: (
+        orm_query.orm_set_product_stock(s, _product(ds, i), 5 + i % 3)
+    ),
+    "orm_count_products": lambda s, ds, i: (
+        orm_query.orm_count_products(s, category_id=_category(ds, i))
+    ),
+    "orm_set_products_availability": lambda s, ds, i: (
+        orm_query.orm_set_products_availability(s, True, category_id=_category(ds, i))
+    ),
+    "orm_apply_markup": lambda s, ds, i: (
+        orm_query.orm_apply_markup(s, Decimal(20), category_id=_category(ds, i))
+    ),
+    "orm_upsert_products": lambda s, ds, i: (
+        orm_query.orm_upsert_products(s, _import_rows(ds, i))
+    ),
+    "orm_check_product_available": lambda s, ds, i: (
+        orm_query.orm_check_product_available(s, _product(ds, i))
+    ),
+    "orm_add_user": lambda s, ds, i: orm_query.orm_add_user(s, ds.user_id(i)),
+    "orm_get_user": lambda s, ds, i: orm_query.orm_get_user(s, ds.user_id(i)),
+    "orm_update_user": lambda s, ds, i: (
+        orm_query.orm_update_user(s, ds.user_id(i), {"address": f"ул. Новая, {i}"})
+    ),
+    "orm_get_sellers": lambda s, ds, i: orm_query.orm_get_sellers(s),
+    "orm_add_seller": lambda s, ds, i: orm_query.orm_add_seller(s, f"Новый продавец {i}"),
+    "orm_get_or_create_sellers": lambda s, ds, i: (
+        orm_query.orm_get_or_create_sellers(s, {"Продавец 0", f"Импорт {i}"})
+    ),
+    "orm_add_to_cart": lambda s, ds, i: (
+        orm_query.orm_add_to_cart(s, ds.user_id(i), _product(ds, i))
+    ),
+    "orm_get_user_carts": lambda s, ds, i: orm_query.orm_get_user_carts(s, ds.user_id(i)),
+    "orm_get_quantity_in_cart": lambda s, ds, i: (
+        orm_query.orm_get_quantity_in_cart(s, ds.user_id(i))
+    ),
+    "orm_reduce_product_in_cart": lambda s, ds, i: (
+        orm_query.orm_reduce_product_in_cart(s, ds.user_id(i), _product(ds, i))
+    ),
+    "orm_create_order": lambda s, ds, i: (
+        orm_query.orm_create_order(s, ds.user_id(i), "ул. Тестовая", "+201234567890")
+    ),
+    "orm_delete_from_cart": lambda s, ds, i: (
+        orm_query.orm_delete_from_cart(s, ds.user_id(i), _product(ds, i))
+    ),
+    "orm_get_orders": lambda s, ds, i: orm_query.orm_get_orders(s, order_id=_order(ds, i)),
+    "orm_get_orders_page": lambda s, ds, i: (
+        orm_query.orm_get_orders_page(s, status=ORDER_STATUS_NEW)
+    ),
+    "orm_get_delivery_orders_page": lambda s, ds, i: (
+        orm_query.orm_get_delivery_orders_page(s)
+    ),
+    "orm_take_order": lambda s, ds, i: (
+        orm_query.orm_take_order(s, _new_order(ds, i), 1 + i % ds.deliverers)
+    ),
+    "orm_get_user_orders": lambda s, ds, i: orm_query.orm_get_user_orders(s, ds.user_id(i)),
+    "orm_get_user_orders_page": lambda s, ds, i: (
+        orm_query.orm_get_user_orders_page(s, ds.user_id(i))
+    ),
+    "orm_get_orders_items": lambda s, ds, i: (
+        orm_query.orm_get_orders_items(s, [_order(ds, i), _order(ds, i + 1)])
+    ),
+    "orm_complete_order": lambda s, ds, i: (
+        orm_query.orm_complete_order(s, _new_order(ds, i))
+    ),
+    "orm_get_sales_report": lambda s, ds, i: orm_query.orm_get_sales_report(
+        s, date.today() - timedelta(days=30 + i % 30), date.today()
+    ),
+    "orm_update_order": lambda s, ds, i: (
+        orm_query.orm_update_order(s, _order(ds, i), {"total_price": 100 + i % 10})
+    ),
+    "orm_add_to_wait_list": lambda s, ds, i: (
+        orm_query.orm_add_to_wait_list(s, ds.user_id(i), _product(ds, i))
+    ),
+    "orm_get_wait_list_page": lambda s, ds, i: (
+        orm_query.orm_get_wait_list_page(s, _product(ds, i))
+    ),
+    "orm_get_restocked_wait_list_products": lambda s, ds, i: (
+        orm_query.orm_get_restocked_wait_list_products(s)
+    ),
+    "orm_delete_wait_list_entries": lambda s, ds, i: (
+        orm_query.orm_delete_wait_list_entries(s, [1 + 2 * i, 2 + 2 * i])
+    ),
+    "orm_get_delivery_zones": lambda s, ds, i: orm_query.orm_get_delivery_zones(s),
+    "orm_add_deliverer": lambda s, ds, i: (
+        orm_query.orm_add_deliverer(s, 30_000_000 + i, f"newcourier{i}")
+    ),
+    "orm_get_deliverers": lambda s, ds, i: (
+        orm_query.orm_get_deliverers(s, telegram_id=ds.deliverer_telegram_id(i))
+    ),
+    "orm_update_deliverer": lambda s, ds, i: (
+        orm_query.orm_update_deliverer(s, ds.deliverer_telegram_id(i), {"is_active": True})
+    ),
+    "orm_add_pickup_point": lambda s, ds, i: orm_query.orm_add_pickup_point(
+        s, "Район", f"ул. Новый пункт, {i}", "https://maps.google.com"
+    ),
+    "orm_get_pickup_points": lambda s, ds, i: orm_query.orm_get_pickup_points(s),
+    "orm_add_review": lambda s, ds, i: orm_query.orm_add_review(
+        s, **_review(ds, i), rating=1 + i % 5
+    ),
+    "orm_update_review": lambda s, ds, i: (
+        orm_query.orm_update_review(s, {**_review(ds, i), "rating": 5})
+    ),
+    "orm_get_deliverer_reviews_and_update_summary": lambda s, ds, i: (
+        orm_query.orm_get_deliverer_reviews_and_update_summary(s, 1 + i % ds.deliverers)
+    ),
+    "orm_save_button_callbacks": lambda s, ds, i: orm_query.orm_save_button_callbacks(
+        s,
+        [
+            {
+                "product_hash": f"{i:032x}",
+                "product_id": _product(ds, i),
+                "item": {"id": _product(ds, i), "name": f"Товар {_product(ds, i) - 1}"},
+                "chat_ids": [-1001, -1002],
+                "created": datetime.now(),
+            }
+        ],
+    ),
+    "orm_get_button_callback": lambda s, ds, i: (
+        orm_query.orm_get_button_callback(s, f"{i:032x}")
+    ),
+    "orm_delete_expired_button_callbacks": lambda s, ds, i: (
+        orm_query.orm_delete_expired_button_callbacks(s, OLD)
+    ),
+    # Задачи не засеяны: orm_add_job создаёт задачу i с ID i + 1
+    "orm_add_job": lambda s, ds, i: orm_query.orm_add_job(
+        s, {"name": f"bench-{i}", "kind": "bench", "interval": 3600, "next_run": OLD}
+    ),
+    "orm_get_jobs": lambda s, ds, i: orm_query.orm_get_jobs(s),
+    "orm_get_due_jobs": lambda s, ds, i: orm_query.orm_get_due_jobs(s, datetime.now()),
+    "orm_get_next_run_time": lambda s, ds, i: orm_query.orm_get_next_run_time(s),
+    "orm_claim_job": lambda s, ds, i: (
+        orm_query.orm_claim_job(s, 1 + i, OLD, datetime.now() + timedelta(hours=1))
+    ),
+    "orm_update_job": lambda s, ds, i: (
+        orm_query.orm_update_job(s, 1 + i, {"last_run": datetime.now(), "last_error": None})
+    ),
+    "orm_save_fsm_records": lambda s, ds, i: orm_query.orm_save_fsm_records(
+        s, [{"key": f"fsm:{i}", "state": "bench", "data": {}, "updated": datetime.now()}], []
+    ),
+    "orm_get_fsm_record": lambda s, ds, i: orm_query.orm_get_fsm_record(s, f"fsm:{i}"),
+    "orm_delete_expired_fsm_records": lambda s, ds, i: (
+        orm_query.orm_delete_expired_fsm_records(s, OLD)
+    ),
+    "orm_claim_update": lambda s, ds, i: orm_query.orm_claim_update(s, 10**12 + i),
+    "orm_delete_processed_updates": lambda s, ds, i: (
+        orm_query.orm_delete_processed_updates(s, datetime.now() - timedelta(days=1))
+    ),
+    "orm_add_admins": lambda s, ds, i: orm_query.orm_add_admins(s, [ds.user_id(i)]),
+    "orm_get_admins": lambda s, ds, i: orm_query.orm_get_admins(s),
+    "orm_add_group_chats": lambda s, ds, i: (
+        orm_query.orm_add_group_chats(s, [-1_000_000_000 - i])
+    ),
+    "orm_get_group_chats": lambda s, ds, i: orm_query.orm_get_group_chats(s),
+    "orm_add_goods": lambda s, ds, i: orm_query.orm_add_goods(
+        s, [{"id": _product(ds, i + j), "name": f"Товар {j}"} for j in range(20)]
+    ),
+    "orm_pop_random_good": lambda s, ds, i: orm_query.orm_pop_random_good(s),
+    "orm_save_sharing_data": lambda s, ds, i: orm_query.orm_save_sharing_data(
+        s, ds.user_id(i), {"address": f"ул. Тестовая, {i}", "phone": "+201234567890"}
+    ),
+    "orm_get_sharing_data": lambda s, ds, i: orm_query.orm_get_sharing_data(s, ds.user_id(i)),
+    "orm_delete_sharing_data": lambda s, ds, i: (
+        orm_query.orm_delete_sharing_data(s, ds.user_id(i))
+    ),
+    # Удаления - в конце, чтобы не менять данные для остальных сценариев.
+    # orm_add_product добавил товары с ID после засеянных
+    "orm_delete_product": lambda s, ds, i: (
+        orm_query.orm_delete_product(s, ds.products + 1 + i)
+    ),
+    "orm_delete_products": lambda s, ds, i: orm_query.orm_delete_products(
+        s, category_id=_category(ds, i), only_unavailable=True
+    ),
+}
+
+
+def orm_functions() -> list[str]:
+    """Все orm_* функции модуля: сначала в порядке CASES, затем без сценария."""
+    names = {
+        name
+        for name, func in vars(orm_query).items()
+        if name.startswith("orm_") and inspect.iscoroutinefunction(func)
+    }
+    return [name for name in CASES if name in names] + sorted(names - CASES.keys())
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+async def bench_scale(args, scale: int) -> dict:
+    workdir = tempfile.mkdtemp(prefix="orm-bench-")
+    engine = create_async_engine(args.db or f"sqlite+aiosqlite:///{workdir}/orm.db")
+    started = time.perf_counter()
+    dataset = await seed(engine, scale)
+    print(f"\nМасштаб {scale}: данные засеяны за {time.perf_counter() - started:.1f} с")
+
+    statements = 0
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def count_statement(*_):
+        nonlocal statements
+        statements += 1
+
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    results = {}
+    for name in orm_functions():
+        case = CASES.get(name)
+        if case is None:
+            results[name] = {"status": "no_case"}
+            continue
+
+        timings = []
+        before = statements
+        deadline = time.perf_counter() + args.budget
+        try:
+            while len(timings) < args.repeat and (
+                len(timings) < 3 or time.perf_counter() < deadline
+            ):
+                # Некоторые функции печатают отладку - в замер она не попадает
+                async with session_maker() as session:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        call_started = time.perf_counter()
+                        await case(session, dataset, len(timings))
+                        timings.append(time.perf_counter() - call_started)
+        except Exception as e:
+            results[name] = {"status": "error", "error": f"{type(e).__name__}: {e}"[:300]}
+            print(f"  {name:<48} ошибка: {type(e).__name__}")
+            continue
+
+        ms = [value * 1000 for value in timings]
+        results[name] = {
+            "status": "ok",
+            "runs": len(ms),
+            "p50_ms": round(statistics.median(ms), 3),
+            "p95_ms": round(percentile(ms, 0.95), 3),
+            "mean_ms": round(statistics.mean(ms), 3),
+            "statements": round((statements - before) / len(ms), 1),
+        }
+        print(
+            f"  {name:<48} p50={results[name]['p50_ms']:9.3f} "
+            f"p95={results[name]['p95_ms']:9.3f} ms  SQL={results[name]['statements']}"
+        )
+
+    await engine.dispose()
+    return results
+
+
+def compare(report: dict, baseline: dict, tolerance: float, min_ms: float) -> list[str]:
+    """Регрессии p50 относительно baseline по общим масштабам и функциям."""
+    regressions = []
+    for scale, functions in report["results"].items():
+        for name, result in functions.items():
+            old = baseline.get("results", {}).get(scale, {}).get(name)
+            if not old or old.get("status") != "ok":
+                continue
+            if result.get("status") != "ok":
+                regressions.append(f"{scale} {name}: {result.get('status')} (было ok)")
+                continue
+            limit = max(old["p50_ms"] * (1 + tolerance), old["p50_ms"] + min_ms)
+            if result["p50_ms"] > limit:
+                regressions.append(
+                    f"{scale} {name}: p50 {old['p50_ms']:.3f} -> {result['p50_ms']:.3f} ms"
+                )
+    return regressions
+
+
+async def run(args) -> int:
+    if args.db and len(args.scales) > 1:
+        print("С --db можно замерить только один масштаб: БД должна быть пустой")
+        return 2
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "db": args.db or "sqlite (временный файл)",
+        "results": {},
+    }
+    for scale in args.scales:
+        report["results"][str(scale)] = await bench_scale(args, scale)
+
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nОтчёт: {args.report}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Baseline сохранён: {args.save_baseline}")
+
+    if args.baseline:
+        if not os.path.exists(args.baseline):
+            print(f"Baseline {args.baseline} не найден")
+            return 1
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance, args.min_ms)
+        if regressions:
+            print("\nРегрессии:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("Регрессий относительно baseline нет")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замер функций orm_query")
+    parser.add_argument("--scales", type=int, nargs="+", default=[10_000])
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--budget", type=float, default=5.0, help="секунд на функцию")
+    parser.add_argument("--db", help="URL пустой БД (по умолчанию временный SQLite)")
+    parser.add_argument("--report", default="orm_report.json")
+    parser.add_argument("--baseline", help="отчёт, с которым сравнивать")
+    parser.add_argument("--save-baseline", help="сохранить отчёт как baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    parser.add_argument("--min-ms", type=float, default=1.0)
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
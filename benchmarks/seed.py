@@ -0,0 +1,301 @@
+"""
+Генератор тестовых данных для замеров: товары, пользователи, корзины,
+заказы с позициями, списки ожидания, отзывы и дневные итоги продаж
+в объёме scale строк на таблицу.
+
+Запуск из корня проекта (заполнит указанную БД, таблицы создаются при необходимости):
+    python -m benchmarks.seed --scale 100000 --db sqlite+aiosqlite:///bench.db
+
+Данные детерминированы (random.Random(seed)), так что замеры на одном
+масштабе сравнимы между запусками. Вставка идёт пачками по chunk строк
+через executemany, без создания ORM-объектов.
+"""
+import argparse
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from common.order_statuses import ORDER_STATUSES
+from database.models import (
+    Banner,
+    Base,
+    Cart,
+    Category,
+    Deliverer,
+    DelivererReview,
+    OrderItem,
+    Orders,
+    PickupPoint,
+    Product,
+    SalesDaily,
+    Seller,
+    Users,
+    WaitList,
+)
+
+FIRST_USER_ID = 10_000_000
+FIRST_DELIVERER_ID = 20_000_000
+DELIVERY_CATEGORY = "Доставка/Курьер"
+BANNERS = ("main", "about", "payment", "shipping", "catalog", "cart", "orders", "pickup")
+SALES_DAYS = 90
+
+
+@dataclass
+class Dataset:
+    """Сколько строк каждого вида создано (ID идут подряд с 1)."""
+
+    scale: int
+    categories: int
+    sellers: int
+    deliverers: int
+    users: int
+    products: int
+    orders: int
+
+    def user_id(self, index: int) -> int:
+        return FIRST_USER_ID + index % self.users
+
+    def deliverer_telegram_id(self, index: int) -> int:
+        return FIRST_DELIVERER_ID + index % self.deliverers
+
+
+async def _insert(engine: AsyncEngine, model, rows, chunk: int) -> None:
+    batch = []
+    async with engine.begin() as conn:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunk:
+                await conn.execute(insert(model), batch)
+                batch = []
+        if batch:
+            await conn.execute(insert(model), batch)
+
+
+async def seed(
+    engine: AsyncEngine, scale: int, chunk: int = 10_000, seed_value: int = 42
+) -> Dataset:
+    """Создаёт таблицы и заполняет их данными объёма scale."""
+    rnd = random.Random(seed_value)
+    dataset = Dataset(
+        scale=scale,
+        categories=max(10, scale // 2000),
+        sellers=max(5, scale // 5000),
+        deliverers=max(10, scale // 1000),
+        users=scale,
+        products=scale,
+        orders=scale,
+    )
+    now = datetime.now()
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    await _insert(
+        engine,
+        Banner,
+        ({"name": name, "image": "banner", "description": f"Баннер {name}"} for name in BANNERS),
+        chunk,
+    )
+    # Категория 1 - доставка, её товары 1..3 - зоны доставки
+    await _insert(
+        engine,
+        Category,
+        (
+            {"name": DELIVERY_CATEGORY if index == 0 else f"Категория {index}"}
+            for index in range(dataset.categories)
+        ),
+        chunk,
+    )
+    await _insert(
+        engine,
+        Seller,
+        ({"name": f"Продавец {index}"} for index in range(dataset.sellers)),
+        chunk,
+    )
+    await _insert(
+        engine,
+        PickupPoint,
+        ({"district": f"Район {index}", "address": f"ул. Пункт, {index}"} for index in range(5)),
+        chunk,
+    )
+    await _insert(
+        engine,
+        Deliverer,
+        (
+            {
+                "telegram_id": dataset.deliverer_telegram_id(index),
+                "telegram_name": f"courier{index}",
+                "first_name": f"Курьер {index}",
+                "phone": "+201000000000",
+                "is_active": index % 3 != 0,
+            }
+            for index in range(dataset.deliverers)
+        ),
+        chunk,
+    )
+    await _insert(
+        engine,
+        Product,
+        (
+            {
+                "name": f"Зона доставки {index}" if index < 3 else f"Товар {index}",
+                "description": f"Описание товара {index}",
+                "purchase_price": 10 + index % 90,
+                "price": 15 + index % 120,
+                "image": f"image{index}",
+                "category_id": 1 if index < 3 else 2 + index % (dataset.categories - 1),
+                "seller_id": 1 + index % dataset.sellers,
+                "is_available": rnd.random() > 0.1,
+                "created": now - timedelta(minutes=index),
+                "updated": now,
+            }
+            for index in range(dataset.products)
+        ),
+        chunk,
+    )
+    await _insert(
+        engine,
+        Users,
+        (
+            {
+                "user_id": FIRST_USER_ID + index,
+                "first_name": f"user{index}",
+                "phone": "+201234567890",
+                "address": f"ул. Тестовая, {index}",
+            }
+            for index in range(dataset.users)
+        ),
+        chunk,
+    )
+    await _insert(
+        engine,
+        Cart,
+        (
+            {
+                "user_id": dataset.user_id(rnd.randrange(dataset.users)),
+                "product_id": 4 + rnd.randrange(dataset.products - 3),
+                "quantity": 1 + rnd.randrange(3),
+                "created": now,
+                "updated": now,
+            }
+            for _ in range(scale)
+        ),
+        chunk,
+    )
+    await _insert(
+        engine,
+        Orders,
+        (
+            {
+                "user_id": dataset.user_id(rnd.randrange(dataset.users)),
+                "delivery_address": "самовывоз" if index % 5 == 0 else f"ул. Заказа, {index}",
+                "total_price": 20 + index % 500,
+                "status": ORDER_STATUSES[index % len(ORDER_STATUSES)],
+                "deliverer_id": None if index % 4 == 0 else 1 + index % dataset.deliverers,
+                "created": now - timedelta(minutes=dataset.orders - index),
+                "updated": now,
+            }
+            for index in range(dataset.orders)
+        ),
+        chunk,
+    )
+    await _insert(
+        engine,
+        OrderItem,
+        (
+            {
+                "order_id": 1 + index % dataset.orders,
+                "product_id": 4 + rnd.randrange(dataset.products - 3),
+                "quantity": 1 + rnd.randrange(3),
+                "price": 15 + index % 120,
+                "purchase_price": 10 + index % 90,
+            }
+            for index in range(scale)
+        ),
+        chunk,
+    )
+    await _insert(
+        engine,
+        WaitList,
+        (
+            {
+                "user_id": dataset.user_id(rnd.randrange(dataset.users)),
+                "product_id": 4 + rnd.randrange(dataset.products - 3),
+            }
+            for _ in range(scale // 10)
+        ),
+        chunk,
+    )
+    await _insert(
+        engine,
+        DelivererReview,
+        (
+            {
+                "user_id": dataset.user_id(rnd.randrange(dataset.users)),
+                "deliverer_id": 1 + rnd.randrange(dataset.deliverers),
+                "rating": 1 + rnd.randrange(5),
+                "rating_summary": 0,
+                "text": None,
+            }
+            for _ in range(scale)
+        ),
+        chunk,
+    )
+    await _insert(engine, SalesDaily, _sales_daily(dataset, rnd, now), chunk)
+    return dataset
+
+
+def _sales_daily(dataset: Dataset, rnd: random.Random, now: datetime):
+    """
+    Итоги продаж за SALES_DAYS дней до сегодняшнего: итог дня, все категории
+    и продавцы и около scale строк по товарам на весь период.
+    """
+    products_per_day = min(dataset.products - 3, max(1, dataset.scale // SALES_DAYS))
+
+    def row(dimension: str, day, key_id: int, orders: int) -> dict:
+        units = orders + rnd.randrange(orders + 1)
+        revenue = units * (15 + rnd.randrange(120))
+        return {
+            "dimension": dimension,
+            "day": day,
+            "key_id": key_id,
+            "orders": orders,
+            "units": units,
+            "revenue": revenue,
+            "cost": revenue * 2 // 3,
+        }
+
+    for offset in range(SALES_DAYS):
+        day = (now - timedelta(days=offset)).date()
+        yield row("total", day, 0, 50 + rnd.randrange(50))
+        for category_id in range(2, dataset.categories + 1):
+            yield row("category", day, category_id, 1 + rnd.randrange(10))
+        for seller_id in range(1, dataset.sellers + 1):
+            yield row("seller", day, seller_id, 1 + rnd.randrange(20))
+        for product_id in rnd.sample(range(4, dataset.products + 1), products_per_day):
+            yield row("product", day, product_id, 1 + rnd.randrange(3))
+
+
+async def main_async(args) -> None:
+    engine = create_async_engine(args.db)
+    started = time.perf_counter()
+    await seed(engine, args.scale, args.chunk)
+    print(f"Засеяно {args.scale} строк на таблицу за {time.perf_counter() - started:.1f} с")
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Заполнение БД тестовыми данными")
+    parser.add_argument("--scale", type=int, default=10_000)
+    parser.add_argument("--chunk", type=int, default=10_000)
+    parser.add_argument("--db", default="sqlite+aiosqlite:///bench.db")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Пропускная способность обработки апдейтов в зависимости от числа воркеров.
+
+Запуск из корня проекта:
+    python -m benchmarks.sharding [--updates 4000] [--users 200] [--workers 1 2 4]
+
+Фронт (utils.sharding.ShardRouter) раскладывает синтетические апдейты
+по воркерам, каждый воркер прогоняет их через aiogram Dispatcher с
+обработчиком, который строит клавиатуру меню (CPU) и ждёт "ответа Telegram" (I/O).
+Печатается updates/sec для каждого числа воркеров. Каждый воркер проверяет,
+что апдейты одного пользователя пришли в обработчик по порядку.
+"""
+import argparse
+import asyncio
+import functools
+import os
+import time
+
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import Message
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+from kbds.inline import MenuCallBack
+from utils.sharding import KeyedExecutor, Shard, ShardRouter, update_user_id
+
+
+IO_DELAY = float(os.getenv("BENCH_IO_DELAY", "0.005"))
+
+
+def make_update(update_id: int, user_id: int) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "bench"},
+            "text": str(update_id),
+        },
+    }
+
+
+async def serve_bench(shard: Shard):
+    bot = Bot("123456:bench-token")
+    dp = Dispatcher()
+    router = Router()
+    last_seen: dict[int, int] = {}
+    stats = {"processed": 0, "out_of_order": 0}
+
+    @router.message()
+    async def handler(message: Message):
+        if int(message.text) < last_seen.get(message.from_user.id, -1):
+            stats["out_of_order"] += 1
+        last_seen[message.from_user.id] = int(message.text)
+
+        keyboard = InlineKeyboardBuilder()
+        for product_id in range(40):
+            keyboard.button(
+                text=f"Товар {product_id}",
+                callback_data=MenuCallBack(level=2, menu_name="catalog", product_id=product_id),
+            )
+        keyboard.adjust(2).as_markup().model_dump_json()
+        await asyncio.sleep(IO_DELAY)
+        stats["processed"] += 1
+
+    dp.include_router(router)
+    shard.ready()
+
+    executor = KeyedExecutor(concurrency=32)
+    async for kind, payload in shard.messages():
+        if kind == "update":
+            await executor.submit(
+                update_user_id(payload), functools.partial(dp.feed_raw_update, bot, payload)
+            )
+    await executor.drain()
+    print(
+        f"  воркер {shard.index}: обработано {stats['processed']}, "
+        f"не по порядку {stats['out_of_order']}"
+    )
+    await bot.session.close()
+
+
+async def run(workers: int, updates: int, users: int) -> float:
+    router = ShardRouter(workers)
+    router.start(serve_bench)
+    await router.wait_ready()
+
+    started = time.perf_counter()
+    for update_id in range(updates):
+        router.route(make_update(update_id, user_id=update_id % users + 1))
+    await router.stop()
+    return updates / (time.perf_counter() - started)
+
+
+async def main(worker_counts: list[int], updates: int, users: int) -> None:
+    print(f"Апдейтов: {updates}, пользователей: {users}, I/O на апдейт: {IO_DELAY * 1000:g} ms")
+    results = {}
+    for workers in worker_counts:
+        print(f"\nВоркеров: {workers}")
+        results[workers] = await run(workers, updates, users)
+        print(f"  {results[workers]:.0f} updates/sec")
+
+    base = results[worker_counts[0]]
+    print("\nworkers  updates/sec  ускорение")
+    for workers, rate in results.items():
+        print(f"{workers:>7}  {rate:>11.0f}  {rate / base:>8.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--updates", type=int, default=4000)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=[1, 2, os.cpu_count() or 4]
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.workers, args.updates, args.users))
@@ -0,0 +1,24 @@
+ORDER_STATUS_NEW = "Оформлен"
+ORDER_STATUS_IN_PROGRESS = "В работе"
+ORDER_STATUS_DONE = "Выполнен"
+
+ORDER_STATUSES = (ORDER_STATUS_NEW, ORDER_STATUS_IN_PROGRESS, ORDER_STATUS_DONE)
+
+# Адрес доставки, которым отмечаются заказы с самовывозом. orm_create_order
+# приводит к нему любое написание; в старых заказах встречается и "Самовывоз"
+PICKUP_ADDRESS = "самовывоз"
+PICKUP_ADDRESSES = (PICKUP_ADDRESS, "Самовывоз")
+
+
+def normalize_order_status(value: str | None) -> str | None:
+    """
+    Приводит статус к виду, в котором он хранится в БД ("оформлен" -> "Оформлен").
+    Возвращает None для неизвестного статуса.
+    """
+    if not value:
+        return None
+    value = value.strip().casefold()
+    for status in ORDER_STATUSES:
+        if status.casefold() == value:
+            return status
+    return None
@@ -1,6 +1,100 @@
+from datetime import time
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent
 GROUPS_FILE = BASE_DIR / "data" / "groups.json"
 ADMIN_FILE = BASE_DIR / "data" / "admins.json"
-DELIVERERS_FILE = BASE_DIR / "data" / "deliverers.json"
\ No newline at end of file
+DELIVERERS_FILE = BASE_DIR / "data" / "deliverers.json"
+ADDED_GOODS_FILE = BASE_DIR / "added_goods.json"
+SHARING_DATA_FILE = BASE_DIR / "sharing_data.json"
+
+# Реестр кнопок опубликованных товаров
+CALLBACK_REGISTRY_MAX_SIZE = 1000
+CALLBACK_REGISTRY_TTL = 7 * 24 * 3600  # секунд
+
+# Исходящие рассылки: не больше TELEGRAM_SEND_RATE сообщений в секунду
+TELEGRAM_SEND_RATE = 25
+TELEGRAM_SEND_WORKERS = 5
+# Сколько заявок из списка ожидания обрабатывать за раз
+RESTOCK_PAGE_SIZE = 500
+
+# Планировщик периодических публикаций
+SCHEDULER_CONCURRENCY = 4
+SCHEDULER_POLL_INTERVAL = 60  # секунд
+SCHEDULER_MISFIRE_GRACE = 300  # секунд
+DEFAULT_POST_WINDOW = (time(9, 0), time(21, 0))
+DEFAULT_POST_INTERVAL = 24 * 3600  # секунд
+DEFAULT_POST_JITTER = 2 * 3600  # секунд
+
+# Сколько заказов показывать на одной странице в админке
+ADMIN_ORDERS_PAGE_SIZE = 10
+
+# Сколько товаров показывать на одной странице каталога в админке
+ADMIN_PRODUCTS_PAGE_SIZE = 10
+
+# Сколько заказов показывать на одной странице ленты доставщика
+DELIVERER_ORDERS_PAGE_SIZE = 5
+
+# История заказов покупателя ("Мои заказы 📦" -> "История заказов")
+ORDER_HISTORY_PAGE_SIZE = 5  # заказов на странице
+ORDER_HISTORY_ITEMS = 5  # товаров заказа в списке, остальные - "и ещё N"
+
+# Ограничение частоты апдейтов от одного пользователя (middlewares/throttling.py)
+THROTTLE_RATE = 3  # апдейтов в секунду в среднем
+THROTTLE_BURST = 6
+THROTTLE_COALESCE_WINDOW = 0.5  # одинаковые нажатия за это время схлопываются
+THROTTLE_MAX_USERS = 10000  # сколько пользователей помнить одновременно
+
+# Сколько сообщений меню помнить для пропуска повторных правок (utils/render_cache.py)
+RENDER_CACHE_MAX_SIZE = 10000
+
+# Хранилище состояний FSM (utils/fsm_storage.py)
+FSM_STATE_TTL = 24 * 3600  # брошенный сценарий удаляется через сутки
+FSM_FLUSH_DELAY = 0.2  # изменения за это время пишутся в БД одним запросом
+FSM_FLUSH_RETRY_MAX = 60  # максимальная пауза между повторами записи, если БД недоступна
+FSM_CLEANUP_INTERVAL = 3600
+FSM_CACHE_SIZE = 10000
+
+# Несколько процессов-воркеров (BOT_WORKERS > 1, см. utils/sharding.py)
+WORKER_CONCURRENCY = 32  # сколько апдейтов один воркер обрабатывает одновременно
+
+# Защита от повторной обработки апдейтов (middlewares/deduplication.py)
+UPDATE_DEDUP_WINDOW = 10000  # сколько последних update_id помнить в памяти
+UPDATE_DEDUP_PERSISTENT = True  # дополнительно отмечать апдейты в БД (переживает перезапуск)
+UPDATE_DEDUP_TTL = 24 * 3600  # сколько хранить отметки в БД
+UPDATE_DEDUP_CLEANUP_EVERY = 1000  # чистить БД раз в столько апдейтов
+
+# HTTP-эндпоинт с метриками (utils/metrics.py), переопределяется env METRICS_PORT.
+# 0 - не запускать (по умолчанию: 9100 и соседние порты обычно занимают экспортеры).
+# В режиме воркеров воркер N слушает METRICS_PORT + N
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 0
+
+# Подсчёт SQL-запросов на хендлер (middlewares/query_counter.py).
+# С env QUERY_BUDGET_STRICT=1 превышение - ошибка, а не предупреждение
+QUERY_BUDGET = 15  # запросов за один вызов хендлера
+QUERY_REPEAT_LIMIT = 3  # сколько раз можно повторить один и тот же запрос
+
+# Семплирующий профилировщик (/profile в админке, utils/profiler.py)
+PROFILER_INTERVAL = 0.005  # секунд между выборками стека
+PROFILER_DEFAULT_SECONDS = 30
+PROFILER_MAX_SECONDS = 300
+
+# Поиск товаров (инлайн-режим, utils/product_search.py)
+SEARCH_PAGE_SIZE = 20  # результатов в одном ответе на инлайн-запрос
+SEARCH_CACHE_TTL = 60  # секунд
+SEARCH_CACHE_SIZE = 1000  # сколько запросов помнить
+
+# Выгрузка и загрузка фикстур (/dumpfix, /loadfix, fixtures/fixtures_utils.py)
+FIXTURES_DIR = BASE_DIR / "fixtures" / "dump"  # по файлу <таблица>.ndjson на таблицу
+FIXTURES_CHUNK = 5000  # строк в одной пачке чтения/вставки
+FIXTURES_PROGRESS_INTERVAL = 3  # секунд между обновлениями сообщения о прогрессе
+
+# Массовый импорт товаров из CSV/JSON (utils/product_import.py)
+PRODUCT_IMPORT_CHUNK = 1000  # товаров в одной пачке (один коммит)
+PRODUCT_IMPORT_MAX_ERRORS = 20  # сколько ошибочных строк перечислять в отчёте
+PRODUCT_IMPORT_MAX_SIZE = 20 * 1024 * 1024  # больше бот не может скачать из Telegram
+
+# Отчёт о продажах (/stats, таблица sales_daily)
+STATS_TOP_SIZE = 5  # сколько лучших товаров, категорий и продавцов показывать
+STATS_MAX_DAYS = 366  # самый длинный период отчёта
@@ -1,15 +1,24 @@
 from sqlalchemy import (
+    DDL,
     Boolean,
+    Date,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
+    JSON,
     Numeric,
     String,
     Text,
+    Time,
     BigInteger,
+    CheckConstraint,
+    event,
     func,
     inspect,
+    text,
 )
+from sqlalchemy.dialects import postgresql  # noqa: F401 - регистрирует func.to_tsvector
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -52,6 +61,8 @@ class Product(Base):
         ForeignKey("sellers.id", ondelete="CASCADE"), nullable=False, default=1
     )
     is_available: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True)
+    # Остаток на складе; NULL - остаток не ведётся (товар не заканчивается)
+    stock: Mapped[int] = mapped_column(Integer, nullable=True)
     created: Mapped[DateTime] = mapped_column(DateTime, default=func.now())
     updated: Mapped[DateTime] = mapped_column(
         DateTime, default=func.now(), onupdate=func.now()
@@ -61,6 +72,35 @@ class Product(Base):
     order_item: Mapped[list["OrderItem"]] = relationship(back_populates="product")
     seller: Mapped["Seller"] = relationship(backref="products")
 
+    __table_args__ = (
+        Index("ix_products_category_id_id", "category_id", "id"),
+        CheckConstraint("stock >= 0", name="ck_products_stock_non_negative"),
+    )
+
+
+# Документ для полнотекстового поиска по товарам (PostgreSQL, см. orm_search_products).
+# Конфигурация и разделитель - литералы SQL (не параметры), чтобы выражение в запросе совпадало с индексом
+product_search_document = func.to_tsvector(
+    text("'russian'::regconfig"),
+    func.coalesce(Product.name, text("''"))
+    + text("' '")
+    + func.coalesce(Product.description, text("''")),
+)
+Index("ix_products_search", product_search_document, postgresql_using="gin").ddl_if(
+    dialect="postgresql"
+)
+Index(
+    "ix_products_name_trgm",
+    Product.name,
+    postgresql_using="gin",
+    postgresql_ops={"name": "gin_trgm_ops"},
+).ddl_if(dialect="postgresql")
+event.listen(
+    Product.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
 
 class Users(Base):
     __tablename__ = "users"
@@ -105,6 +145,7 @@ class Cart(Base):
 
 class WaitList(Base):
     __tablename__ = "wait_list"
+    __table_args__ = (Index("ix_wait_list_product_id_id", "product_id", "id"),)
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(
@@ -120,6 +161,10 @@ class WaitList(Base):
 
 class Orders(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        Index("ix_orders_status_id", "status", "id"),
+        Index("ix_orders_user_id_created_id", "user_id", "created", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(
@@ -156,6 +201,9 @@ class OrderItem(Base):
         ForeignKey("products.id", ondelete="CASCADE"), nullable=False
     )
     quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Цены товара на момент оформления заказа - по ним считаются итоги продаж
+    price: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
+    purchase_price: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
 
     # Связи
     order: Mapped["Orders"] = relationship(back_populates="items")
@@ -213,4 +261,103 @@ class PickupPoint(Base):
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     district: Mapped[str] = mapped_column(Text, nullable=True)
     address: Mapped[str] = mapped_column(Text, nullable=True)
-    google_map_location: Mapped[str] = mapped_column(Text, nullable=True)
\ No newline at end of file
+    google_map_location: Mapped[str] = mapped_column(Text, nullable=True)
+
+
+class ButtonCallback(Base):
+    __tablename__ = "button_callbacks"
+
+    product_hash: Mapped[str] = mapped_column(String(32), primary_key=True)
+    product_id: Mapped[int] = mapped_column(Integer, nullable=True)
+    item: Mapped[dict] = mapped_column(JSON, nullable=False)
+    chat_ids: Mapped[list] = mapped_column(JSON, nullable=False)
+    created: Mapped[DateTime] = mapped_column(DateTime, default=func.now(), index=True)
+
+
+class ScheduledJob(Base):
+    __tablename__ = "scheduled_jobs"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    name: Mapped[str] = mapped_column(String(150), unique=True)
+    kind: Mapped[str] = mapped_column(String(50), nullable=False)
+    chat_id: Mapped[int] = mapped_column(BigInteger, nullable=True)
+    window_start: Mapped[Time] = mapped_column(Time, nullable=True)
+    window_end: Mapped[Time] = mapped_column(Time, nullable=True)
+    interval: Mapped[int] = mapped_column(Integer, nullable=False)  # секунды
+    jitter: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    misfire_policy: Mapped[str] = mapped_column(
+        String(10), nullable=False, default="skip"
+    )  # "skip" или "catch_up"
+    next_run: Mapped[DateTime] = mapped_column(DateTime, nullable=False, index=True)
+    last_run: Mapped[DateTime] = mapped_column(DateTime, nullable=True)
+    last_error: Mapped[str] = mapped_column(Text, nullable=True)
+    is_paused: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+
+
+class FsmRecord(Base):
+    __tablename__ = "fsm_records"
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    state: Mapped[str] = mapped_column(String(150), nullable=True)
+    data: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    updated: Mapped[DateTime] = mapped_column(DateTime, default=func.now(), index=True)
+
+
+class ProcessedUpdate(Base):
+    __tablename__ = "processed_updates"
+
+    update_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+    created: Mapped[DateTime] = mapped_column(DateTime, default=func.now(), index=True)
+
+
+class SalesDaily(Base):
+    """
+    Дневные итоги продаж по выполненным заказам. Пополняются при выполнении
+    заказа (orm_complete_order), отчёты /stats читают только их.
+    """
+
+    __tablename__ = "sales_daily"
+
+    # total - все продажи (key_id = 0), product/category/seller - по ID из key_id
+    dimension: Mapped[str] = mapped_column(String(10), primary_key=True)
+    day: Mapped[Date] = mapped_column(Date, primary_key=True)
+    key_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    orders: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    units: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    revenue: Mapped[float] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+    cost: Mapped[float] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+
+
+class Admin(Base):
+    __tablename__ = "admins"
+
+    user_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+
+
+class GroupChat(Base):
+    """Чаты и каналы рассылки товаров."""
+
+    __tablename__ = "group_chats"
+
+    chat_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+
+
+class AddedGood(Base):
+    """Очередь товаров для рассылки в чаты (см. get_and_remove_random_item)."""
+
+    __tablename__ = "added_goods"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    item: Mapped[dict] = mapped_column(JSON, nullable=False)
+
+
+class SharingData(Base):
+    """Данные оформления заказа покупателя: адрес доставки или пункт выдачи."""
+
+    __tablename__ = "sharing_data"
+
+    user_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+    data: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    updated: Mapped[DateTime] = mapped_column(
+        DateTime, default=func.now(), onupdate=func.now()
+    )
@@ -1,24 +1,102 @@
+import re
+from datetime import date, datetime
+from decimal import Decimal
 from venv import logger
-from sqlalchemy import func, select, update, delete
+from sqlalchemy import (
+    Select,
+    and_,
+    bindparam,
+    case,
+    delete,
+    exists,
+    func,
+    insert,
+    or_,
+    select,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm import aliased, joinedload, selectinload
 
 from database.models import (
+    AddedGood,
+    Admin,
     Banner,
+    ButtonCallback,
     Cart,
     Category,
     Deliverer,
     DelivererReview,
+    GroupChat,
     Orders,
     OrderItem,
     PickupPoint,
     Product,
+    FsmRecord,
+    product_search_document,
+    ProcessedUpdate,
+    SalesDaily,
+    ScheduledJob,
     Seller,
+    SharingData,
     Users,
     WaitList,
 )
+from common.order_statuses import (
+    ORDER_STATUS_DONE,
+    ORDER_STATUS_IN_PROGRESS,
+    ORDER_STATUS_NEW,
+    PICKUP_ADDRESS,
+    PICKUP_ADDRESSES,
+)
+from utils.metrics import metrics
+from utils.paginator import KeysetPage
+
+
+def _insert_for(session: AsyncSession, model):
+    """
+    Возвращает insert() диалекта текущей БД, чтобы использовать ON CONFLICT.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+
+async def _keyset_page(
+    session: AsyncSession,
+    query: Select,
+    key_columns: list,
+    cursor: tuple | None = None,
+    backwards: bool = False,
+    limit: int = 10,
+) -> KeysetPage:
+    """
+    Keyset-пагинация по убыванию key_columns (новые записи первыми).
+
+    :param cursor: Значения ключа последнего (или первого, если backwards) элемента
+                   текущей страницы. None - первая страница.
+    :param backwards: Листать к более новым записям (кнопка "назад").
+    """
+    key = tuple_(*key_columns) if len(key_columns) > 1 else key_columns[0]
+    if cursor is not None:
+        cursor_value = tuple_(*cursor) if len(key_columns) > 1 else cursor[0]
+        query = query.where(key > cursor_value if backwards else key < cursor_value)
+
+    order_by = [column.asc() if backwards else column.desc() for column in key_columns]
+    result = await session.execute(query.order_by(*order_by).limit(limit + 1))
+    items = list(result.scalars().all())
+
+    has_more = len(items) > limit
+    items = items[:limit]
+    if backwards:
+        items.reverse()
+        return KeysetPage(items, has_previous=has_more, has_next=True)
+    return KeysetPage(items, has_previous=cursor is not None, has_next=has_more)
 
 
 ############### Работа с баннерами (информационными страницами) ###############
@@ -187,6 +265,100 @@ async def orm_add_product(session: AsyncSession, data: dict):
     await session.commit()
 
 
+async def orm_get_or_create_categories(
+    session: AsyncSession, names: set[str]
+) -> dict[str, int]:
+    """
+    ID категорий по названиям (при одинаковых названиях - наименьший);
+    недостающие категории создаются. Два-три запроса на любой набор названий.
+    """
+    if not names:
+        return {}
+    query = (
+        select(Category.name, func.min(Category.id))
+        .where(Category.name.in_(names))
+        .group_by(Category.name)
+    )
+    ids = dict((await session.execute(query)).all())
+    missing = names - ids.keys()
+    if missing:
+        await session.execute(insert(Category), [{"name": name} for name in missing])
+        ids.update((await session.execute(query)).all())
+    return ids
+
+
+async def orm_get_or_create_sellers(
+    session: AsyncSession, names: set[str]
+) -> dict[str, int]:
+    """
+    ID продавцов по именам (при одинаковых именах - наименьший); недостающие создаются.
+    """
+    if not names:
+        return {}
+    query = (
+        select(Seller.name, func.min(Seller.id))
+        .where(Seller.name.in_(names))
+        .group_by(Seller.name)
+    )
+    ids = dict((await session.execute(query)).all())
+    missing = names - ids.keys()
+    if missing:
+        await session.execute(insert(Seller), [{"name": name} for name in missing])
+        ids.update((await session.execute(query)).all())
+    return ids
+
+
+async def orm_upsert_products(session: AsyncSession, rows: list[dict]) -> tuple[int, int]:
+    """
+    Добавляет или обновляет пачку товаров, ключ - название товара.
+    rows - словари с колонками Product (category_id, seller_id, а не объекты);
+    колонок, которых нет в строке, обновление не касается. Новый товар без
+    purchase_price получает закупочную цену, равную розничной.
+    Уникального индекса на название нет, поэтому вместо ON CONFLICT:
+    один SELECT существующих названий, затем executemany для UPDATE и INSERT.
+    Коммит - на вызывающей стороне.
+
+    :return: (добавлено, обновлено)
+    """
+    names = {row["name"] for row in rows}
+    existing = set(
+        (await session.scalars(select(Product.name).where(Product.name.in_(names)))).all()
+    )
+
+    # Строки одного executemany должны иметь одинаковые ключи, поэтому строки
+    # группируются по набору колонок. Для новых товаров отсутствующие колонки
+    # получают значения по умолчанию
+    inserts: dict[frozenset, list[dict]] = {}
+    updates: dict[frozenset, list[dict]] = {}
+    for row in rows:
+        if row["name"] in existing:
+            updates.setdefault(frozenset(row) - {"name"}, []).append(
+                {f"new_{column}": value for column, value in row.items()}
+            )
+        else:
+            if "purchase_price" not in row and "price" in row:
+                row = {**row, "purchase_price": row["price"]}
+            inserts.setdefault(frozenset(row), []).append(row)
+
+    for params in inserts.values():
+        await session.execute(insert(Product), params)
+    for columns, params in updates.items():
+        query = (
+            update(Product.__table__)
+            .where(Product.name == bindparam("new_name"))
+            .values(
+                {
+                    **{column: bindparam(f"new_{column}") for column in columns},
+                    "updated": func.now(),
+                }
+            )
+        )
+        await session.execute(query, params)
+
+    inserted = sum(len(params) for params in inserts.values())
+    return inserted, len(rows) - inserted
+
+
 async def orm_get_product(session: AsyncSession, product_id: int):
     query = (
         select(Product)
@@ -223,6 +395,89 @@ async def orm_get_products(session: AsyncSession, category_id: int = None):
     return result.scalars().all()
 
 
+async def orm_get_products_page(
+    session: AsyncSession,
+    category_id: int = None,
+    cursor_id: int = None,
+    backwards: bool = False,
+    limit: int = 10,
+) -> KeysetPage:
+    """
+    Страница товаров (новые первыми) для просмотра каталога администратором.
+    Категория и продавец не подгружаются - они нужны только в карточке товара.
+
+    :param cursor_id: ID крайнего товара текущей страницы, None - первая страница.
+    """
+    query = select(Product)
+    if category_id is not None:
+        query = query.where(Product.category_id == category_id)
+    return await _keyset_page(
+        session,
+        query,
+        [Product.id],
+        cursor=(cursor_id,) if cursor_id else None,
+        backwards=backwards,
+        limit=limit,
+    )
+
+
+async def orm_search_products(
+    session: AsyncSession, query: str, offset: int = 0, limit: int = 20
+) -> list[Product]:
+    """
+    Поиск товаров по названию и описанию, лучшие совпадения первыми.
+
+    PostgreSQL: полнотекстовый поиск по префиксам слов (индекс ix_products_search)
+    плюс нечёткое совпадение названия по триграммам (ix_products_name_trgm),
+    чтобы находились товары и с опечаткой в запросе.
+    Остальные БД (SQLite в тестах): все слова запроса должны встречаться
+    в названии или описании, порядок - по ID.
+    Зоны доставки в поиск не попадают.
+    """
+    words = re.findall(r"\w+", query.lower())
+    if not words:
+        return []
+
+    statement = select(Product).where(Product.name.not_like("Зона доставки %"))
+    if session.get_bind().dialect.name == "postgresql":
+        ts_query = func.to_tsquery(
+            text("'russian'::regconfig"), " & ".join(f"{word}:*" for word in words)
+        )
+        phrase = " ".join(words)
+        statement = statement.where(
+            or_(
+                product_search_document.bool_op("@@")(ts_query),
+                Product.name.op("%>")(phrase),
+            )
+        ).order_by(
+            (
+                func.ts_rank_cd(product_search_document, ts_query)
+                + func.word_similarity(phrase, Product.name)
+            ).desc(),
+            Product.id,
+        )
+    else:
+        # LIKE в SQLite не различает регистр только у латиницы,
+        # поэтому для кириллицы проверяем ещё вариант с заглавной буквы
+        statement = statement.where(
+            and_(
+                *(
+                    or_(
+                        *(
+                            column.contains(variant, autoescape=True)
+                            for column in (Product.name, Product.description)
+                            for variant in {word, word.capitalize()}
+                        )
+                    )
+                    for word in words
+                )
+            )
+        ).order_by(Product.id)
+
+    result = await session.execute(statement.offset(offset).limit(limit))
+    return result.scalars().all()
+
+
 async def orm_update_product(session: AsyncSession, product_id: int, data: dict):
     query = (
         update(Product)
@@ -241,16 +496,60 @@ async def orm_update_product(session: AsyncSession, product_id: int, data: dict)
     await session.commit()
 
 
+def _has_stock():
+    """Условие: остаток не ведётся или он положительный."""
+    return or_(Product.stock.is_(None), Product.stock > 0)
+
+
 async def orm_update_product_availability(
     session: AsyncSession, product_id: int, is_available: bool
-):
+) -> bool:
+    """
+    Меняет наличие товара. Товар с нулевым остатком в продажу не возвращается -
+    сначала нужно задать остаток (orm_set_product_stock).
+
+    :return: True, если значение действительно изменилось.
+    """
+    conditions = [Product.id == product_id, Product.is_available != is_available]
+    if is_available:
+        conditions.append(_has_stock())
     query = (
         update(Product)
-        .where(Product.id == product_id)
+        .where(*conditions)
         .values(is_available=is_available)
+        .returning(Product.id)
     )
-    await session.execute(query)
+    result = await session.execute(query)
+    changed = result.scalar() is not None
     await session.commit()
+    return changed
+
+
+async def orm_set_product_stock(
+    session: AsyncSession, product_id: int, stock: int | None
+) -> bool:
+    """
+    Устанавливает остаток товара (None - не вести остаток). При положительном
+    остатке товар возвращается в продажу, при нулевом - снимается.
+
+    :return: True, если товар был не в наличии и появился.
+    """
+    was_available = await session.scalar(
+        select(Product.is_available).where(Product.id == product_id)
+    )
+    if was_available is None:
+        return False
+    if stock is None:
+        is_available = Product.is_available
+    else:
+        is_available = stock > 0
+    await session.execute(
+        update(Product)
+        .where(Product.id == product_id)
+        .values(stock=stock, is_available=is_available)
+    )
+    await session.commit()
+    return not was_available and stock is not None and stock > 0
 
 
 async def orm_check_product_available(session: AsyncSession, product_id: int) -> bool:
@@ -273,6 +572,136 @@ async def orm_delete_product(session: AsyncSession, product_id: int):
     await session.commit()
 
 
+############ Админка: массовые операции с товарами ########################
+
+
+def _products_filter(
+    category_id: int = None, seller_id: int = None, is_available: bool = None
+) -> list:
+    """
+    Условия отбора товаров для массовых операций. Зоны доставки не затрагиваются
+    никогда - их наличие и цены меняются только по одной.
+    """
+    conditions = [Product.name.not_like("Зона доставки %")]
+    if category_id is not None:
+        conditions.append(Product.category_id == category_id)
+    if seller_id is not None:
+        conditions.append(Product.seller_id == seller_id)
+    if is_available is not None:
+        conditions.append(Product.is_available == is_available)
+    return conditions
+
+
+def _in_orders():
+    """Условие: товар есть хотя бы в одном заказе."""
+    return exists().where(OrderItem.product_id == Product.id)
+
+
+async def orm_count_products(
+    session: AsyncSession,
+    category_id: int = None,
+    seller_id: int = None,
+    is_available: bool = None,
+    in_orders: bool = None,
+) -> int:
+    """
+    Число товаров по фильтру; in_orders=True - только товары из заказов,
+    False - только товары, которых нет ни в одном заказе.
+    """
+    conditions = _products_filter(category_id, seller_id, is_available)
+    if in_orders is not None:
+        conditions.append(_in_orders() if in_orders else ~_in_orders())
+    query = select(func.count(Product.id)).where(*conditions)
+    return await session.scalar(query)
+
+
+async def orm_set_products_availability(
+    session: AsyncSession,
+    is_available: bool,
+    category_id: int = None,
+    seller_id: int = None,
+) -> list[int]:
+    """
+    Меняет наличие всех товаров категории и/или продавца одним UPDATE.
+    Товары с нулевым остатком в продажу не возвращаются.
+    :return: ID товаров, у которых значение действительно изменилось.
+    """
+    conditions = [
+        *_products_filter(category_id, seller_id),
+        Product.is_available != is_available,
+    ]
+    if is_available:
+        conditions.append(_has_stock())
+    query = (
+        update(Product)
+        .where(*conditions)
+        .values(is_available=is_available, updated=func.now())
+        .returning(Product.id)
+    )
+    result = await session.execute(query)
+    product_ids = list(result.scalars())
+    await session.commit()
+    return product_ids
+
+
+async def orm_apply_markup(
+    session: AsyncSession,
+    percent: Decimal,
+    category_id: int = None,
+    seller_id: int = None,
+) -> list[tuple[int, Decimal]]:
+    """
+    Устанавливает розничную цену = закупочная цена + percent% одним UPDATE.
+    :return: (ID, новая цена) изменённых товаров.
+    """
+    # Decimal, а не float: в PostgreSQL round(numeric, int) есть, а для double нет
+    percent = Decimal(str(percent))
+    query = (
+        update(Product)
+        .where(*_products_filter(category_id, seller_id))
+        .values(
+            price=func.round(Product.purchase_price * (100 + percent) / 100, 2),
+            updated=func.now(),
+        )
+        .returning(Product.id, Product.price)
+    )
+    result = await session.execute(query)
+    prices = [tuple(row) for row in result.all()]
+    await session.commit()
+    return prices
+
+
+async def orm_delete_products(
+    session: AsyncSession,
+    category_id: int = None,
+    seller_id: int = None,
+    only_unavailable: bool = False,
+) -> list[int]:
+    """
+    Удаляет товары по фильтру одним DELETE (позиции корзин и списка ожидания
+    удаляются каскадом). Товары, которые есть в заказах, не удаляются: каскад
+    унёс бы их позиции из истории заказов и итогов продаж.
+    Без категории и продавца ничего не удаляет - защита от удаления всего каталога.
+    :return: ID удалённых товаров.
+    """
+    if category_id is None and seller_id is None:
+        return []
+    query = (
+        delete(Product)
+        .where(
+            *_products_filter(
+                category_id, seller_id, False if only_unavailable else None
+            ),
+            ~_in_orders(),
+        )
+        .returning(Product.id)
+    )
+    result = await session.execute(query)
+    product_ids = list(result.scalars())
+    await session.commit()
+    return product_ids
+
+
 ##################### работа с пользователями #####################################
 
 
@@ -411,9 +840,73 @@ async def orm_get_quantity_in_cart(session: AsyncSession, user_id: int):
 ######################## Работа с заказами #######################################
 
 
+class OutOfStockError(Exception):
+    """Заказ не оформлен: остатка хватает не на все позиции корзины."""
+
+    def __init__(self, products: list[tuple[str, int]]):
+        self.products = products  # (название, сколько осталось)
+        names = ", ".join(f"{name} (осталось {stock})" for name, stock in products)
+        super().__init__(f"Недостаточно товара: {names}")
+
+
+async def _reserve_stock(
+    session: AsyncSession, quantities: dict[int, int]
+) -> dict[int, tuple[Decimal, Decimal]]:
+    """
+    Списывает остатки всех позиций одним UPDATE: строка меняется, только
+    если остатка хватает (или остаток не ведётся - stock IS NULL), при нуле
+    товар снимается с продажи. Строки блокируются подзапросом FOR UPDATE
+    по порядку ID, так что параллельные заказы одного товара ждут друг друга
+    без взаимных блокировок и не уводят остаток в минус.
+
+    :return: {ID товара: (цена, закупочная цена)} на момент списания.
+
+    :raises OutOfStockError: если хоть одной позиции не хватает. Изменения
+        не откатываются здесь - это делает вызывающая сторона.
+    """
+    quantity = case(quantities, value=Product.id)
+    locked_ids = (
+        select(Product.id)
+        .where(Product.id.in_(quantities))
+        .order_by(Product.id)
+        .with_for_update()
+    )
+    query = (
+        update(Product)
+        .where(
+            Product.id.in_(locked_ids),
+            or_(Product.stock.is_(None), Product.stock >= quantity),
+        )
+        .values(
+            stock=Product.stock - quantity,
+            is_available=case(
+                (Product.stock - quantity <= 0, False), else_=Product.is_available
+            ),
+        )
+        .returning(Product.id, Product.price, Product.purchase_price)
+    )
+    reserved = {
+        product_id: (price, purchase_price)
+        for product_id, price, purchase_price in await session.execute(query)
+    }
+    short = quantities.keys() - reserved.keys()
+    if short:
+        result = await session.execute(
+            select(Product.name, Product.stock).where(Product.id.in_(short))
+        )
+        raise OutOfStockError([(name, stock or 0) for name, stock in result.all()])
+    return reserved
+
+
 async def orm_create_order(
     session: AsyncSession, user_id: int, delivery_address: str, phone_number: str
 ) -> Orders:
+    """
+    Оформляет заказ из корзины пользователя и списывает остатки товаров.
+
+    :raises OutOfStockError: если какого-то товара не хватает; заказ
+        не создаётся, корзина остаётся как была.
+    """
     # 1. Получаем товары из корзины с загруженными продуктами
     query = (
         select(Cart).where(Cart.user_id == user_id).options(joinedload(Cart.product))
@@ -424,10 +917,22 @@ async def orm_create_order(
     if not cart_items:
         return None
 
-    # 2. Считаем общую сумму
-    total_price = sum(item.product.price * item.quantity for item in cart_items)
+    # 2. Резервируем остатки (повторы одного товара в корзине суммируются)
+    quantities: dict[int, int] = {}
+    for item in cart_items:
+        quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+    try:
+        prices = await _reserve_stock(session, quantities)
+    except OutOfStockError:
+        await session.rollback()
+        raise
+
+    # 3. Считаем общую сумму по ценам, зафиксированным при списании
+    total_price = sum(prices[item.product_id][0] * item.quantity for item in cart_items)
 
-    # 3. Создаём заказ
+    # 4. Создаём заказ (самовывоз - всегда одним написанием, см. PICKUP_ADDRESS)
+    if delivery_address and delivery_address.strip().casefold() == PICKUP_ADDRESS:
+        delivery_address = PICKUP_ADDRESS
     new_order = Orders(
         user_id=user_id,
         delivery_address=delivery_address,
@@ -437,20 +942,24 @@ async def orm_create_order(
     session.add(new_order)
     await session.flush()  # Получаем ID заказа
 
-    # 4. Создаём OrderItem
+    # 5. Создаём OrderItem
     order_item = [
         OrderItem(
-            order_id=new_order.id, product_id=item.product_id, quantity=item.quantity
+            order_id=new_order.id,
+            product_id=item.product_id,
+            quantity=item.quantity,
+            price=prices[item.product_id][0],
+            purchase_price=prices[item.product_id][1],
         )
         for item in cart_items
     ]
     session.add_all(order_item)
 
-    # 5. Очищаем корзину
+    # 6. Очищаем корзину
     delete_query = delete(Cart).where(Cart.user_id == user_id)
     await session.execute(delete_query)
 
-    # 6. Дополнительно загружаем связанные данные перед возвратом
+    # 7. Дополнительно загружаем связанные данные перед возвратом
     full_order = await session.execute(
         select(Orders)
         .where(Orders.id == new_order.id)
@@ -484,6 +993,86 @@ async def orm_get_orders(
     return result.scalars().all()
 
 
+async def orm_get_orders_page(
+    session: AsyncSession,
+    status: str = None,
+    cursor_id: int = None,
+    backwards: bool = False,
+    limit: int = 10,
+) -> KeysetPage:
+    """
+    Страница заказов (новые первыми) для просмотра администратором.
+    Использует индекс (status, id) и подгружает только покупателя.
+
+    :param cursor_id: ID крайнего заказа текущей страницы, None - первая страница.
+    """
+    query = select(Orders).options(joinedload(Orders.user))
+    if status is not None:
+        query = query.where(Orders.status == status)
+    return await _keyset_page(
+        session,
+        query,
+        [Orders.id],
+        cursor=(cursor_id,) if cursor_id else None,
+        backwards=backwards,
+        limit=limit,
+    )
+
+
+async def orm_get_delivery_orders_page(
+    session: AsyncSession,
+    cursor_id: int = None,
+    backwards: bool = False,
+    limit: int = 10,
+) -> KeysetPage:
+    """
+    Страница новых заказов с доставкой (без самовывоза) для ленты доставщиков.
+    Фильтр по статусу и сортировка идут по индексу (status, id).
+
+    :param cursor_id: ID крайнего заказа текущей страницы, None - первая страница.
+    """
+    query = (
+        select(Orders)
+        .where(
+            Orders.status == ORDER_STATUS_NEW,
+            # Явный список вместо lower(): в SQLite lower() не работает с кириллицей
+            or_(
+                Orders.delivery_address.is_(None),
+                Orders.delivery_address.notin_(PICKUP_ADDRESSES),
+            ),
+        )
+        .options(joinedload(Orders.user))
+    )
+    return await _keyset_page(
+        session,
+        query,
+        [Orders.id],
+        cursor=(cursor_id,) if cursor_id else None,
+        backwards=backwards,
+        limit=limit,
+    )
+
+
+async def orm_take_order(session: AsyncSession, order_id: int, deliverer_id: int):
+    """
+    Назначает доставщика на заказ, если заказ ещё никто не принял.
+    Проверка и обновление выполняются одним запросом, поэтому два доставщика
+    не могут принять один заказ.
+
+    :return: ID покупателя (user_id), либо None, если заказ уже принят.
+    """
+    query = (
+        update(Orders)
+        .where(Orders.id == order_id, Orders.status == ORDER_STATUS_NEW)
+        .values(deliverer_id=deliverer_id, status=ORDER_STATUS_IN_PROGRESS)
+        .returning(Orders.user_id)
+    )
+    result = await session.execute(query)
+    user_id = result.scalar()
+    await session.commit()
+    return user_id
+
+
 async def orm_get_user_orders(session: AsyncSession, user_id: int):
     query = (
         select(Orders)
@@ -491,7 +1080,67 @@ async def orm_get_user_orders(session: AsyncSession, user_id: int):
         .options(joinedload(Orders.items).joinedload(OrderItem.product))
     )
     result = await session.execute(query)
-    return result.scalars().all()
+    return result.unique().scalars().all()
+
+
+async def orm_get_user_orders_page(
+    session: AsyncSession,
+    user_id: int,
+    cursor_id: int = None,
+    backwards: bool = False,
+    limit: int = 5,
+) -> KeysetPage:
+    """
+    Страница истории заказов покупателя (все статусы, новые первыми).
+    Keyset-пагинация по (created, id) по индексу (user_id, created, id):
+    стоимость страницы не зависит от числа заказов покупателя.
+    Товары заказов не загружаются - см. orm_get_orders_items.
+
+    :param cursor_id: ID крайнего заказа текущей страницы, None - первая страница.
+                      Его дата создания подставляется в запрос подзапросом.
+    """
+    query = (
+        select(Orders)
+        .where(Orders.user_id == user_id)
+        .options(joinedload(Orders.deliverer))
+    )
+    cursor = None
+    if cursor_id:
+        cursor_order = aliased(Orders)
+        created = (
+            select(cursor_order.created)
+            .where(cursor_order.id == cursor_id)
+            .scalar_subquery()
+        )
+        cursor = (created, cursor_id)
+    return await _keyset_page(
+        session,
+        query,
+        [Orders.created, Orders.id],
+        cursor=cursor,
+        backwards=backwards,
+        limit=limit,
+    )
+
+
+async def orm_get_orders_items(
+    session: AsyncSession, order_ids: list[int]
+) -> dict[int, list]:
+    """
+    Товары заказов одним запросом: {ID заказа: [строки с name, price, quantity]}.
+    """
+    if not order_ids:
+        return {}
+    result = await session.execute(
+        select(OrderItem.order_id, Product.name, OrderItem.price, OrderItem.quantity)
+        .join(OrderItem.product)
+        .where(OrderItem.order_id.in_(order_ids))
+        .order_by(OrderItem.order_id, OrderItem.id)
+    )
+    items = {order_id: [] for order_id in order_ids}
+    for row in result:
+        items[row.order_id].append(row)
+    return items
 
 
 async def orm_update_order(session: AsyncSession, order_id: int, data: dict):
@@ -514,6 +1163,135 @@ async def orm_update_order(session: AsyncSession, order_id: int, data: dict):
     await session.commit()
 
 
+async def orm_complete_order(session: AsyncSession, order_id: int) -> bool:
+    """
+    Переводит заказ в статус "Выполнен" и добавляет его в дневные итоги продаж
+    (sales_daily) в той же транзакции.
+
+    Статус меняется условным UPDATE (только если заказ ещё не выполнен), поэтому
+    повторное нажатие кнопки или гонка двух обработчиков не учтёт заказ дважды.
+    Выручка и себестоимость считаются по ценам позиций на момент оформления
+    (OrderItem.price, OrderItem.purchase_price), так что итог дня всегда равен
+    сумме строк по товарам, категориям и продавцам.
+
+    :return: False, если заказа нет или он уже выполнен.
+    """
+    result = await session.execute(
+        update(Orders)
+        .where(Orders.id == order_id, Orders.status != ORDER_STATUS_DONE)
+        .values(status=ORDER_STATUS_DONE)
+        .returning(Orders.id)
+    )
+    if result.scalar_one_or_none() is None:
+        await session.rollback()
+        return False
+
+    items = await session.execute(
+        select(
+            OrderItem.quantity,
+            Product.id,
+            Product.category_id,
+            Product.seller_id,
+            OrderItem.price,
+            OrderItem.purchase_price,
+        )
+        .join(Product, OrderItem.product_id == Product.id)
+        .where(OrderItem.order_id == order_id)
+    )
+    day = date.today()
+    total = {"units": 0, "revenue": Decimal(0), "cost": Decimal(0)}
+    rows: dict[tuple[str, int], dict] = {}
+    for quantity, product_id, category_id, seller_id, price, purchase_price in items:
+        total["units"] += quantity
+        total["revenue"] += price * quantity
+        total["cost"] += purchase_price * quantity
+        for key in (
+            ("product", product_id),
+            ("category", category_id),
+            ("seller", seller_id or 0),
+        ):
+            row = rows.setdefault(key, {"units": 0, "revenue": 0, "cost": 0})
+            row["units"] += quantity
+            row["revenue"] += price * quantity
+            row["cost"] += purchase_price * quantity
+    rows[("total", 0)] = total
+
+    # Одинаковый порядок строк во всех транзакциях - без взаимных блокировок
+    values = [
+        {"dimension": dimension, "day": day, "key_id": key_id, "orders": 1, **row}
+        for (dimension, key_id), row in sorted(rows.items())
+    ]
+    query = _insert_for(session, SalesDaily).values(values)
+    query = query.on_conflict_do_update(
+        index_elements=[SalesDaily.dimension, SalesDaily.day, SalesDaily.key_id],
+        set_={
+            "orders": SalesDaily.orders + query.excluded.orders,
+            "units": SalesDaily.units + query.excluded.units,
+            "revenue": SalesDaily.revenue + query.excluded.revenue,
+            "cost": SalesDaily.cost + query.excluded.cost,
+        },
+    )
+    await session.execute(query)
+    await session.commit()
+    return True
+
+
+SALES_NAMES = {
+    "product": (Product.id, Product.name),
+    "category": (Category.id, Category.name),
+    "seller": (Seller.id, Seller.name),
+}
+
+
+async def orm_get_sales_report(
+    session: AsyncSession, date_from: date, date_to: date, top: int = 5
+) -> dict:
+    """
+    Отчёт о продажах за период [date_from, date_to] из дневных итогов.
+    Читает не больше строки на день и товар (категорию, продавца), поэтому
+    не зависит от числа заказов в истории.
+
+    :return: {"total": строка с orders, units, revenue, cost,
+              "product"/"category"/"seller": до top строк с name, ...,
+              по убыванию выручки}
+    """
+    sums = (
+        func.coalesce(func.sum(SalesDaily.orders), 0).label("orders"),
+        func.coalesce(func.sum(SalesDaily.units), 0).label("units"),
+        func.coalesce(func.sum(SalesDaily.revenue), 0).label("revenue"),
+        func.coalesce(func.sum(SalesDaily.cost), 0).label("cost"),
+    )
+    period = (SalesDaily.day >= date_from, SalesDaily.day <= date_to)
+    result = await session.execute(
+        select(*sums).where(SalesDaily.dimension == "total", *period)
+    )
+    report = {"total": result.one()}
+
+    for dimension, (id_column, name_column) in SALES_NAMES.items():
+        totals = (
+            select(SalesDaily.key_id, *sums)
+            .where(SalesDaily.dimension == dimension, *period)
+            .group_by(SalesDaily.key_id)
+            .order_by(func.sum(SalesDaily.revenue).desc(), SalesDaily.key_id)
+            .limit(top)
+            .subquery()
+        )
+        result = await session.execute(
+            select(
+                totals.c.key_id,
+                name_column.label("name"),
+                totals.c.orders,
+                totals.c.units,
+                totals.c.revenue,
+                totals.c.cost,
+            )
+            .outerjoin(id_column.table, id_column == totals.c.key_id)
+            .order_by(totals.c.revenue.desc(), totals.c.key_id)
+        )
+        report[dimension] = result.all()
+    return report
+
+
 ################# работа со списком заявок ################################
 
 
@@ -543,6 +1321,51 @@ async def orm_add_to_wait_list(session: AsyncSession, user_id: int, product_id:
     return True
 
 
+async def orm_get_wait_list_page(
+    session: AsyncSession, product_id: int, after_id: int = 0, limit: int = 500
+):
+    """
+    Возвращает страницу заявок на товар (keyset-пагинация по WaitList.id).
+
+    :param after_id: ID последней обработанной заявки.
+    :return: Список строк (id, user_id), упорядоченных по id.
+    """
+    query = (
+        select(WaitList.id, WaitList.user_id)
+        .where(WaitList.product_id == product_id, WaitList.id > after_id)
+        .order_by(WaitList.id)
+        .limit(limit)
+    )
+    result = await session.execute(query)
+    return result.all()
+
+
+async def orm_delete_wait_list_entries(session: AsyncSession, entry_ids: list[int]):
+    """
+    Удаляет обработанные заявки одним запросом.
+    """
+    if not entry_ids:
+        return
+    query = delete(WaitList).where(WaitList.id.in_(entry_ids))
+    await session.execute(query)
+    await session.commit()
+
+
+async def orm_get_restocked_wait_list_products(session: AsyncSession) -> list[int]:
+    """
+    Возвращает ID товаров в наличии, на которые ещё остались заявки
+    (например, если рассылка прервалась из-за перезапуска).
+    """
+    query = (
+        select(WaitList.product_id)
+        .join(WaitList.product)
+        .where(Product.is_available == True)
+        .distinct()
+    )
+    result = await session.execute(query)
+    return list(result.scalars().all())
+
+
 ################# работа с доставкой и доставщиками################################
 
 
@@ -782,3 +1605,313 @@ async def orm_get_deliverer_reviews_and_update_summary(
     await session.commit()
 
     return average_rating
+
+
+############ кнопки опубликованных товаров #######################################
+
+
+async def orm_save_button_callbacks(session: AsyncSession, entries: list[dict]):
+    """
+    Сохраняет (или обновляет) пачку записей реестра кнопок одним запросом.
+
+    :param entries: Список словарей с ключами product_hash, product_id, item, chat_ids, created.
+    """
+    if not entries:
+        return
+    query = _insert_for(session, ButtonCallback).values(entries)
+    query = query.on_conflict_do_update(
+        index_elements=[ButtonCallback.product_hash],
+        set_={
+            "product_id": query.excluded.product_id,
+            "item": query.excluded.item,
+            "chat_ids": query.excluded.chat_ids,
+            "created": query.excluded.created,
+        },
+    )
+    await session.execute(query)
+    await session.commit()
+
+
+async def orm_get_button_callback(session: AsyncSession, product_hash: str):
+    query = select(ButtonCallback).where(ButtonCallback.product_hash == product_hash)
+    result = await session.execute(query)
+    return result.scalar_one_or_none()
+
+
+async def orm_delete_expired_button_callbacks(session: AsyncSession, before: datetime):
+    """
+    Удаляет записи реестра кнопок, созданные раньше before.
+    """
+    query = delete(ButtonCallback).where(ButtonCallback.created < before)
+    await session.execute(query)
+    await session.commit()
+
+
+############ планировщик задач #######################################
+
+
+async def orm_get_jobs(session: AsyncSession, job_id: int = None):
+    """
+    Возвращает все задачи планировщика или одну задачу по job_id (или None).
+    """
+    query = select(ScheduledJob).order_by(ScheduledJob.id)
+    if job_id is not None:
+        query = query.where(ScheduledJob.id == job_id)
+        result = await session.execute(query)
+        return result.scalar_one_or_none()
+    result = await session.execute(query)
+    return result.scalars().all()
+
+
+async def orm_get_due_jobs(session: AsyncSession, now: datetime, limit: int = 100):
+    """
+    Возвращает активные задачи, время запуска которых уже наступило.
+    """
+    query = (
+        select(ScheduledJob)
+        .where(ScheduledJob.is_paused == False, ScheduledJob.next_run <= now)
+        .order_by(ScheduledJob.next_run)
+        .limit(limit)
+    )
+    result = await session.execute(query)
+    return result.scalars().all()
+
+
+async def orm_get_next_run_time(session: AsyncSession):
+    """
+    Возвращает ближайшее время запуска среди активных задач (или None).
+    """
+    query = select(func.min(ScheduledJob.next_run)).where(
+        ScheduledJob.is_paused == False
+    )
+    result = await session.execute(query)
+    return result.scalar()
+
+
+async def orm_add_job(session: AsyncSession, data: dict) -> bool:
+    """
+    Добавляет задачу планировщика. Возвращает False, если задача с таким именем уже есть.
+    """
+    existing_job = await session.execute(
+        select(ScheduledJob.id).where(ScheduledJob.name == data["name"])
+    )
+    if existing_job.scalar():
+        return False
+    session.add(ScheduledJob(**data))
+    await session.commit()
+    return True
+
+
+async def orm_update_job(session: AsyncSession, job_id: int, data: dict):
+    query = update(ScheduledJob).where(ScheduledJob.id == job_id).values(**data)
+    await session.execute(query)
+    await session.commit()
+
+
+async def orm_claim_job(
+    session: AsyncSession, job_id: int, expected_next_run: datetime, next_run: datetime
+) -> bool:
+    """
+    Захватывает задачу для запуска, сдвигая next_run.
+
+    Условие на старое значение next_run не даёт двум процессам
+    запустить одну и ту же задачу дважды.
+    :return: True, если задача захвачена этим вызовом.
+    """
+    query = (
+        update(ScheduledJob)
+        .where(
+            ScheduledJob.id == job_id,
+            ScheduledJob.next_run == expected_next_run,
+        )
+        .values(next_run=next_run)
+        .returning(ScheduledJob.id)
+    )
+    result = await session.execute(query)
+    claimed = result.scalar() is not None
+    await session.commit()
+    return claimed
+
+
+############ хранилище состояний FSM #######################################
+
+
+async def orm_get_fsm_record(session: AsyncSession, key: str):
+    query = select(FsmRecord).where(FsmRecord.key == key)
+    result = await session.execute(query)
+    return result.scalar_one_or_none()
+
+
+async def orm_save_fsm_records(
+    session: AsyncSession, records: list[dict], deleted_keys: list[str] = ()
+):
+    """
+    Сохраняет пачку состояний FSM одним upsert и удаляет сброшенные одним DELETE.
+
+    :param records: Словари с ключами key, state, data, updated.
+    :param deleted_keys: Ключи, у которых нет ни состояния, ни данных.
+    """
+    if records:
+        query = _insert_for(session, FsmRecord).values(records)
+        query = query.on_conflict_do_update(
+            index_elements=[FsmRecord.key],
+            set_={
+                "state": query.excluded.state,
+                "data": query.excluded.data,
+                "updated": query.excluded.updated,
+            },
+        )
+        await session.execute(query)
+    if deleted_keys:
+        await session.execute(delete(FsmRecord).where(FsmRecord.key.in_(deleted_keys)))
+    await session.commit()
+
+
+async def orm_delete_expired_fsm_records(session: AsyncSession, before: datetime) -> int:
+    """
+    Удаляет брошенные сценарии: записи, не менявшиеся с момента before.
+    """
+    result = await session.execute(delete(FsmRecord).where(FsmRecord.updated < before))
+    await session.commit()
+    return result.rowcount
+
+
+############ обработанные апдейты (защита от повторов) ##################
+
+
+async def orm_claim_update(session: AsyncSession, update_id: int) -> bool:
+    """
+    Отмечает апдейт как обработанный.
+    :return: False, если апдейт с таким update_id уже обрабатывался.
+    """
+    query = (
+        _insert_for(session, ProcessedUpdate)
+        .values(update_id=update_id, created=datetime.now())
+        .on_conflict_do_nothing(index_elements=[ProcessedUpdate.update_id])
+        .returning(ProcessedUpdate.update_id)
+    )
+    result = await session.execute(query)
+    claimed = result.scalar() is not None
+    await session.commit()
+    return claimed
+
+
+async def orm_delete_processed_updates(session: AsyncSession, before: datetime) -> int:
+    result = await session.execute(
+        delete(ProcessedUpdate).where(ProcessedUpdate.created < before)
+    )
+    await session.commit()
+    return result.rowcount
+
+
+############ админы, чаты рассылки, очередь товаров, данные заказа ##################
+# Раньше хранились в JSON-файлах; в БД они общие для всех воркеров (BOT_WORKERS > 1)
+
+
+async def orm_add_admins(session: AsyncSession, user_ids: list[int]) -> list[int]:
+    """
+    Добавляет админов.
+    :return: ID админов, которых ещё не было.
+    """
+    if not user_ids:
+        return []
+    result = await session.execute(
+        _insert_for(session, Admin)
+        .values([{"user_id": user_id} for user_id in user_ids])
+        .on_conflict_do_nothing(index_elements=[Admin.user_id])
+        .returning(Admin.user_id)
+    )
+    added = list(result.scalars().all())
+    await session.commit()
+    return added
+
+
+async def orm_get_admins(session: AsyncSession) -> list[int]:
+    result = await session.execute(select(Admin.user_id).order_by(Admin.user_id))
+    return list(result.scalars().all())
+
+
+async def orm_add_group_chats(session: AsyncSession, chat_ids: list[int]) -> list[int]:
+    """
+    Добавляет чаты в рассылку.
+    :return: ID чатов, которых в рассылке ещё не было.
+    """
+    if not chat_ids:
+        return []
+    result = await session.execute(
+        _insert_for(session, GroupChat)
+        .values([{"chat_id": chat_id} for chat_id in chat_ids])
+        .on_conflict_do_nothing(index_elements=[GroupChat.chat_id])
+        .returning(GroupChat.chat_id)
+    )
+    added = list(result.scalars().all())
+    await session.commit()
+    return added
+
+
+async def orm_get_group_chats(session: AsyncSession) -> list[int]:
+    result = await session.execute(select(GroupChat.chat_id).order_by(GroupChat.chat_id))
+    return list(result.scalars().all())
+
+
+async def orm_add_goods(session: AsyncSession, items: list[dict]) -> None:
+    """Добавляет товары в очередь рассылки."""
+    if items:
+        await session.execute(insert(AddedGood), [{"item": item} for item in items])
+        await session.commit()
+
+
+async def orm_pop_random_good(session: AsyncSession) -> dict | None:
+    """
+    Забирает из очереди рассылки случайный товар одним DELETE ... RETURNING.
+    Строка выбирается с FOR UPDATE SKIP LOCKED, так что два процесса
+    не заберут один товар.
+    """
+    chosen = (
+        select(AddedGood.id)
+        .order_by(func.random())
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    result = await session.execute(
+        delete(AddedGood).where(AddedGood.id == chosen).returning(AddedGood.item)
+    )
+    item = result.scalar_one_or_none()
+    await session.commit()
+    return item
+
+
+async def orm_save_sharing_data(session: AsyncSession, user_id: int, data: dict) -> None:
+    """Заменяет данные оформления заказа пользователя."""
+    query = _insert_for(session, SharingData).values(
+        user_id=user_id, data=data, updated=datetime.now()
+    )
+    query = query.on_conflict_do_update(
+        index_elements=[SharingData.user_id],
+        set_={"data": query.excluded.data, "updated": query.excluded.updated},
+    )
+    await session.execute(query)
+    await session.commit()
+
+
+async def orm_get_sharing_data(session: AsyncSession, user_id: int) -> dict:
+    result = await session.execute(
+        select(SharingData.data).where(SharingData.user_id == user_id)
+    )
+    return result.scalar_one_or_none() or {}
+
+
+async def orm_delete_sharing_data(session: AsyncSession, user_id: int) -> bool:
+    result = await session.execute(
+        delete(SharingData).where(SharingData.user_id == user_id)
+    )
+    await session.commit()
+    return result.rowcount > 0
+
+
+# Время выполнения каждой orm_* функции. Должно оставаться в конце модуля,
+# чтобы обернуть все функции (и вызовы одной orm_* функции из другой).
+metrics.instrument(
+    globals(), "orm_", "bot_db_call_seconds", "Время выполнения orm_* функций"
+)
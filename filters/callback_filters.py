@@ -1,4 +1,42 @@
 from aiogram.filters.callback_data import CallbackData
 
 class StatusCallback(CallbackData, prefix="status"):
-    value: str
\ No newline at end of file
+    value: str
+
+
+class AdminOrdersCallback(CallbackData, prefix="aord"):
+    action: str  # "page" - список заказов, "order" - карточка заказа
+    status: str
+    cursor: int = 0  # ID крайнего заказа страницы, 0 - первая страница
+    backwards: bool = False
+    order_id: int = 0
+
+
+class AdminCatalogCallback(CallbackData, prefix="acat"):
+    action: str  # "page" - список товаров, "product" - карточка товара
+    category_id: int = 0  # 0 - все товары
+    cursor: int = 0  # ID крайнего товара страницы, 0 - первая страница
+    backwards: bool = False
+    product_id: int = 0
+
+
+class DelivererOrdersCallback(CallbackData, prefix="dord"):
+    action: str  # "page" - лента заказов, "accept" - принять заказ
+    cursor: int = 0  # ID крайнего заказа страницы, 0 - первая страница
+    backwards: bool = False
+    order_id: int = 0
+
+
+class BulkDeleteCallback(CallbackData, prefix="bdel"):
+    category_id: int = 0  # 0 - любая категория
+    seller_id: int = 0  # 0 - любой продавец
+    only_unavailable: bool = False
+
+
+class BulkMarkupCallback(CallbackData, prefix="bmrk"):
+    percent: str  # наценка строкой, чтобы не терять точность Decimal
+
+
+class OrderHistoryCallback(CallbackData, prefix="uhist"):
+    cursor: int = 0  # ID крайнего заказа страницы, 0 - первая страница
+    backwards: bool = False
@@ -1,58 +1,219 @@
 import json
-import datetime
-from datetime import datetime
+import logging
+import os
+from datetime import date, datetime, time
+from decimal import Decimal
+from pathlib import Path
+from typing import Awaitable, Callable, Iterator
+
+from sqlalchemy import JSON, Table, func, insert, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from config import FIXTURES_CHUNK, FIXTURES_DIR
 from database.models import Base
 from utils.serializer import custom_serializer
 
+# Прогресс выгрузки/загрузки: (таблица, строк обработано в ней)
+Progress = Callable[[str, int], Awaitable[None]]
+
 
+def _tables(names=None) -> list[Table]:
+    """Таблицы в порядке внешних ключей: сначала те, на которые ссылаются."""
+    return [
+        table
+        for table in Base.metadata.sorted_tables
+        if names is None or table.name in names
+    ]
 
 
+async def dump_fixtures(
+    session: AsyncSession,
+    output_dir: str | Path = FIXTURES_DIR,
+    chunk: int = FIXTURES_CHUNK,
+    progress: Progress | None = None,
+) -> dict[str, int]:
+    """
+    Выгружает каждую таблицу в свой файл <таблица>.ndjson (одна строка - одна запись).
+    Строки читаются потоком пачками по chunk (серверный курсор там, где он есть),
+    так что память не зависит от размера таблиц.
+    Файл сначала пишется во временный и заменяет старый только целиком.
 
-async def dump_fixtures(session: AsyncSession, output_file="fixtures/fixtures.json"):
-    data = {}
-    for mapper in Base.registry.mappers:
-        cls = mapper.class_
-        table = cls.__tablename__
-        result = await session.execute(cls.__table__.select())
-        records = result.all()
-        data[table] = [dict(row._mapping) for row in records]
+    :return: Сколько строк выгружено из каждой таблицы.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    counts = {}
+    for table in _tables():
+        path = output_dir / f"{table.name}.ndjson"
+        tmp_path = path.with_suffix(".ndjson.tmp")
+        count = 0
+        result = await session.stream(
+            select(table).execution_options(yield_per=chunk)
+        )
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            async for rows in result.partitions():
+                f.writelines(
+                    json.dumps(
+                        dict(row._mapping), ensure_ascii=False, default=custom_serializer
+                    )
+                    + "\n"
+                    for row in rows
+                )
+                count += len(rows)
+                if progress:
+                    await progress(table.name, count)
+        os.replace(tmp_path, path)
+        counts[table.name] = count
+        logging.info(f"Фикстуры: {table.name} - выгружено {count} строк")
+    return counts
 
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False, default=custom_serializer)
 
+def _converters(table: Table) -> dict[str, Callable]:
+    """Функции, возвращающие значениям из JSON их тип в БД (даты, Decimal)."""
+    converters = {}
+    for column in table.columns:
+        try:
+            python_type = column.type.python_type
+        except NotImplementedError:
+            continue
+        if python_type in (datetime, date, time):
+            converters[column.name] = python_type.fromisoformat
+        elif python_type is Decimal:
+            converters[column.name] = lambda value: Decimal(str(value))
+    return converters
 
-def parse_datetime_fields(record: dict, fields: list[str]):
-    """Преобразует строковые даты в datetime-объекты"""
-    for field in fields:
-        if field in record and isinstance(record[field], str):
+
+def _parse(record: dict, converters: dict[str, Callable]) -> dict:
+    for name, convert in converters.items():
+        value = record.get(name)
+        if isinstance(value, (str, int, float)):
             try:
-                record[field] = datetime.fromisoformat(record[field])
+                record[name] = convert(value)
             except ValueError:
                 pass  # на случай некорректной строки
     return record
 
 
-async def load_fixtures(session: AsyncSession, input_file="fixtures/fixtures.json"):
-    models = {
-        mapper.class_.__tablename__: mapper.class_ for mapper in Base.registry.mappers
-    }
+def _read_records(input_path: Path) -> dict[str, Callable[[], Iterator[dict]]]:
+    """
+    Источники записей по таблицам. Каталог - файлы <таблица>.ndjson, читаются
+    построчно. Файл .json - старый формат (один документ), читается целиком.
+    """
+    if input_path.is_dir():
+
+        def read_ndjson(path: Path) -> Iterator[dict]:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
 
-    with open(input_file, "r", encoding="utf-8") as f:
+        return {
+            path.stem: lambda path=path: read_ndjson(path)
+            for path in input_path.glob("*.ndjson")
+        }
+
+    with open(input_path, "r", encoding="utf-8") as f:
         fixtures = json.load(f)
+    return {table: lambda rows=rows: iter(rows) for table, rows in fixtures.items()}
 
-    # Удаляем старые данные
-    for table in reversed(models.keys()):
-        if table in fixtures:
-            await session.execute(models[table].__table__.delete())
-    await session.commit()
 
-    # Загружаем новые данные
-    for table in fixtures:
-        model = models[table]
-        for record in fixtures[table]:
-            # Попробуем преобразовать поля 'created' и 'updated' если они есть
-            record = parse_datetime_fields(record, ["created", "updated"])
-            session.add(model(**record))
+def _batches(records: Iterator[dict], size: int) -> Iterator[list[dict]]:
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def _copy_batch(session: AsyncSession, table: Table, batch: list[dict]) -> None:
+    """COPY пачки записей в таблицу через asyncpg - в разы быстрее INSERT."""
+    connection = await session.connection()
+    raw = await connection.get_raw_connection()
+    columns = [column.name for column in table.columns]
+    # asyncpg принимает значения колонок json строкой
+    json_columns = {column.name for column in table.columns if isinstance(column.type, JSON)}
+    await raw.driver_connection.copy_records_to_table(
+        table.name,
+        columns=columns,
+        records=[
+            tuple(
+                json.dumps(record.get(name)) if name in json_columns else record.get(name)
+                for name in columns
+            )
+            for record in batch
+        ],
+    )
+
+
+async def _reset_sequence(session: AsyncSession, table: Table) -> None:
+    """После вставки с явными ID сдвигает последовательность PostgreSQL за максимум."""
+    column = table.autoincrement_column
+    if column is None:
+        return
+    await session.execute(
+        select(
+            func.setval(
+                func.pg_get_serial_sequence(table.name, column.name),
+                select(func.coalesce(func.max(column), 0) + 1).scalar_subquery(),
+                False,
+            )
+        )
+    )
+
+
+async def load_fixtures(
+    session: AsyncSession,
+    input_path: str | Path = FIXTURES_DIR,
+    chunk: int = FIXTURES_CHUNK,
+    progress: Progress | None = None,
+) -> dict[str, int]:
+    """
+    Заменяет данные таблиц, которые есть в фикстурах, данными из фикстур.
+
+    Записи читаются потоком и вставляются пачками по chunk: в PostgreSQL
+    (asyncpg) через COPY, в остальных БД - executemany. Таблицы заполняются
+    в порядке внешних ключей, всё выполняется в одной транзакции.
+
+    :return: Сколько строк загружено в каждую таблицу.
+    """
+    sources = _read_records(Path(input_path))
+    tables = _tables(sources.keys())
+    for name in sources.keys() - {table.name for table in tables}:
+        logging.warning(f"Фикстуры: таблицы {name} нет в схеме, пропускаем")
+    bind = session.get_bind()
+    use_copy = bind.dialect.driver == "asyncpg"
+
+    counts = {}
+    try:
+        # Удаляем старые данные: сначала таблицы, которые ссылаются на другие
+        if bind.dialect.name == "postgresql" and tables:
+            names = ", ".join(f'"{table.name}"' for table in tables)
+            await session.execute(text(f"TRUNCATE {names}"))
+        else:
+            for table in reversed(tables):
+                await session.execute(table.delete())
+
+        for table in tables:
+            converters = _converters(table)
+            count = 0
+            records = (_parse(record, converters) for record in sources[table.name]())
+            for batch in _batches(records, chunk):
+                if use_copy:
+                    await _copy_batch(session, table, batch)
+                else:
+                    await session.execute(insert(table), batch)
+                count += len(batch)
+                if progress:
+                    await progress(table.name, count)
+            if bind.dialect.name == "postgresql":
+                await _reset_sequence(session, table)
+            counts[table.name] = count
+            logging.info(f"Фикстуры: {table.name} - загружено {count} строк")
+    except Exception:
+        await session.rollback()
+        raise
     await session.commit()
+    return counts
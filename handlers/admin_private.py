@@ -1,7 +1,13 @@
+import io
 import logging
+import re
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
 from aiogram import F, Bot, Router, types
 from aiogram.dispatcher import router
-from aiogram.filters import Command, StateFilter, or_f
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.filters import Command, CommandObject, StateFilter, or_f
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
@@ -15,30 +21,67 @@ from database.orm_query import (
     orm_change_banner_image,
     orm_get_categories,
     orm_add_product,
+    orm_apply_markup,
+    orm_count_products,
     orm_delete_product,
+    orm_delete_products,
     orm_get_info_pages,
+    orm_get_jobs,
     orm_get_orders,
+    orm_get_orders_page,
     orm_get_product,
-    orm_get_products,
+    orm_get_products_page,
+    orm_get_sales_report,
     orm_get_sellers,
+    orm_set_product_stock,
+    orm_set_products_availability,
+    orm_update_job,
     orm_update_order,
     orm_update_product,
     orm_update_product_availability,
 )
 
-from filters.callback_filters import StatusCallback
+from common.order_statuses import ORDER_STATUS_NEW, normalize_order_status
+from config import (
+    ADMIN_ORDERS_PAGE_SIZE,
+    ADMIN_PRODUCTS_PAGE_SIZE,
+    FIXTURES_PROGRESS_INTERVAL,
+    PRODUCT_IMPORT_MAX_SIZE,
+    PROFILER_DEFAULT_SECONDS,
+    PROFILER_MAX_SECONDS,
+    STATS_MAX_DAYS,
+    STATS_TOP_SIZE,
+)
+from filters.callback_filters import (
+    AdminCatalogCallback,
+    AdminOrdersCallback,
+    BulkDeleteCallback,
+    BulkMarkupCallback,
+    StatusCallback,
+)
 from filters.chat_types import ChatTypeFilter, IsAdmin
 
 
 from fixtures.fixtures_utils import dump_fixtures, load_fixtures
-from kbds.inline import get_callback_btns, get_status_keyboard
+from kbds.inline import (
+    get_admin_catalog_btns,
+    get_admin_orders_btns,
+    get_callback_btns,
+    get_status_keyboard,
+)
 from kbds.reply import get_keyboard
+from utils.delivery_feed import delivery_feed
 from utils.json_operations import load_sharing_data, save_added_goods, save_admins
+from utils.product_import import import_products, read_rows
+from utils.product_search import product_search
+from utils.profiler import ProfileResult, sampling_profiler
+from utils.restock_notifier import restock_notifier
+from utils.scheduler import fit_into_window, scheduler
 from utils.send_message_ustils import send_product_message
 from utils.serializer import custom_serializer
 
 
-admin_router = Router()
+admin_router = Router(name="admin")
 admin_router.message.filter(ChatTypeFilter(["private"]), IsAdmin())
 
 
@@ -48,6 +91,7 @@ ADMIN_KB = get_keyboard(
     "Добавить/Изменить баннер",
     "Заказы",
     "Добавить пункт выдачи",
+    "Импорт товаров",
     placeholder="Выберите действие",
     sizes=(2,),
 )
@@ -67,6 +111,11 @@ class ProductCard:
             f"<strong>Категория: {self.product.category.name}</strong>\n"
             f"<strong>Продавец: {self.product.seller.name}</strong>\n"
             f"<strong>{'есть' if self.product.is_available else 'нет'} в наличии</strong>"
+            + (
+                f"\n<strong>Остаток: {self.product.stock} шт.</strong>"
+                if self.product.stock is not None
+                else ""
+            )
         )
 
     @property
@@ -95,53 +144,352 @@ class ProductCard:
 
 
 @admin_router.message(Command("admin"))
-async def admin_features(message: types.Message):
-    save_admins(message.from_user.id)
+async def admin_features(message: types.Message, session: AsyncSession):
+    await save_admins(session, message.from_user.id)
     await message.answer("Что хотите сделать?", reply_markup=ADMIN_KB)
 
 
-@admin_router.message(Command("dumpfix"))
+def status_progress(status: types.Message, action: str):
+    """
+    Обновляет сообщение status ходом долгой операции (фикстуры, импорт),
+    не чаще раза в FIXTURES_PROGRESS_INTERVAL секунд.
+    """
+    last_update = time.monotonic()
+
+    async def progress(table: str, count: int) -> None:
+        nonlocal last_update
+        now = time.monotonic()
+        if now - last_update < FIXTURES_PROGRESS_INTERVAL:
+            return
+        last_update = now
+        try:
+            await status.edit_text(f"{action}: {table} - {count} строк...")
+        except TelegramBadRequest as e:
+            logging.debug(f"Не удалось обновить прогресс: {e}")
+
+    return progress
+
+
+def fixtures_report(title: str, counts: dict[str, int]) -> str:
+    lines = [f"{table}: {count}" for table, count in counts.items()]
+    return f"{title}\n" + "\n".join(lines) + f"\nВсего строк: {sum(counts.values())}"
+
+
+@admin_router.message(Command("dumpfix"), flags={"query_budget": False})
 async def dump_fixtures_handler(message: types.Message, session: AsyncSession):
     """
     Команда для создания фикстур в базе данных.
     """
-    await dump_fixtures(session)
-    await message.answer("Фикстуры успешно созданы.")
+    status = await message.answer("Выгрузка фикстур...")
+    counts = await dump_fixtures(
+        session, progress=status_progress(status, "Выгрузка")
+    )
+    await status.edit_text(fixtures_report("Фикстуры успешно созданы.", counts))
 
 
-@admin_router.message(Command("loadfix"))
+@admin_router.message(Command("loadfix"), flags={"query_budget": False})
 async def load_fixtures_handler(message: types.Message, session: AsyncSession):
     """
     Команда для загрузки фикстур в базу данных.
     """
-    await load_fixtures(session)
-    await message.answer("Фикстуры успешно загружены.")
+    status = await message.answer("Загрузка фикстур...")
+    try:
+        counts = await load_fixtures(
+            session, progress=status_progress(status, "Загрузка")
+        )
+    except FileNotFoundError:
+        await status.edit_text("Фикстуры не найдены, сначала выполните /dumpfix.")
+        return
+    await status.edit_text(fixtures_report("Фикстуры успешно загружены.", counts))
+
+
+@admin_router.message(Command("profile"))
+async def profile_handler(message: types.Message, command: CommandObject, bot: Bot):
+    """
+    /profile [N] [сек|апд] - профилировать бота N секунд (по умолчанию)
+    или N апдейтов. Результат приходит файлами: стеки для flamegraph и топ функций.
+    """
+    args = (command.args or "").split()
+    try:
+        amount = int(args[0]) if args else PROFILER_DEFAULT_SECONDS
+        by_updates = len(args) > 1 and args[1].startswith("апд")
+        if amount <= 0:
+            raise ValueError
+    except ValueError:
+        await message.answer("Формат: /profile [N] [сек|апд]")
+        return
+    if sampling_profiler.active:
+        await message.answer("Профилирование уже запущено.")
+        return
+
+    chat_id = message.chat.id
+
+    async def report(result: ProfileResult):
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        await bot.send_document(
+            chat_id,
+            types.BufferedInputFile(
+                result.collapsed().encode("utf-8"), filename=f"profile-{stamp}.folded"
+            ),
+            caption="Стеки в формате collapsed (flamegraph.pl, speedscope)",
+        )
+        await bot.send_document(
+            chat_id,
+            types.BufferedInputFile(
+                result.summary().encode("utf-8"), filename=f"profile-{stamp}.txt"
+            ),
+            caption="Топ функций",
+        )
+
+    if by_updates:
+        sampling_profiler.start(PROFILER_MAX_SECONDS, amount, report)
+        await message.answer(
+            f"Профилирование запущено на {amount} апдейтов "
+            f"(не дольше {PROFILER_MAX_SECONDS} с)."
+        )
+    else:
+        seconds = min(amount, PROFILER_MAX_SECONDS)
+        sampling_profiler.start(seconds, None, report)
+        await message.answer(f"Профилирование запущено на {seconds} с.")
+
+
+######################### Планировщик публикаций #####################################
+
+
+def job_text(job) -> str:
+    window = (
+        f"{job.window_start.strftime('%H:%M')}-{job.window_end.strftime('%H:%M')}"
+        if job.window_start and job.window_end
+        else "круглосуточно"
+    )
+    status = "⏸ на паузе" if job.is_paused else "▶ активна"
+    if scheduler.is_running(job.id):
+        status = "⏳ выполняется"
+    text = (
+        f"<strong>#{job.id} {job.name}</strong> ({status})\n"
+        f"Окно: {window}, каждые {job.interval / 3600:g} ч ± {job.jitter / 3600:g} ч, "
+        f"пропуски: {job.misfire_policy}\n"
+        f"Следующий запуск: {job.next_run.strftime('%d.%m.%Y %H:%M')}\n"
+    )
+    if job.last_run:
+        text += f"Последний запуск: {job.last_run.strftime('%d.%m.%Y %H:%M')}\n"
+    if job.last_error:
+        text += f"Ошибка: {job.last_error}\n"
+    return text
+
+
+def parse_job_id(command: CommandObject) -> int | None:
+    try:
+        return int(command.args.split()[0])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+@admin_router.message(Command("jobs"))
+async def list_jobs(message: types.Message, session: AsyncSession):
+    jobs = await orm_get_jobs(session)
+    if not jobs:
+        await message.answer("Задач планировщика нет.")
+        return
+    await message.answer(
+        "\n".join(job_text(job) for job in jobs)
+        + "\n/job_pause id, /job_resume id, /job_run id,\n"
+        "/job_set id 09:00-21:00 24 [skip|catch_up]"
+    )
+
+
+@admin_router.message(Command("job_pause", "job_resume", "job_run"))
+async def control_job(
+    message: types.Message, command: CommandObject, session: AsyncSession
+):
+    job_id = parse_job_id(command)
+    if job_id is None or await orm_get_jobs(session, job_id=job_id) is None:
+        await message.answer("Укажите ID задачи из списка /jobs")
+        return
+
+    if command.command == "job_pause":
+        await scheduler.pause(job_id)
+        await message.answer(f"Задача #{job_id} поставлена на паузу.")
+    elif command.command == "job_resume":
+        await scheduler.resume(job_id)
+        await message.answer(f"Задача #{job_id} возобновлена.")
+    else:
+        await scheduler.trigger(job_id)
+        await message.answer(
+            f"Задача #{job_id} запущена (если она уже выполняется, повторно не запустится)."
+        )
+
+
+@admin_router.message(Command("job_set"))
+async def set_job_schedule(
+    message: types.Message, command: CommandObject, session: AsyncSession
+):
+    """
+    /job_set id 09:00-21:00 24 [skip|catch_up] - окно публикаций (или "-" для круглосуточно),
+    интервал в часах и политика для пропущенных запусков.
+    """
+    args = (command.args or "").split()
+    try:
+        job = await orm_get_jobs(session, job_id=int(args[0]))
+        if job is None:
+            await message.answer("Задача не найдена. Укажите ID задачи из списка /jobs")
+            return
+        if args[1] == "-":
+            window_start, window_end = None, None
+        else:
+            start, end = args[1].split("-")
+            window_start = datetime.strptime(start, "%H:%M").time()
+            window_end = datetime.strptime(end, "%H:%M").time()
+        interval = int(float(args[2]) * 3600)
+        misfire_policy = args[3] if len(args) > 3 else job.misfire_policy
+        if interval <= 0 or misfire_policy not in ("skip", "catch_up"):
+            raise ValueError
+    except (IndexError, ValueError):
+        await message.answer(
+            "Формат: /job_set id 09:00-21:00 24 [skip|catch_up]\n"
+            'Вместо окна можно указать "-" - публиковать круглосуточно.'
+        )
+        return
+
+    job.window_start, job.window_end = window_start, window_end
+    job.interval, job.misfire_policy = interval, misfire_policy
+    job.next_run = fit_into_window(job, job.next_run)
+    await orm_update_job(
+        session,
+        job.id,
+        {
+            "window_start": window_start,
+            "window_end": window_end,
+            "interval": interval,
+            "misfire_policy": misfire_policy,
+            "next_run": job.next_run,
+        },
+    )
+    await scheduler.wakeup()
+    await message.answer(job_text(job))
 
 
 ################## вывод всего ассортимента товаров #########################
-@admin_router.message(F.text == "Ассортимент")
-async def admin_features(message: types.Message, session: AsyncSession):
+async def catalog_categories_kb(session: AsyncSession):
     categories = await orm_get_categories(session)
     btns = {category.name: f"category_{category.id}" for category in categories}
     btns["показать все товары"] = "show_all_products"
+    return get_callback_btns(btns=btns)
+
+
+@admin_router.message(F.text == "Ассортимент")
+async def admin_features(message: types.Message, session: AsyncSession):
     await message.answer(
-        "Выберите категорию", reply_markup=get_callback_btns(btns=btns)
+        "Выберите категорию", reply_markup=await catalog_categories_kb(session)
+    )
+
+
+async def catalog_page(
+    session: AsyncSession,
+    category_id: int = 0,
+    cursor: int = 0,
+    backwards: bool = False,
+):
+    """
+    Формирует текст и клавиатуру одной страницы каталога.
+    category_id=0 - все товары.
+    """
+    page = await orm_get_products_page(
+        session,
+        category_id=category_id or None,
+        cursor_id=cursor or None,
+        backwards=backwards,
+        limit=ADMIN_PRODUCTS_PAGE_SIZE,
+    )
+    if not page:
+        text = (
+            "В этой категории пока нет товаров."
+            if category_id
+            else "Товаров пока нет."
+        )
+        return text, get_admin_catalog_btns(
+            category_id=category_id,
+            products=[],
+            cursor=0,
+            backwards=False,
+            has_previous=False,
+            has_next=False,
+        )
+
+    lines = ["<strong>Ассортимент</strong> (нажмите на товар, чтобы открыть карточку)\n"]
+    for product in page.items:
+        lines.append(
+            f"{'✅' if product.is_available else '❌'} {product.name} · "
+            f"{round(product.price, 2)}£ (закупка {round(product.purchase_price, 2)}£)"
+        )
+    text = "\n".join(lines)
+
+    reply_markup = get_admin_catalog_btns(
+        category_id=category_id,
+        products=page.items,
+        cursor=cursor,
+        backwards=backwards,
+        has_previous=page.has_previous(),
+        has_next=page.has_next(),
     )
+    return text, reply_markup
 
 
 @admin_router.callback_query(F.data == "show_all_products")
 async def show_all_products(callback: types.CallbackQuery, session: AsyncSession):
-    products = await orm_get_products(session)
+    text, reply_markup = await catalog_page(session)
+    await callback.message.edit_text(text, reply_markup=reply_markup)
+    await callback.answer()
 
-    for product in products:
-        card = ProductCard(product)
-        await callback.message.answer_photo(
-            photo=card.image,
-            caption=card.caption,
-            parse_mode="HTML",
-            reply_markup=get_callback_btns(btns=card.buttons, sizes=(2, 1)),
-        )
 
+@admin_router.callback_query(AdminCatalogCallback.filter(F.action == "page"))
+async def catalog_page_callback(
+    callback: types.CallbackQuery,
+    callback_data: AdminCatalogCallback,
+    session: AsyncSession,
+):
+    text, reply_markup = await catalog_page(
+        session,
+        category_id=callback_data.category_id,
+        cursor=callback_data.cursor,
+        backwards=callback_data.backwards,
+    )
+    await callback.message.edit_text(text, reply_markup=reply_markup)
+    await callback.answer()
+
+
+@admin_router.callback_query(AdminCatalogCallback.filter(F.action == "categories"))
+async def catalog_categories_callback(
+    callback: types.CallbackQuery, session: AsyncSession
+):
+    await callback.message.edit_text(
+        "Выберите категорию", reply_markup=await catalog_categories_kb(session)
+    )
+    await callback.answer()
+
+
+@admin_router.callback_query(AdminCatalogCallback.filter(F.action == "product"))
+async def catalog_product_callback(
+    callback: types.CallbackQuery,
+    callback_data: AdminCatalogCallback,
+    session: AsyncSession,
+):
+    """
+    Карточка товара с действиями отправляется отдельным сообщением
+    только по запросу, список при этом остаётся на месте.
+    """
+    product = await orm_get_product(session, callback_data.product_id)
+    if not product:
+        await callback.answer("Товар не найден", show_alert=True)
+        return
+
+    card = ProductCard(product)
+    await callback.message.answer_photo(
+        photo=card.image,
+        caption=card.caption,
+        parse_mode="HTML",
+        reply_markup=get_callback_btns(btns=card.buttons, sizes=(2, 1)),
+    )
     await callback.answer()
 
 
@@ -160,8 +508,21 @@ async def change_availability(callback: types.CallbackQuery, session: AsyncSessi
         await callback.answer("Товар не найден", show_alert=True)
         return
 
-    await orm_update_product_availability(session, product_id, is_available)
+    if is_available and product.stock == 0:
+        await callback.answer(
+            "Остаток товара 0 - задайте его командой /stock <ID> <количество>",
+            show_alert=True,
+        )
+        return
+
+    changed = await orm_update_product_availability(session, product_id, is_available)
     product.is_available = is_available  # вручную меняем
+    if changed:
+        product_search.clear()
+
+    # Товар снова в наличии - оповещаем список ожидания
+    if changed and is_available:
+        restock_notifier.notify(product_id)
 
     card = ProductCard(product)
 
@@ -183,22 +544,8 @@ async def starring_at_product(callback: types.CallbackQuery, session: AsyncSessi
         await callback.answer("Неверный ID категории", show_alert=True)
         return
 
-    products = await orm_get_products(session, category_id)
-
-    if not products:
-        await callback.message.answer("В этой категории пока нет товаров.")
-        await callback.answer()
-        return
-
-    for product in products:
-        card = ProductCard(product)
-        await callback.message.answer_photo(
-            photo=card.image,
-            caption=card.caption,
-            parse_mode="HTML",
-            reply_markup=get_callback_btns(btns=card.buttons, sizes=(2, 1)),
-        )
-
+    text, reply_markup = await catalog_page(session, category_id=category_id)
+    await callback.message.edit_text(text, reply_markup=reply_markup)
     await callback.answer()
 
 
@@ -206,6 +553,7 @@ async def starring_at_product(callback: types.CallbackQuery, session: AsyncSessi
 async def delete_product_callback(callback: types.CallbackQuery, session: AsyncSession):
     product_id = callback.data.split("_")[-1]
     await orm_delete_product(session, int(product_id))
+    product_search.clear()
 
     await callback.answer("Товар удален")
     await callback.message.answer("Товар удален!")
@@ -271,8 +619,6 @@ class AddProduct(StatesGroup):
     price = State()
     image = State()
 
-    product_for_change = None
-
     texts = {
         "AddProduct:name": "Введите название заново:",
         "AddProduct:description": "Введите описание заново:",
@@ -282,6 +628,11 @@ class AddProduct(StatesGroup):
     }
 
 
+async def get_product_for_change(state: FSMContext) -> dict | None:
+    """Изменяемый товар (None - добавляется новый)."""
+    return (await state.get_data()).get("product_for_change")
+
+
 # Становимся в состояние ожидания ввода name
 @admin_router.callback_query(StateFilter(None), F.data.startswith("change_"))
 async def change_product_callback(
@@ -289,9 +640,22 @@ async def change_product_callback(
 ):
     product_id = callback.data.split("_")[-1]
 
-    product_for_change = await orm_get_product(session, int(product_id))
-
-    AddProduct.product_for_change = product_for_change
+    product = await orm_get_product(session, int(product_id))
+
+    # Изменяемый товар - в данных FSM, чтобы сценарий пережил перезапуск
+    # и продолжился в любом воркере
+    await state.update_data(
+        product_for_change={
+            "id": product.id,
+            "name": product.name,
+            "description": product.description,
+            "category": product.category_id,
+            "seller": product.seller_id,
+            "purchase_price": float(product.purchase_price),
+            "price": float(product.price),
+            "image": product.image,
+        }
+    )
 
     await callback.answer()
     await callback.message.answer(
@@ -317,8 +681,6 @@ async def cancel_handler(message: types.Message, state: FSMContext) -> None:
     current_state = await state.get_state()
     if current_state is None:
         return
-    if AddProduct.product_for_change:
-        AddProduct.product_for_change = None
     await state.clear()
     await message.answer("Действия отменены", reply_markup=ADMIN_KB)
 
@@ -349,8 +711,9 @@ async def back_step_handler(message: types.Message, state: FSMContext) -> None:
 # Ловим данные для состояние name и потом меняем состояние на description
 @admin_router.message(AddProduct.name, F.text)
 async def add_name(message: types.Message, state: FSMContext):
-    if message.text == "." and AddProduct.product_for_change:
-        await state.update_data(name=AddProduct.product_for_change.name)
+    product_for_change = await get_product_for_change(state)
+    if message.text == "." and product_for_change:
+        await state.update_data(name=product_for_change["name"])
     else:
         # Здесь можно сделать какую либо дополнительную проверку
         # и выйти из хендлера не меняя состояние с отправкой соответствующего сообщения
@@ -377,8 +740,9 @@ async def add_name2(message: types.Message, state: FSMContext):
 async def add_description(
     message: types.Message, state: FSMContext, session: AsyncSession
 ):
-    if message.text == "." and AddProduct.product_for_change:
-        await state.update_data(description=AddProduct.product_for_change.description)
+    product_for_change = await get_product_for_change(state)
+    if message.text == "." and product_for_change:
+        await state.update_data(description=product_for_change["description"])
     else:
         if 4 >= len(message.text):
             await message.answer("Слишком короткое описание. \n Введите заново")
@@ -388,7 +752,7 @@ async def add_description(
     categories = await orm_get_categories(session)
     btns = {category.name: str(category.id) for category in categories}
     btns["Добавить категорию"] = "add_category"
-    if AddProduct.product_for_change:
+    if product_for_change:
         btns["пропустить"] = "skip_category"
     await message.answer(
         "Выберите категорию", reply_markup=get_callback_btns(btns=btns)
@@ -424,7 +788,7 @@ async def save_new_category(
     categories = await orm_get_categories(session)
     btns = {category.name: str(category.id) for category in categories}
     btns["Добавить категорию"] = "add_category"
-    if AddProduct.product_for_change:
+    if await get_product_for_change(state):
         btns["пропустить"] = "skip_category"
     await message.answer(
         "Выберите категорию", reply_markup=get_callback_btns(btns=btns)
@@ -434,7 +798,7 @@ async def save_new_category(
 
 @admin_router.message(AddProduct.category, F.data == "skip_category")
 async def skip_category(callback: types.CallbackQuery, state: FSMContext):
-    await state.update_data(category=AddProduct.product_for_change.category.id)
+    await state.update_data(category=(await get_product_for_change(state))["category"])
 
 
 # Ловим callback выбора категории
@@ -442,14 +806,14 @@ async def skip_category(callback: types.CallbackQuery, state: FSMContext):
 async def category_choice(
     callback: types.CallbackQuery, state: FSMContext, session: AsyncSession
 ):
-    if callback.data == "skip_category":
+    product_for_change = await get_product_for_change(state)
+    if callback.data == "skip_category" and product_for_change:
         # Если пользователь выбрал "пропустить", оставляем категорию без изменений
-        await state.update_data(category=AddProduct.product_for_change.category)
+        await state.update_data(category=product_for_change["category"])
         sellers = await orm_get_sellers(session)
         btns = {seller.name: str(seller.id) for seller in sellers}
         btns["Добавить продавца"] = "add_seller"
-        if AddProduct.product_for_change:
-            btns["пропустить"] = "skip_seller"
+        btns["пропустить"] = "skip_seller"
         await callback.message.answer(
             "Выберите продавца", reply_markup=get_callback_btns(btns=btns)
         )
@@ -474,7 +838,7 @@ async def category_choice(
         sellers = await orm_get_sellers(session)
         btns = {seller.name: str(seller.id) for seller in sellers}
         btns["Добавить продавца"] = "add_seller"
-        if AddProduct.product_for_change:
+        if product_for_change:
             btns["пропустить"] = "skip_seller"
         await callback.message.answer(
             "Выберите продавца", reply_markup=get_callback_btns(btns=btns)
@@ -539,7 +903,7 @@ async def save_new_seller(
     sellers = await orm_get_sellers(session)
     btns = {seller.name: str(seller.id) for seller in sellers}
     btns["Добавить продавца"] = "add_seller"
-    if AddProduct.product_for_change:
+    if await get_product_for_change(state):
         btns["пропустить"] = "skip"
     await message.answer("Выберите продавца", reply_markup=get_callback_btns(btns=btns))
     await state.set_state(AddProduct.seller)
@@ -550,8 +914,9 @@ async def seller_choice(
     callback: types.CallbackQuery, state: FSMContext, session: AsyncSession
 ):
     logging.info(f"Callback data: {callback.data}, State: {await state.get_state()}")
-    if callback.data == "skip_seller":
-        await state.update_data(seller=AddProduct.product_for_change.seller.id)
+    product_for_change = await get_product_for_change(state)
+    if callback.data == "skip_seller" and product_for_change:
+        await state.update_data(seller=product_for_change["seller"])
         # Если пользователь выбрал "пропустить", оставляем продавца без изменений
         await callback.message.answer(
             "Введите закупочную цену и цену продажи через запятую в формате 10.5, 15.0:"
@@ -584,10 +949,11 @@ async def seller_choice(
 # Ловим данные для состояние price и потом меняем состояние на image
 @admin_router.message(AddProduct.price, F.text)
 async def add_price(message: types.Message, state: FSMContext):
-    if message.text == "." and AddProduct.product_for_change:
+    product_for_change = await get_product_for_change(state)
+    if message.text == "." and product_for_change:
         await state.update_data(
-            price=AddProduct.product_for_change.price,
-            purchase_price=AddProduct.product_for_change.purchase_price,
+            price=product_for_change["price"],
+            purchase_price=product_for_change["purchase_price"],
         )
     else:
         try:
@@ -631,16 +997,16 @@ async def add_price2(message: types.Message, state: FSMContext):
 # Ловим данные для состояние image и потом выходим из состояний
 @admin_router.message(AddProduct.image, or_f(F.photo, F.text == "."))
 async def add_image(message: types.Message, state: FSMContext, session: AsyncSession):
-    if message.text and message.text == "." and AddProduct.product_for_change:
-        await state.update_data(image=AddProduct.product_for_change.image)
+    data = await state.get_data()
+    product_for_change = data.pop("product_for_change", None)
+    if message.text and message.text == "." and product_for_change:
+        data["image"] = product_for_change["image"]
     elif message.photo:
-        await state.update_data(image=message.photo[-1].file_id)
+        data["image"] = message.photo[-1].file_id
     else:
         await message.answer("Отправьте фото товара")
         return
 
-    data = await state.get_data()
-
     # Преобразуем объект Category в ID, если это объект
     if isinstance(data.get("category"), Category):
         data["category"] = data["category"].id
@@ -650,15 +1016,16 @@ async def add_image(message: types.Message, state: FSMContext, session: AsyncSes
     logging.info(f"Данные для обновления/добавления товара: {data}")
 
     try:
-        if AddProduct.product_for_change:
+        if product_for_change:
             logging.info(
-                f"Обновляем товар с ID {AddProduct.product_for_change.id} данными: {data}"
+                f"Обновляем товар с ID {product_for_change['id']} данными: {data}"
             )
-            await orm_update_product(session, AddProduct.product_for_change.id, data)
+            await orm_update_product(session, product_for_change["id"], data)
         else:
             logging.info(f"Добавляем новый товар с данными: {data}")
             await orm_add_product(session, data)
-            save_added_goods(data)
+            await save_added_goods(session, data)
+        product_search.clear()
 
         await message.answer("Товар добавлен/изменен", reply_markup=ADMIN_KB)
         await state.clear()
@@ -671,10 +1038,6 @@ async def add_image(message: types.Message, state: FSMContext, session: AsyncSes
         )
         await state.clear()
 
-    AddProduct.product_for_change = None
-
-    AddProduct.product_for_change = None
-
 
 # Ловим все прочее некорректное поведение для этого состояния
 @admin_router.message(AddProduct.image)
@@ -682,6 +1045,412 @@ async def add_image2(message: types.Message, state: FSMContext):
     await message.answer("Отправьте фото пищи")
 
 
+################# Массовый импорт товаров из файла ############################
+
+
+class ImportProducts(StatesGroup):
+    document = State()
+
+
+@admin_router.message(StateFilter(None), F.text == "Импорт товаров")
+async def import_products_start(message: types.Message, state: FSMContext):
+    await message.answer(
+        "Отправьте файл CSV, JSON (массив объектов) или NDJSON с товарами.\n"
+        "Колонки: name, category, description, price, image - обязательные "
+        "(description может быть пустым); seller, purchase_price, is_available, "
+        "stock - по желанию.\n"
+        "Товар с уже существующим названием обновляется, категории и продавцы "
+        "создаются, если их нет.",
+        reply_markup=types.ReplyKeyboardRemove(),
+    )
+    await state.set_state(ImportProducts.document)
+
+
+@admin_router.message(
+    ImportProducts.document, F.document, flags={"query_budget": False}
+)
+async def import_products_file(
+    message: types.Message, state: FSMContext, session: AsyncSession, bot: Bot
+):
+    document = message.document
+    if document.file_size and document.file_size > PRODUCT_IMPORT_MAX_SIZE:
+        await message.answer("Файл слишком большой, разбейте его на части.")
+        return
+
+    status = await message.answer("Импорт товаров...")
+    buffer = io.BytesIO()
+    await bot.download(document, destination=buffer)
+    buffer.seek(0)
+    try:
+        report = await import_products(
+            session,
+            read_rows(buffer, document.file_name or ""),
+            progress=status_progress(status, "Импорт"),
+        )
+    except ValueError as e:
+        # Файл не читается целиком (формат, кодировка) - сохранённые пачки остаются
+        await status.edit_text(f"Не удалось прочитать файл: {e}")
+        await state.clear()
+        await message.answer("Что хотите сделать?", reply_markup=ADMIN_KB)
+        return
+
+    await state.clear()
+    if report.inserted or report.updated:
+        product_search.clear()
+        # Товары, вернувшиеся в наличие, - оповестить список ожидания
+        await restock_notifier.resume()
+    await status.edit_text(f"Импорт завершён.\n{report.text}")
+    await message.answer("Что хотите сделать?", reply_markup=ADMIN_KB)
+
+
+@admin_router.message(ImportProducts.document)
+async def import_products_wrong_input(message: types.Message):
+    await message.answer("Отправьте файл с товарами документом или отмена")
+
+
+################# Массовые операции с товарами ############################
+
+# кат=<ID или название> прод=<ID или имя>, названия могут содержать пробелы
+PRODUCTS_FILTER_RE = re.compile(r"(кат|прод)=(.+?)(?=\s+(?:кат|прод)=|$)")
+
+BULK_HELP = (
+    "Фильтр товаров: кат=<ID или название категории> и/или прод=<ID или имя продавца>.\n"
+    "/available да|нет [фильтр] - наличие (товары с остатком 0 остаются не в продаже)\n"
+    "/markup <процент> [фильтр] - розничная цена = закупочная + процент "
+    "(без фильтра - после подтверждения кнопкой)\n"
+    "/delete_products [нет_в_наличии] фильтр - удаление (фильтр обязателен, "
+    "товары из заказов не удаляются - их можно снять с продажи)"
+)
+
+
+async def parse_products_filter(
+    session: AsyncSession, text: str
+) -> tuple[int | None, int | None, str]:
+    """
+    Разбирает фильтр товаров из аргументов команды.
+    :return: (ID категории, ID продавца, остаток текста без фильтра)
+    :raises ValueError: если категория или продавец не найдены.
+    """
+    ids = {}
+    for key, value in PRODUCTS_FILTER_RE.findall(text):
+        value = value.strip()
+        items = (
+            await orm_get_categories(session)
+            if key == "кат"
+            else await orm_get_sellers(session)
+        )
+        found = [
+            item.id
+            for item in items
+            if str(item.id) == value or item.name.casefold() == value.casefold()
+        ]
+        if not found:
+            if key == "кат":
+                raise ValueError(f"Категория «{value}» не найдена")
+            raise ValueError(f"Продавец «{value}» не найден")
+        ids[key] = min(found)
+    rest = PRODUCTS_FILTER_RE.sub("", text).strip()
+    return ids.get("кат"), ids.get("прод"), rest
+
+
+def products_filter_text(category_id: int | None, seller_id: int | None) -> str:
+    parts = []
+    if category_id is not None:
+        parts.append(f"категория {category_id}")
+    if seller_id is not None:
+        parts.append(f"продавец {seller_id}")
+    return ", ".join(parts) or "все товары"
+
+
+@admin_router.message(Command("available"))
+async def bulk_availability(
+    message: types.Message, command: CommandObject, session: AsyncSession
+):
+    """/available да|нет [кат=...] [прод=...] - наличие товаров одним запросом."""
+    try:
+        category_id, seller_id, rest = await parse_products_filter(
+            session, command.args or ""
+        )
+    except ValueError as e:
+        await message.answer(str(e))
+        return
+    if rest.lower() not in ("да", "нет"):
+        await message.answer(BULK_HELP)
+        return
+
+    is_available = rest.lower() == "да"
+    changed = await orm_set_products_availability(
+        session, is_available, category_id=category_id, seller_id=seller_id
+    )
+    if changed:
+        product_search.clear()
+        if is_available:
+            # Оповещения - только по товарам, вернувшимся в продажу этой командой
+            for product_id in changed:
+                restock_notifier.notify(product_id)
+    await message.answer(
+        f"{products_filter_text(category_id, seller_id)}: "
+        f"{'в наличии' if is_available else 'нет в наличии'} - "
+        f"изменено товаров: {len(changed)}"
+    )
+
+
+@admin_router.message(Command("markup"))
+async def bulk_markup(
+    message: types.Message, command: CommandObject, session: AsyncSession
+):
+    """
+    /markup <процент> [кат=...] [прод=...] - цены от закупочных одним запросом.
+    Без фильтра меняются цены всего каталога, поэтому - только после подтверждения.
+    """
+    try:
+        category_id, seller_id, rest = await parse_products_filter(
+            session, command.args or ""
+        )
+    except ValueError as e:
+        await message.answer(str(e))
+        return
+    try:
+        percent = Decimal(rest.rstrip("%").replace(",", ".").strip())
+    except InvalidOperation:
+        await message.answer(BULK_HELP)
+        return
+    if not percent.is_finite() or not -100 < percent <= 1000:
+        await message.answer("Наценка должна быть больше -100% и не больше 1000%")
+        return
+
+    if category_id is None and seller_id is None:
+        count = await orm_count_products(session)
+        if not count:
+            await message.answer("В каталоге нет товаров")
+            return
+        confirm = BulkMarkupCallback(percent=str(percent)).pack()
+        await message.answer(
+            f"Наценка {percent}% будет применена ко всему каталогу ({count} товаров)",
+            reply_markup=get_callback_btns(btns={"Применить": confirm}),
+        )
+        return
+
+    await message.answer(
+        await apply_markup(session, percent, category_id, seller_id)
+    )
+
+
+@admin_router.callback_query(BulkMarkupCallback.filter())
+async def bulk_markup_confirm(
+    callback: types.CallbackQuery,
+    callback_data: BulkMarkupCallback,
+    session: AsyncSession,
+):
+    text = await apply_markup(session, Decimal(callback_data.percent))
+    await callback.message.edit_text(text)
+    await callback.answer()
+
+
+async def apply_markup(
+    session: AsyncSession,
+    percent: Decimal,
+    category_id: int | None = None,
+    seller_id: int | None = None,
+) -> str:
+    prices = await orm_apply_markup(
+        session, percent, category_id=category_id, seller_id=seller_id
+    )
+    if prices:
+        product_search.clear()
+    return (
+        f"{products_filter_text(category_id, seller_id)}: наценка {percent}% "
+        f"применена к {len(prices)} товарам"
+    )
+
+
+@admin_router.message(Command("stock"))
+async def set_stock(message: types.Message, command: CommandObject, session: AsyncSession):
+    """/stock <ID товара> <количество> - остаток товара, "-" вместо количества - не вести."""
+    args = (command.args or "").split()
+    try:
+        product_id = int(args[0])
+        stock = None if args[1] == "-" else int(args[1])
+        if stock is not None and stock < 0:
+            raise ValueError
+    except (IndexError, ValueError):
+        await message.answer(
+            "Формат: /stock <ID товара> <количество>, "
+            "или /stock <ID товара> - чтобы не вести остаток"
+        )
+        return
+
+    product = await orm_get_product(session, product_id)
+    if not product:
+        await message.answer("Товар не найден")
+        return
+    restocked = await orm_set_product_stock(session, product_id, stock)
+    product_search.clear()
+    if restocked:
+        restock_notifier.notify(product_id)
+    await message.answer(
+        f"{product.name}: "
+        + (f"остаток {stock} шт." if stock is not None else "остаток не ведётся")
+    )
+
+
+@admin_router.message(Command("delete_products"))
+async def bulk_delete(
+    message: types.Message, command: CommandObject, session: AsyncSession
+):
+    """
+    /delete_products [нет_в_наличии] кат=... прод=... - показывает, сколько
+    товаров будет удалено, удаление - после подтверждения кнопкой.
+    """
+    try:
+        category_id, seller_id, rest = await parse_products_filter(
+            session, command.args or ""
+        )
+    except ValueError as e:
+        await message.answer(str(e))
+        return
+    if (category_id is None and seller_id is None) or rest not in ("", "нет_в_наличии"):
+        await message.answer(BULK_HELP)
+        return
+
+    only_unavailable = rest == "нет_в_наличии"
+    products_filter = {
+        "category_id": category_id,
+        "seller_id": seller_id,
+        "is_available": False if only_unavailable else None,
+    }
+    count = await orm_count_products(session, in_orders=False, **products_filter)
+    skipped = await orm_count_products(session, in_orders=True, **products_filter)
+    title = (
+        f"{products_filter_text(category_id, seller_id)}"
+        f"{', нет в наличии' if only_unavailable else ''}"
+    )
+    skipped_text = (
+        f"Товаров из заказов: {skipped} - они не удаляются, чтобы не пропали "
+        "из истории заказов и отчётов (снять с продажи: /available нет)."
+        if skipped
+        else ""
+    )
+    if not count:
+        await message.answer(
+            f"{title}: удалять нечего.\n{skipped_text}"
+            if skipped
+            else "Под фильтр не попал ни один товар"
+        )
+        return
+    confirm = BulkDeleteCallback(
+        category_id=category_id or 0,
+        seller_id=seller_id or 0,
+        only_unavailable=only_unavailable,
+    ).pack()
+    await message.answer(
+        f"{title}: будет удалено товаров: {count}.\n"
+        "Вместе с ними удалятся их позиции в корзинах и списке ожидания.\n"
+        f"{skipped_text}",
+        reply_markup=get_callback_btns(btns={"Удалить": confirm}),
+    )
+
+
+@admin_router.callback_query(BulkDeleteCallback.filter())
+async def bulk_delete_confirm(
+    callback: types.CallbackQuery,
+    callback_data: BulkDeleteCallback,
+    session: AsyncSession,
+):
+    deleted = await orm_delete_products(
+        session,
+        category_id=callback_data.category_id or None,
+        seller_id=callback_data.seller_id or None,
+        only_unavailable=callback_data.only_unavailable,
+    )
+    if deleted:
+        product_search.clear()
+    await callback.message.edit_text(f"Удалено товаров: {len(deleted)}")
+    await callback.answer()
+
+
+################# Отчёт о продажах ############################
+
+STATS_HELP = (
+    "/stats - продажи за сегодня\n"
+    "/stats <N> - за последние N дней\n"
+    "/stats <ДД.ММ.ГГГГ> [<ДД.ММ.ГГГГ>] - за день или период"
+)
+
+STATS_TITLES = {"product": "Товары", "category": "Категории", "seller": "Продавцы"}
+
+
+def parse_stats_period(args: str, today: date) -> tuple[date, date]:
+    """
+    Период отчёта из аргументов /stats.
+    :raises ValueError: если аргументы не разобрать или период слишком длинный.
+    """
+    parts = args.split()
+    if not parts:
+        date_from = date_to = today
+    elif len(parts) == 1 and parts[0].isdigit():
+        date_to = today
+        date_from = today - timedelta(days=int(parts[0]) - 1)
+    elif len(parts) <= 2:
+        days = [datetime.strptime(part, "%d.%m.%Y").date() for part in parts]
+        date_from, date_to = days[0], days[-1]
+    else:
+        raise ValueError
+    if not 0 <= (date_to - date_from).days < STATS_MAX_DAYS:
+        raise ValueError
+    return date_from, date_to
+
+
+def sales_line(row) -> str:
+    margin = row.revenue - row.cost
+    text = f"выручка {row.revenue:.2f}, маржа {margin:.2f}"
+    if row.revenue:
+        text += f" ({margin / row.revenue * 100:.0f}%)"
+    return text + f", {row.units} шт."
+
+
+def sales_report_text(report: dict, date_from: date, date_to: date) -> str:
+    period = date_from.strftime("%d.%m.%Y")
+    if date_to != date_from:
+        period += f" - {date_to.strftime('%d.%m.%Y')}"
+    total = report["total"]
+    if not total.orders:
+        return f"<strong>Продажи {period}</strong>\n\nВыполненных заказов нет."
+
+    lines = [
+        f"<strong>Продажи {period}</strong>\n",
+        f"Выполнено заказов: {total.orders}",
+        f"Продано товаров: {total.units} шт.",
+        f"Выручка: {total.revenue:.2f}",
+        f"Себестоимость: {total.cost:.2f}",
+        f"Маржа: {total.revenue - total.cost:.2f}",
+    ]
+    for dimension, title in STATS_TITLES.items():
+        lines.append(f"\n<strong>{title}</strong>")
+        for number, row in enumerate(report[dimension], start=1):
+            name = row.name or f"#{row.key_id} (удалён)"
+            lines.append(f"{number}. {name}: {sales_line(row)}")
+    return "\n".join(lines)
+
+
+@admin_router.message(Command("stats"))
+async def sales_stats(
+    message: types.Message, command: CommandObject, session: AsyncSession
+):
+    """Отчёт о выручке и марже за период по дневным итогам продаж."""
+    try:
+        date_from, date_to = parse_stats_period(command.args or "", date.today())
+    except ValueError:
+        await message.answer(
+            f"{STATS_HELP}\n\nПериод - не длиннее {STATS_MAX_DAYS} дней."
+        )
+        return
+    report = await orm_get_sales_report(
+        session, date_from, date_to, top=STATS_TOP_SIZE
+    )
+    await message.answer(sales_report_text(report, date_from, date_to))
+
+
 ################### Работа с заказами ####################
 @admin_router.message(F.text == "Заказы")
 async def orders(message: types.Message):
@@ -691,24 +1460,121 @@ async def orders(message: types.Message):
     )
 
 
+async def orders_page(
+    session: AsyncSession, status: str, cursor: int = 0, backwards: bool = False
+):
+    """
+    Формирует текст и клавиатуру одной страницы списка заказов.
+    """
+    page = await orm_get_orders_page(
+        session,
+        status=status,
+        cursor_id=cursor or None,
+        backwards=backwards,
+        limit=ADMIN_ORDERS_PAGE_SIZE,
+    )
+    if not page:
+        return f"Заказов со статусом «{status}» нет.", get_status_keyboard(current=status)
+
+    lines = [f"<strong>Заказы со статусом «{status}»</strong>\n"]
+    for order in page.items:
+        lines.append(
+            f"№{order.id} · {order.created.strftime('%d.%m %H:%M')} · "
+            f"{order.total_price}£ · {order.user.first_name or ''} {order.user.last_name or ''}\n"
+            f"    📍 {order.delivery_address}"
+        )
+    text = "\n".join(lines)
+
+    reply_markup = get_admin_orders_btns(
+        status=status,
+        order_ids=[order.id for order in page.items],
+        cursor=cursor,
+        backwards=backwards,
+        has_previous=page.has_previous(),
+        has_next=page.has_next(),
+    )
+    return text, reply_markup
+
+
+def order_card_text(order) -> str:
+    text = (
+        f"📦 Заказ №{order.id}\n"
+        f"👤 Покупатель: {order.user.first_name} {order.user.last_name}\n"
+        f"📞 Телефон: {order.user.phone or 'Телефон не указан'}\n"
+        f"📍 Адрес доставки: {order.delivery_address}\n"
+        f"💰 Общая стоимость: {order.total_price} £.\n"
+        f"📋 Статус: {order.status}\n"
+        f"🕒 Дата создания: {order.created.strftime('%d.%m.%Y %H:%M')}\n"
+    )
+    if order.deliverer:
+        text += f"🛵 Курьер: {order.deliverer.first_name} {order.deliverer.phone or ''}\n"
+    if order.items:
+        text += "\n🛒 Товары в заказе:\n"
+        for idx, item in enumerate(order.items, start=1):
+            text += f"{idx}. {item.product.name} - {item.quantity} шт. x {item.price} £\n"
+    return text
+
+
 @admin_router.callback_query(StatusCallback.filter())
 async def handle_status_callback(
-    callback: types.CallbackQuery, callback_data: dict, session: AsyncSession
+    callback: types.CallbackQuery, callback_data: StatusCallback, session: AsyncSession
 ):
-    status = callback_data.value
-    orders = await orm_get_orders(session, status=status)
+    status = normalize_order_status(callback_data.value)
+    if status is None:
+        await callback.answer("Неизвестный статус", show_alert=True)
+        return
 
-    for order in orders:
-        await callback.message.answer(
-            f"📦 Заказ №{order.id}\n"
-            f"👤 Покупатель: {order.user.first_name} {order.user.last_name}\n"
-            f"📞 Телефон: {order.user.phone or 'Телефон не указан'}\n"
-            f"📍 Адрес доставки: {order.delivery_address}\n"
-            f"💰 Общая стоимость: {order.total_price} £.\n"
-            f"📋 Статус: {order.status}\n"
-            f"🕒 Дата создания: {order.created.strftime('%d.%m.%Y %H:%M')}\n"
-        )
+    text, reply_markup = await orders_page(session, status)
+    await callback.message.edit_text(text, reply_markup=reply_markup)
+    await callback.answer()
 
+
+@admin_router.callback_query(AdminOrdersCallback.filter(F.action == "page"))
+async def orders_page_callback(
+    callback: types.CallbackQuery,
+    callback_data: AdminOrdersCallback,
+    session: AsyncSession,
+):
+    # Кнопки старых сообщений могут нести статус, которого уже нет
+    status = normalize_order_status(callback_data.status)
+    if status is None:
+        await callback.answer("Неизвестный статус", show_alert=True)
+        return
+    text, reply_markup = await orders_page(
+        session,
+        status,
+        cursor=callback_data.cursor,
+        backwards=callback_data.backwards,
+    )
+    await callback.message.edit_text(text, reply_markup=reply_markup)
+    await callback.answer()
+
+
+@admin_router.callback_query(AdminOrdersCallback.filter(F.action == "order"))
+async def order_card_callback(
+    callback: types.CallbackQuery,
+    callback_data: AdminOrdersCallback,
+    session: AsyncSession,
+):
+    order = await orm_get_orders(session, order_id=callback_data.order_id)
+    if order is None:
+        await callback.answer("Заказ не найден", show_alert=True)
+        return
+
+    btns = {
+        "⬅ К списку": AdminOrdersCallback(
+            action="page",
+            status=callback_data.status,
+            cursor=callback_data.cursor,
+            backwards=callback_data.backwards,
+        ).pack()
+    }
+    if order.status == ORDER_STATUS_NEW:
+        btns["В работе"] = f"admin_accept_order_{order.id}"
+
+    await callback.message.edit_text(
+        order_card_text(order), reply_markup=get_callback_btns(btns=btns)
+    )
     await callback.answer()
 
 
@@ -757,7 +1623,7 @@ async def admin_accept_order(
     }
 
     # Загружаем данные о пункте выдачи из файла
-    pickup_data = load_sharing_data(order.user_id)
+    pickup_data = await load_sharing_data(session, order.user_id)
     pickup_info = ""
     if pickup_data:
         pickup_info = (
@@ -774,6 +1640,8 @@ async def admin_accept_order(
         parse_mode="HTML",
     )
     await orm_update_order(session, order_id, data_for_update)
+    # Заказ больше не ждёт доставщика - убираем его из лент
+    await delivery_feed.order_taken(order_id)
 
 
 @admin_router.callback_query(F.data.startswith("send_to_group_"))
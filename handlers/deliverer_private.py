@@ -7,19 +7,22 @@ from aiogram.fsm.state import State, StatesGroup
 from database.orm_query import (
     orm_add_deliverer,
     orm_add_review,
+    orm_complete_order,
     orm_get_deliverer_reviews_and_update_summary,
     orm_get_deliverers,
     orm_get_orders,
+    orm_take_order,
     orm_update_deliverer,
-    orm_update_order,
     orm_update_review,
 )
+from filters.callback_filters import DelivererOrdersCallback
 from filters.chat_types import ChatTypeFilter
 from kbds.inline import inline_buttons_kb
 from kbds.reply import get_keyboard
+from utils.delivery_feed import delivery_feed
 
 
-deliverer_private_router = Router()
+deliverer_private_router = Router(name="deliverer_private")
 deliverer_private_router.message.filter(ChatTypeFilter(["private"]))
 
 
@@ -48,27 +51,50 @@ class SharedContextDeliverer:
 
     async def send_active_orders(self, message: types.Message):
         """
-        Отправляет список активных заказов в личные сообщения доставщику.
+        Отправляет доставщику ленту активных заказов (одно сообщение с листанием).
         """
-        orders = await orm_get_orders(self.session, status="Оформлен")
-        if not orders:
-            await message.answer("Нет активных заказов.")
-            return
-
-        for order in orders:
-            if not order.delivery_address.lower() == "самовывоз":
-                await message.answer(
-                    f"📦 Заказ №{order.id}\n"
-                    f"👤 Покупатель: {order.user.first_name} {order.user.last_name}\n"
-                    f"📞 Телефон: {order.user.phone or 'Телефон не указан'}\n"
-                    f"📍 Адрес доставки: {order.delivery_address}\n"
-                    f"💰 Общая стоимость: {order.total_price} £.\n"
-                    f"📋 Статус: {order.status}\n"
-                    f"🕒 Дата создания: {order.created.strftime('%d.%m.%Y %H:%M')}\n",
-                    reply_markup=inline_buttons_kb(
-                        {"принять заказ": {"callback_data": f"accept_order_{order.id}"}}
-                    ),
-                )
+        await delivery_feed.send(self.session, message.bot, message.chat.id)
+
+    async def take_order(
+        self, callback: types.CallbackQuery, bot: Bot, order_id: int
+    ) -> bool:
+        """
+        Назначает заказ доставщику и оповещает покупателя.
+        Возвращает False, если заказ уже принят кем-то другим.
+        """
+        deliverer = await orm_get_deliverers(
+            self.session, telegram_id=callback.from_user.id
+        )
+        if not deliverer:
+            await callback.answer("Вы не зарегистрированы как доставщик", show_alert=True)
+            return False
+
+        user_id = await orm_take_order(self.session, order_id, deliverer.id)
+        if user_id is None:
+            await callback.answer(f"Заказ №{order_id} уже принят", show_alert=True)
+            await delivery_feed.order_taken(order_id)
+            return False
+
+        await bot.send_message(
+            user_id,
+            f"Ваш заказ №{order_id} был принят курьером {deliverer.first_name}\n"
+            f"номер телефона: {deliverer.phone}\n"
+            f"написать курьеру: @{deliverer.telegram_name}\n"
+            f"Ожидайте доставку.",
+        )
+        await callback.message.answer(
+            f'Вы приняли заказ №{order_id}, нажмите кнопку "я выполнил заказ", когда совершите доставку',
+            reply_markup=inline_buttons_kb(
+                {
+                    "я выполнил заказ": {
+                        "callback_data": f"complete_order_{order_id}",
+                    }
+                }
+            ),
+        )
+        await delivery_feed.order_taken(order_id)
+        await callback.answer()
+        return True
 
 
 @deliverer_private_router.message(Command("deliverer"))
@@ -167,31 +193,46 @@ async def accept_order(callback: types.CallbackQuery, session: AsyncSession, bot
     """
     Обработчик кнопки "принять заказ"
     """
-    deliverer = await orm_get_deliverers(session, telegram_id=callback.from_user.id)
     order_id = int(callback.data.split("_")[-1])
-    order = await orm_get_orders(session, order_id=order_id)
-    data_for_update = {
-        "deliverer_id": deliverer.id,
-        "status": "В работе",
-    }
-    await bot.send_message(
-        order.user_id,
-        f"Ваш заказ №{order_id} был принят курьером {deliverer.first_name}\n"
-        f"номер телефона: {deliverer.phone}\n"
-        f"написать курьеру: @{deliverer.telegram_name}\n"
-        f"Ожидайте доставку.",
-    )
-    await orm_update_order(session, order_id, data_for_update)
-    await callback.message.answer(
-        f'Вы приняли заказ №{order_id}, нажмите кнопку "я выполнил заказ", когда совершите доставку',
-        reply_markup=inline_buttons_kb(
-            {
-                "я выполнил заказ": {
-                    "callback_data": f"complete_order_{order_id}",
-                }
-            }
-        ),
+    context = SharedContextDeliverer(session)
+    await context.take_order(callback, bot, order_id)
+
+
+@deliverer_private_router.callback_query(DelivererOrdersCallback.filter(F.action == "page"))
+async def delivery_feed_page(
+    callback: types.CallbackQuery,
+    callback_data: DelivererOrdersCallback,
+    session: AsyncSession,
+    bot: Bot,
+):
+    """
+    Листание и обновление ленты активных заказов
+    """
+    await delivery_feed.show(
+        session,
+        bot,
+        callback.message.chat.id,
+        callback.message.message_id,
+        cursor=callback_data.cursor,
+        backwards=callback_data.backwards,
     )
+    await callback.answer()
+
+
+@deliverer_private_router.callback_query(
+    DelivererOrdersCallback.filter(F.action == "accept")
+)
+async def delivery_feed_accept(
+    callback: types.CallbackQuery,
+    callback_data: DelivererOrdersCallback,
+    session: AsyncSession,
+    bot: Bot,
+):
+    """
+    Кнопка "Принять" в ленте активных заказов
+    """
+    context = SharedContextDeliverer(session)
+    await context.take_order(callback, bot, callback_data.order_id)
 
 
 @deliverer_private_router.callback_query(F.data.startswith("complete_order_"))
@@ -204,9 +245,6 @@ async def complete_order(
     order_id = int(callback.data.split("_")[-1])
     order = await orm_get_orders(session, order_id=order_id)
 
-    data_for_update = {
-        "status": "Выполнен",
-    }
     # await bot.send_message(
     #     order.user_id,
     #     f"Ваш заказ №{order_id} был выполнен! \n"
@@ -217,7 +255,10 @@ async def complete_order(
     #         order_id=order_id,  # ID заказа
     #     ),
     # )
-    await orm_update_order(session, order_id, data_for_update)
+    # Заказ попадает в итоги продаж (/stats) только при первом завершении
+    if not await orm_complete_order(session, order_id):
+        await callback.answer(f"Заказ №{order_id} уже выполнен")
+        return
     await callback.answer(f"Вы завершили заказ №{order_id}")
     context = SharedContextDeliverer(session)
     await context.send_active_orders(callback.message)
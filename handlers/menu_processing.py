@@ -12,27 +12,33 @@ from database.orm_query import (
     orm_get_banner,
     orm_get_categories,
     orm_get_delivery_zones,
+    orm_get_orders_items,
     orm_get_pickup_points,
     orm_get_products,
     orm_get_quantity_in_cart,
     orm_get_user_carts,
+    orm_get_user_orders_page,
     orm_reduce_product_in_cart,
     orm_update_orders_banner_description,
 )
 from kbds.inline import (
     # create_order_menu_btns,
     get_callback_btns,
+    get_order_history_btns,
     get_products_btns,
     get_user_cart,
     get_user_catalog_btns,
     get_user_main_btns,
 )
 
+from config import ORDER_HISTORY_ITEMS, ORDER_HISTORY_PAGE_SIZE
+from filters.callback_filters import OrderHistoryCallback
 from utils.json_operations import save_sharing_data
 from utils.paginator import Paginator
+from utils.render_cache import render_cache
 
 
-menu_progressing_router = Router()
+menu_progressing_router = Router(name="menu_processing")
 
 
 class SharedContexMenu:
@@ -63,7 +69,7 @@ class SharedContexMenu:
                 user_id=user_id,
                 product_id=cart[0].product.id,
             )
-        await self.callback.message.edit_media(media=media, reply_markup=reply_markup)
+        await render_cache.edit(self.callback.message, media, reply_markup)
 
 
 async def main_menu(session, level, menu_name, user_id=None):
@@ -267,6 +273,76 @@ async def orders(session: AsyncSession, level: int, menu_name: str, user_id: int
     return image, kbds
 
 
+def order_history_text(order, items: list) -> str:
+    created = order.created.strftime("%d.%m.%Y") if order.created else ""
+    lines = [
+        f"🆔 Заказ #{order.id} от {created}",
+        f"📦 Статус: {order.status}",
+        f"💰 Сумма: {order.total_price}£",
+    ]
+    if order.deliverer and order.deliverer.first_name:
+        lines.append(f"🛵 Курьер: {order.deliverer.first_name}")
+    lines.extend(
+        f"- {item.name} x {item.quantity} ({item.price}£ за шт.)"
+        for item in items[:ORDER_HISTORY_ITEMS]
+    )
+    if len(items) > ORDER_HISTORY_ITEMS:
+        lines.append(f"... и ещё {len(items) - ORDER_HISTORY_ITEMS}")
+    return "\n".join(lines)
+
+
+async def order_history(
+    session: AsyncSession, user_id: int, cursor: int = 0, backwards: bool = False
+):
+    """
+    Страница истории заказов покупателя: заказы всех статусов, новые первыми.
+    Заказы и их товары читаются только для текущей страницы - двумя запросами.
+    """
+    page = await orm_get_user_orders_page(
+        session,
+        user_id,
+        cursor_id=cursor or None,
+        backwards=backwards,
+        limit=ORDER_HISTORY_PAGE_SIZE,
+    )
+    items = await orm_get_orders_items(session, [order.id for order in page.items])
+
+    if page:
+        orders_text = [
+            order_history_text(order, items[order.id]) for order in page.items
+        ]
+        caption = "<strong>История заказов:</strong>\n\n" + "\n\n".join(orders_text)
+    else:
+        caption = "У вас пока нет заказов."
+    if len(caption) > 1024:
+        caption = caption[:1020] + "..."
+
+    banner = await orm_get_banner(session, "orders")
+    image = InputMediaPhoto(media=banner.image, caption=caption, parse_mode="HTML")
+    kbds = get_order_history_btns(
+        order_ids=[order.id for order in page.items],
+        has_previous=page.has_previous(),
+        has_next=page.has_next(),
+    )
+    return image, kbds
+
+
+@menu_progressing_router.callback_query(OrderHistoryCallback.filter())
+async def order_history_callback(
+    callback: CallbackQuery,
+    callback_data: OrderHistoryCallback,
+    session: AsyncSession,
+):
+    image, kbds = await order_history(
+        session,
+        callback.from_user.id,
+        cursor=callback_data.cursor,
+        backwards=callback_data.backwards,
+    )
+    await render_cache.edit(callback.message, image, kbds)
+    await callback.answer()
+
+
 async def shipping(session: AsyncSession, level: int, menu_name: str, user_id: int):
     # Получаем баннер с обновлённым описанием доставки
     banner = await orm_get_banner(session, menu_name)
@@ -319,8 +395,7 @@ async def add_self_pickup_to_adress(
     callback: CallbackQuery, session: AsyncSession, bot: Bot
 ):
     user_id = callback.from_user.id
-    update_order_data = {str(user_id): {"delivery_address": "Самовывоз"}}
-    save_sharing_data(update_order_data)
+    await save_sharing_data(session, user_id, {"delivery_address": "Самовывоз"})
     await callback.answer("Выбран самовывоз.")
     context = SharedContexMenu(callback, session, bot)
     await context.return_to_cart(user_id)
@@ -335,7 +410,7 @@ async def back_to_main_menu(callback: CallbackQuery, session: AsyncSession):
         menu_name="main",
         user_id=user_id,
     )
-    await callback.message.edit_media(media=image, reply_markup=kbds)
+    await render_cache.edit(callback.message, image, kbds)
     await callback.answer()  # Закрываем уведомление
 
 
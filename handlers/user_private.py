@@ -7,7 +7,10 @@ from aiogram.filters import CommandObject, CommandStart
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import SEARCH_CACHE_TTL
 from database.orm_query import (
+    OutOfStockError,
     check_delivery_is_available,
     orm_add_to_cart,
     orm_add_to_wait_list,
@@ -24,14 +27,18 @@ from filters.chat_types import ChatTypeFilter
 from handlers.menu_processing import get_menu_content, main_menu, shipping
 from kbds.inline import (
     MenuCallBack,
+    get_callback_btns,
     inline_buttons_kb,
     phone_confirm_kb,
     address_confirm_kb,
 )
+from utils.callback_registry import callback_registry
 from utils.json_operations import (
     load_sharing_data,
     save_sharing_data,
 )
+from utils.product_search import product_search
+from utils.render_cache import render_cache
 
 
 class OrderState(StatesGroup):
@@ -66,14 +73,12 @@ class SharedContextUser:
                             f"🏬 Пункт выдачи: {pickup_point.district},{pickup_point.address}\n"
                             f"Google карты: {pickup_point.google_map_location}"
                         )
-                        # Сохраняем данные о пункте выдачи в файл
-                        save_sharing_data({
-                            str(order.user.user_id): {
-                                "pickup_point_id": pickup_point.id,
-                                "pickup_point_district": pickup_point.district,
-                                "pickup_point_address": pickup_point.address,
-                                "pickup_point_google_map_location": pickup_point.google_map_location,
-                            }
+                        # Сохраняем данные о пункте выдачи
+                        await save_sharing_data(self.session, order.user.user_id, {
+                            "pickup_point_id": pickup_point.id,
+                            "pickup_point_district": pickup_point.district,
+                            "pickup_point_address": pickup_point.address,
+                            "pickup_point_google_map_location": pickup_point.google_map_location,
                         })
             delivery_info = pickup_point_info or "🏬 Пункт выдачи: не выбран\n"
             
@@ -89,7 +94,7 @@ class SharedContextUser:
         if order.items:
             order_details += "\n🛒 Товары в заказе:\n"
             for idx, item in enumerate(order.items, start=1):
-                order_details += f"{idx}. {item.product.name} - {item.quantity} шт. x {item.product.price} £ = {item.quantity * item.product.price} £\n"
+                order_details += f"{idx}. {item.product.name} - {item.quantity} шт. x {item.price} £ = {item.quantity * item.price} £\n"
 
         order_details_for_buyer = (
             f"📦 Новый заказ №{order.id}\n\n"
@@ -105,7 +110,7 @@ class SharedContextUser:
         if order.items:
             order_details_for_buyer += "\n🛒 Товары в заказе:\n"
             for idx, item in enumerate(order.items, start=1):
-                order_details_for_buyer += f"{idx}. {item.product.name} - {item.quantity} шт. x {item.product.price} £ = {item.quantity * item.product.price} £\n"
+                order_details_for_buyer += f"{idx}. {item.product.name} - {item.quantity} шт. x {item.price} £ = {item.quantity * item.price} £\n"
         return {
             "order_details": order_details,
             "order_details_for_buyer": order_details_for_buyer,
@@ -176,9 +181,21 @@ class SharedContextUser:
             },
         )
 
-        new_order = await orm_create_order(
-            self.session, user_id, delivery_address, phone_number
-        )
+        try:
+            new_order = await orm_create_order(
+                self.session, user_id, delivery_address, phone_number
+            )
+        except OutOfStockError as e:
+            lines = "\n".join(
+                f"• {name}: осталось {stock} шт." for name, stock in e.products
+            )
+            await self.bot.send_message(
+                user_id,
+                f"Пока вы оформляли заказ, часть товаров закончилась:\n{lines}\n"
+                "Измените количество в корзине и оформите заказ снова.",
+            )
+            await state.clear()
+            return
         logger.debug(f"Новый заказ: {new_order}")
         order_details_dict = await self.order_details_text(order=new_order, state=state)
         order_details_for_buyer = order_details_dict["order_details_for_buyer"]
@@ -200,11 +217,12 @@ class SharedContextUser:
     async def check_delivery_is_avalible(self, user_id):
         delivery_is_available = await check_delivery_is_available(self.session)
         if not delivery_is_available:
-            update_order_data = {str(user_id): {"delivery_address": f"Самовывоз"}}
-            save_sharing_data(update_order_data)
+            await save_sharing_data(
+                self.session, user_id, {"delivery_address": "Самовывоз"}
+            )
 
 
-user_private_router = Router()
+user_private_router = Router(name="user_private")
 user_private_router.message.filter(ChatTypeFilter(["private"]))
 
 
@@ -216,13 +234,22 @@ async def start_cmd(
         logging.info(f"Start command message: {message.text}")
         logging.info(f"Start command args: {command.args}")
         args = command.args  # безопасно брать из объекта команды
-        if args and args.startswith("add_to_cart_"):
+        product_id = None
+        if args and args.startswith("buy_"):
+            # Кнопка "Купить" опубликованного товара - товар берётся из реестра кнопок
+            entry = await callback_registry.fetch(session, args.removeprefix("buy_"))
+            product_id = entry["product_id"] if entry else None
+            if product_id is None:
+                await message.answer("Публикация устарела, найдите товар в каталоге.")
+        elif args and args.startswith("add_to_cart_"):
+            # Ссылки из публикаций, сделанных до реестра кнопок
             try:
                 product_id = int(args.split("_")[-1])
             except (IndexError, ValueError):
                 await message.answer("Некорректный параметр товара.")
                 return
 
+        if product_id is not None:
             user = message.from_user
 
             # Добавляем пользователя и товар в корзину
@@ -241,18 +268,20 @@ async def start_cmd(
             media, reply_markup = await get_menu_content(
                 session, level=0, menu_name="main", user_id=user_id
             )
-            await message.answer_photo(
+            sent = await message.answer_photo(
                 media.media, caption=media.caption, reply_markup=reply_markup
             )
+            render_cache.remember(sent, media, reply_markup)
 
         else:
             user_id = message.from_user.id
             media, reply_markup = await get_menu_content(
                 session, level=0, menu_name="main", user_id=user_id
             )
-            await message.answer_photo(
+            sent = await message.answer_photo(
                 media.media, caption=media.caption, reply_markup=reply_markup
             )
+            render_cache.remember(sent, media, reply_markup)
 
     except Exception as e:
         logging.error(f"Ошибка в start_cmd: {e}")
@@ -311,7 +340,7 @@ async def user_menu(
         user_id=callback.from_user.id,
     )
 
-    await callback.message.edit_media(media=media, reply_markup=reply_markup)
+    await render_cache.edit(callback.message, media, reply_markup)
     await callback.answer()
 
 
@@ -328,9 +357,9 @@ async def make_order(
         item.product.name.startswith("Зона доставки") for item in cart
     )
     try:
-        has_delivery_address = load_sharing_data(user_id).get("delivery_address")
-    except FileNotFoundError:
-        has_delivery_address = False
+        has_delivery_address = (await load_sharing_data(session, user_id)).get(
+            "delivery_address"
+        )
     except Exception as e:
         logging.error(f"Ошибка при загрузке данных: {e}")
         has_delivery_address = False
@@ -416,7 +445,7 @@ async def user_orders(callback: types.CallbackQuery, session: AsyncSession):
     )
 
     # Отправляем пользователю список заказов
-    await callback.message.edit_media(media=media, reply_markup=reply_markup)
+    await render_cache.edit(callback.message, media, reply_markup)
     await callback.answer()
 
 
@@ -428,9 +457,7 @@ async def confirm_phone(
     user = await orm_get_user(session, callback.from_user.id)
     await state.update_data(phone_number=user.phone)  # Записываем телефон в стейт
     try:
-        self_pickup = load_sharing_data(callback.from_user.id)
-    except FileNotFoundError:
-        self_pickup = False
+        self_pickup = await load_sharing_data(session, callback.from_user.id)
     except Exception as e:
         logging.error(f"Ошибка при загрузке данных: {e}")
         self_pickup = False
@@ -509,3 +536,50 @@ async def process_address(
         state=state,
         delivery_address=message.text.strip(),
     )
+
+
+@user_private_router.inline_query()
+async def search_products(inline_query: types.InlineQuery, session: AsyncSession):
+    """
+    Инлайн-поиск товаров: @бот запрос. Следующая страница результатов
+    запрашивается Telegram сама по next_offset при прокрутке списка.
+    """
+    try:
+        offset = int(inline_query.offset or 0)
+    except ValueError:
+        offset = 0
+
+    products = await product_search.search(session, inline_query.query, offset)
+    results = []
+    for product in products:
+        is_available = product["is_available"]
+        button = MenuCallBack(
+            level=2,
+            menu_name="add_to_cart" if is_available else "add_to_waitlist",
+            product_id=product["id"],
+        )
+        results.append(
+            types.InlineQueryResultCachedPhoto(
+                id=str(product["id"]),
+                photo_file_id=product["image"],
+                title=product["name"],
+                caption=f"<strong>{product['name']}</strong>\n"
+                f"{product['description']}\n"
+                f"<strong>Стоимость: {round(product['price'], 2)}</strong>\n"
+                f"<strong>{'есть ' if is_available else 'нет '}в наличии</strong>",
+                parse_mode="HTML",
+                reply_markup=get_callback_btns(
+                    btns={"Купить 💵" if is_available else "Заявка 🔔": button.pack()}
+                ),
+            )
+        )
+
+    next_offset = ""
+    if len(products) == product_search.page_size:
+        next_offset = str(offset + len(products))
+    await inline_query.answer(
+        results,
+        cache_time=SEARCH_CACHE_TTL,
+        is_personal=False,
+        next_offset=next_offset,
+    )
@@ -3,7 +3,14 @@ from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from filters.callback_filters import StatusCallback
+from common.order_statuses import ORDER_STATUSES
+from filters.callback_filters import (
+    AdminCatalogCallback,
+    AdminOrdersCallback,
+    DelivererOrdersCallback,
+    OrderHistoryCallback,
+    StatusCallback,
+)
 from database.orm_query import check_delivery_is_available
 
 
@@ -56,6 +63,14 @@ def get_user_main_btns(
                 ).pack(),
             )
         )
+    # Под активными заказами - переход ко всей истории
+    if level == 4:
+        keyboard.add(
+            InlineKeyboardButton(
+                text="История заказов 🗂",
+                callback_data=OrderHistoryCallback().pack(),
+            )
+        )
 
     return keyboard.adjust(*sizes).as_markup()
 
@@ -278,27 +293,200 @@ address_confirm_kb = InlineKeyboardMarkup(
 )
 
 
-def get_status_keyboard():
+def get_status_keyboard(current: str | None = None):
     return InlineKeyboardMarkup(
         inline_keyboard=[
             [
                 InlineKeyboardButton(
-                    text="оформлен",
-                    callback_data=StatusCallback(value="оформлен").pack(),
-                ),
-                InlineKeyboardButton(
-                    text="в работе",
-                    callback_data=StatusCallback(value="в работе").pack(),
-                ),
-                InlineKeyboardButton(
-                    text="выполнен",
-                    callback_data=StatusCallback(value="выполнен").pack(),
-                ),
+                    text=f"✅ {status}" if status == current else status,
+                    callback_data=StatusCallback(value=status).pack(),
+                )
+                for status in ORDER_STATUSES
             ]
         ]
     )
 
 
+def get_admin_orders_btns(
+    *,
+    status: str,
+    order_ids: list[int],
+    cursor: int,
+    backwards: bool,
+    has_previous: bool,
+    has_next: bool,
+    sizes: tuple[int] = (5,),
+) -> InlineKeyboardMarkup:
+    """
+    Клавиатура страницы заказов: кнопки заказов, навигация и фильтр по статусу.
+    cursor/backwards - координаты текущей страницы, чтобы вернуться на неё из карточки.
+    """
+    keyboard = InlineKeyboardBuilder()
+
+    for order_id in order_ids:
+        keyboard.add(
+            InlineKeyboardButton(
+                text=f"№{order_id}",
+                callback_data=AdminOrdersCallback(
+                    action="order",
+                    status=status,
+                    cursor=cursor,
+                    backwards=backwards,
+                    order_id=order_id,
+                ).pack(),
+            )
+        )
+    keyboard.adjust(*sizes)
+
+    row = []
+    if has_previous:
+        row.append(
+            InlineKeyboardButton(
+                text="◀ Пред.",
+                callback_data=AdminOrdersCallback(
+                    action="page", status=status, cursor=order_ids[0], backwards=True
+                ).pack(),
+            )
+        )
+    if has_next:
+        row.append(
+            InlineKeyboardButton(
+                text="След. ▶",
+                callback_data=AdminOrdersCallback(
+                    action="page", status=status, cursor=order_ids[-1]
+                ).pack(),
+            )
+        )
+    keyboard.row(*row)
+
+    keyboard.row(*get_status_keyboard(current=status).inline_keyboard[0])
+    return keyboard.as_markup()
+
+
+def get_admin_catalog_btns(
+    *,
+    category_id: int,
+    products: list,
+    cursor: int,
+    backwards: bool,
+    has_previous: bool,
+    has_next: bool,
+    sizes: tuple[int] = (2,),
+) -> InlineKeyboardMarkup:
+    """
+    Клавиатура страницы каталога: кнопки товаров (карточка открывается по нажатию),
+    навигация по страницам и возврат к выбору категории.
+    """
+    keyboard = InlineKeyboardBuilder()
+
+    for product in products:
+        keyboard.add(
+            InlineKeyboardButton(
+                text=f"{'✅' if product.is_available else '❌'} {product.name[:30]}",
+                callback_data=AdminCatalogCallback(
+                    action="product",
+                    category_id=category_id,
+                    cursor=cursor,
+                    backwards=backwards,
+                    product_id=product.id,
+                ).pack(),
+            )
+        )
+    keyboard.adjust(*sizes)
+
+    row = []
+    if has_previous:
+        row.append(
+            InlineKeyboardButton(
+                text="◀ Пред.",
+                callback_data=AdminCatalogCallback(
+                    action="page",
+                    category_id=category_id,
+                    cursor=products[0].id,
+                    backwards=True,
+                ).pack(),
+            )
+        )
+    if has_next:
+        row.append(
+            InlineKeyboardButton(
+                text="След. ▶",
+                callback_data=AdminCatalogCallback(
+                    action="page", category_id=category_id, cursor=products[-1].id
+                ).pack(),
+            )
+        )
+    keyboard.row(*row)
+
+    keyboard.row(
+        InlineKeyboardButton(
+            text="⬅ Категории",
+            callback_data=AdminCatalogCallback(action="categories").pack(),
+        )
+    )
+    return keyboard.as_markup()
+
+
+def get_deliverer_orders_btns(
+    *,
+    order_ids: list[int],
+    cursor: int,
+    backwards: bool,
+    has_previous: bool,
+    has_next: bool,
+    sizes: tuple[int] = (2,),
+) -> InlineKeyboardMarkup:
+    """
+    Клавиатура ленты доставщика: "принять" для каждого заказа страницы,
+    навигация и обновление текущей страницы.
+    """
+    keyboard = InlineKeyboardBuilder()
+
+    for order_id in order_ids:
+        keyboard.add(
+            InlineKeyboardButton(
+                text=f"Принять №{order_id}",
+                callback_data=DelivererOrdersCallback(
+                    action="accept",
+                    cursor=cursor,
+                    backwards=backwards,
+                    order_id=order_id,
+                ).pack(),
+            )
+        )
+    keyboard.adjust(*sizes)
+
+    row = []
+    if has_previous:
+        row.append(
+            InlineKeyboardButton(
+                text="◀ Пред.",
+                callback_data=DelivererOrdersCallback(
+                    action="page", cursor=order_ids[0], backwards=True
+                ).pack(),
+            )
+        )
+    row.append(
+        InlineKeyboardButton(
+            text="🔄 Обновить",
+            callback_data=DelivererOrdersCallback(
+                action="page", cursor=cursor, backwards=backwards
+            ).pack(),
+        )
+    )
+    if has_next:
+        row.append(
+            InlineKeyboardButton(
+                text="След. ▶",
+                callback_data=DelivererOrdersCallback(
+                    action="page", cursor=order_ids[-1]
+                ).pack(),
+            )
+        )
+    keyboard.row(*row)
+    return keyboard.as_markup()
+
+
 def inline_buttons_kb(btns: dict[str, dict]) -> InlineKeyboardMarkup:
     """
     Создаёт клавиатуру из словаря вида:
@@ -341,3 +529,43 @@ def get_raiting_keyboard(
         ),
     ]
     return InlineKeyboardMarkup(inline_keyboard=[buttons])
+
+
+def get_order_history_btns(
+    *,
+    order_ids: list[int],
+    has_previous: bool,
+    has_next: bool,
+) -> InlineKeyboardMarkup:
+    """
+    Клавиатура истории заказов покупателя: навигация по страницам
+    и возврат к активным заказам.
+    """
+    keyboard = InlineKeyboardBuilder()
+
+    row = []
+    if has_previous:
+        row.append(
+            InlineKeyboardButton(
+                text="◀ Новее",
+                callback_data=OrderHistoryCallback(
+                    cursor=order_ids[0], backwards=True
+                ).pack(),
+            )
+        )
+    if has_next:
+        row.append(
+            InlineKeyboardButton(
+                text="Старее ▶",
+                callback_data=OrderHistoryCallback(cursor=order_ids[-1]).pack(),
+            )
+        )
+    keyboard.row(*row)
+
+    keyboard.row(
+        InlineKeyboardButton(
+            text="⬅ Мои заказы",
+            callback_data=MenuCallBack(level=4, menu_name="orders").pack(),
+        )
+    )
+    return keyboard.as_markup()
@@ -0,0 +1,98 @@
+import logging
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from config import (
+    UPDATE_DEDUP_CLEANUP_EVERY,
+    UPDATE_DEDUP_PERSISTENT,
+    UPDATE_DEDUP_TTL,
+    UPDATE_DEDUP_WINDOW,
+)
+from database.orm_query import orm_claim_update, orm_delete_processed_updates
+
+
+class RecentIds:
+    """Кольцевой буфер последних ID с проверкой вхождения за O(1)."""
+
+    def __init__(self, size: int):
+        self._order: deque[int] = deque(maxlen=size)
+        self._ids: set[int] = set()
+
+    def __contains__(self, item: int) -> bool:
+        return item in self._ids
+
+    def add(self, item: int) -> None:
+        if len(self._order) == self._order.maxlen:
+            self._ids.discard(self._order[0])
+        self._order.append(item)
+        self._ids.add(item)
+
+
+class UpdateDeduplication(BaseMiddleware):
+    """
+    Middleware для dp.update: отбрасывает апдейты с уже обработанным update_id
+    (повторы после перезапуска polling, ретраи webhook).
+
+    Сначала проверяются последние window ID в памяти, затем (если persistent)
+    таблица processed_updates, которая переживает перезапуск и общая для воркеров.
+    Отметки старше ttl секунд удаляются. Счётчики лежат в stats.
+    """
+
+    def __init__(
+        self,
+        session_pool: async_sessionmaker | None = None,
+        window: int = UPDATE_DEDUP_WINDOW,
+        persistent: bool = UPDATE_DEDUP_PERSISTENT,
+        ttl: int = UPDATE_DEDUP_TTL,
+        cleanup_every: int = UPDATE_DEDUP_CLEANUP_EVERY,
+    ):
+        self.session_pool = session_pool
+        self.persistent = persistent and session_pool is not None
+        self.ttl = ttl
+        self.cleanup_every = cleanup_every
+        self.stats: Counter[str] = Counter()
+        self._recent = RecentIds(window)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if not isinstance(event, Update):
+            return await handler(event, data)
+
+        update_id = event.update_id
+        self.stats["checked"] += 1
+        if update_id in self._recent:
+            self.stats["duplicates_memory"] += 1
+            logging.warning(f"Повторный апдейт {update_id} пропущен")
+            return None
+        self._recent.add(update_id)
+
+        if self.persistent and not await self._claim(update_id):
+            self.stats["duplicates_db"] += 1
+            logging.warning(f"Апдейт {update_id} уже обработан ранее, пропущен")
+            return None
+
+        return await handler(event, data)
+
+    async def _claim(self, update_id: int) -> bool:
+        try:
+            async with self.session_pool() as session:
+                claimed = await orm_claim_update(session, update_id)
+                if self.stats["checked"] % self.cleanup_every == 0:
+                    await orm_delete_processed_updates(
+                        session, datetime.now() - timedelta(seconds=self.ttl)
+                    )
+            return claimed
+        except Exception as e:
+            # Если БД недоступна, лучше обработать апдейт, чем потерять его
+            self.stats["db_errors"] += 1
+            logging.error(f"Не удалось отметить апдейт {update_id}: {e}")
+            return True
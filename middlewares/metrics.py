@@ -0,0 +1,110 @@
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Bot, Router
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramAPIError
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+from aiogram.types import TelegramObject
+
+from utils.metrics import metrics
+from utils.profiler import sampling_profiler
+
+updates_in_flight = metrics.gauge(
+    "bot_updates_in_flight", "Апдейты, которые обрабатываются прямо сейчас"
+)
+update_seconds = metrics.histogram(
+    "bot_update_seconds", "Полное время обработки апдейта", ("type",)
+)
+handler_seconds = metrics.histogram(
+    "bot_handler_seconds", "Время выполнения хендлера", ("router", "handler")
+)
+handler_errors = metrics.counter(
+    "bot_handler_errors_total", "Исключения в хендлерах", ("router", "handler", "error")
+)
+api_seconds = metrics.histogram(
+    "bot_telegram_api_seconds", "Время запроса к Telegram Bot API", ("method",)
+)
+api_errors = metrics.counter(
+    "bot_telegram_api_errors_total", "Ошибки Telegram Bot API", ("method", "error")
+)
+
+
+class UpdateMetrics(BaseMiddleware):
+    """Middleware для dp.update: время обработки апдейта и число апдейтов в работе."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        updates_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            updates_in_flight.dec()
+            update_seconds.observe(
+                time.perf_counter() - start, getattr(event, "event_type", "unknown")
+            )
+            sampling_profiler.update_done()
+
+
+class HandlerMetrics(BaseMiddleware):
+    """
+    Inner middleware: время хендлера с метками роутера и имени функции.
+    Вызывается уже после фильтров, только для сработавшего хендлера.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        router = data["event_router"].name
+        name = data["handler"].callback.__name__
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception as e:
+            handler_errors.inc(router, name, type(e).__name__)
+            raise
+        finally:
+            handler_seconds.observe(time.perf_counter() - start, router, name)
+
+
+class ApiMetrics(BaseRequestMiddleware):
+    """Middleware сессии бота: время и ошибки запросов к Bot API по методам."""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        name = method.__api_method__
+        start = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except TelegramAPIError as e:
+            api_errors.inc(name, type(e).__name__)
+            raise
+        finally:
+            api_seconds.observe(time.perf_counter() - start, name)
+
+
+def setup_handler_metrics(router: Router) -> None:
+    """
+    Вешает HandlerMetrics на все события корневого роутера (диспетчера):
+    inner middleware родителя действуют и на хендлеры вложенных роутеров.
+    """
+    middleware = HandlerMetrics()
+    for event_name, observer in router.observers.items():
+        if event_name not in ("update", "error"):
+            observer.middleware(middleware)
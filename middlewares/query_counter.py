@@ -0,0 +1,149 @@
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Router
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import TelegramObject
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from config import QUERY_BUDGET, QUERY_REPEAT_LIMIT
+from utils.metrics import metrics
+
+handler_queries = metrics.histogram(
+    "bot_handler_queries",
+    "Число SQL-запросов за один вызов хендлера",
+    ("router", "handler"),
+    buckets=(1, 2, 3, 5, 10, 20, 50, 100),
+)
+handler_db_seconds = metrics.histogram(
+    "bot_handler_db_seconds", "Время SQL-запросов за один вызов хендлера", ("router", "handler")
+)
+
+
+class QueryBudgetExceeded(Exception):
+    """Хендлер превысил бюджет запросов (только в строгом режиме)."""
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    duration: float = 0.0
+    shapes: Counter = field(default_factory=Counter)
+
+
+# Статистика текущего хендлера; None - запросы вне хендлеров не считаются
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_started", []).append((context, time.perf_counter()))
+
+
+def _record(conn, context, statement) -> None:
+    stats = _current.get()
+    started = conn.info.get("query_started")
+    # Время начала снимается только для своего запроса (по контексту выполнения)
+    if stats is None or not started or started[-1][0] is not context:
+        return
+    stats.count += 1
+    stats.duration += time.perf_counter() - started.pop()[1]
+    # Параметры в тексте не подставлены, так что текст запроса - его "форма"
+    stats.shapes[statement] += 1
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    _record(conn, context, statement)
+
+
+def _handle_error(exception_context):
+    # Для упавшего запроса after_cursor_execute не вызывается - без этого его
+    # время начала осталось бы в conn.info и ушло бы в замер следующего запроса
+    if exception_context.connection is not None:
+        _record(
+            exception_context.connection,
+            exception_context.execution_context,
+            exception_context.statement,
+        )
+
+
+def install_query_counter(engine: AsyncEngine) -> None:
+    """Подключает подсчёт запросов к engine (события SQLAlchemy)."""
+    if not event.contains(engine.sync_engine, "after_cursor_execute", _after_execute):
+        event.listen(engine.sync_engine, "before_cursor_execute", _before_execute)
+        event.listen(engine.sync_engine, "after_cursor_execute", _after_execute)
+        event.listen(engine.sync_engine, "handle_error", _handle_error)
+
+
+class QueryCounter(BaseMiddleware):
+    """
+    Inner middleware: считает SQL-запросы и время БД за вызов хендлера.
+
+    Предупреждает, если хендлер сделал больше budget запросов или повторил
+    один и тот же запрос больше repeat_limit раз (похоже на N+1).
+    В строгом режиме (strict) вместо предупреждения бросает QueryBudgetExceeded -
+    для тестов и локальной проверки.
+    Хендлер с флагом query_budget=False (массовые операции) не проверяется.
+    """
+
+    def __init__(
+        self,
+        budget: int = QUERY_BUDGET,
+        repeat_limit: int = QUERY_REPEAT_LIMIT,
+        strict: bool = False,
+    ):
+        self.budget = budget
+        self.repeat_limit = repeat_limit
+        self.strict = strict
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        router = data["event_router"].name
+        name = data["handler"].callback.__name__
+        stats = QueryStats()
+        token = _current.set(stats)
+        try:
+            result = await handler(event, data)
+        finally:
+            _current.reset(token)
+            handler_queries.observe(stats.count, router, name)
+            handler_db_seconds.observe(stats.duration, router, name)
+
+        logging.debug(
+            f"{router}.{name}: {stats.count} запросов к БД за {stats.duration * 1000:.1f} мс"
+        )
+        if get_flag(data, "query_budget", default=True):
+            self._check(f"{router}.{name}", stats)
+        return result
+
+    def _check(self, name: str, stats: QueryStats) -> None:
+        problems = []
+        if stats.count > self.budget:
+            problems.append(f"{stats.count} запросов при бюджете {self.budget}")
+        for statement, repeats in stats.shapes.items():
+            if repeats > self.repeat_limit:
+                shape = " ".join(statement.split())[:200]
+                problems.append(f"запрос повторён {repeats} раз (N+1?): {shape}")
+        if not problems:
+            return
+        message = f"Хендлер {name}: " + "; ".join(problems)
+        if self.strict:
+            raise QueryBudgetExceeded(message)
+        logging.warning(message)
+
+
+def setup_query_counter(router: Router, strict: bool = False) -> None:
+    """Вешает QueryCounter на все события корневого роутера (диспетчера)."""
+    middleware = QueryCounter(strict=strict)
+    for event_name, observer in router.observers.items():
+        if event_name not in ("update", "error"):
+            observer.middleware(middleware)
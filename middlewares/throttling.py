@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update, User
+
+from config import (
+    THROTTLE_BURST,
+    THROTTLE_COALESCE_WINDOW,
+    THROTTLE_MAX_USERS,
+    THROTTLE_RATE,
+)
+from utils.send_queue import RateLimiter
+
+
+class UserThrottling(BaseMiddleware):
+    """
+    Middleware для dp.update: порядок и ограничение частоты апдейтов одного пользователя.
+
+    - апдейты одного пользователя обрабатываются строго по очереди (замок на user_id),
+      поэтому быстрые нажатия "+1" не гоняются за одними и теми же строками корзины;
+    - одинаковое нажатие (та же кнопка того же сообщения) в течение coalesce_window
+      секунд схлопывается в одно;
+    - на пользователя действует token bucket: rate апдейтов в секунду, всплеск до burst.
+
+    Счётчики обработанных, схлопнутых и отброшенных апдейтов лежат в stats.
+    """
+
+    def __init__(
+        self,
+        rate: float = THROTTLE_RATE,
+        burst: int = THROTTLE_BURST,
+        coalesce_window: float = THROTTLE_COALESCE_WINDOW,
+        max_users: int = THROTTLE_MAX_USERS,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.coalesce_window = coalesce_window
+        self.max_users = max_users
+        self.stats: Counter[str] = Counter()
+        self._locks: dict[int, list] = {}  # user_id -> [замок, число ожидающих]
+        self._buckets: OrderedDict[int, RateLimiter] = OrderedDict()
+        self._recent: dict[tuple, float] = {}
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user: User | None = data.get("event_from_user")
+        if user is None or not isinstance(event, Update):
+            return await handler(event, data)
+
+        callback = event.callback_query
+        if callback is not None and self._is_repeated(user.id, callback):
+            self.stats["coalesced"] += 1
+            logging.debug(f"Повторное нажатие {callback.data} от {user.id} пропущено")
+            await self._answer(callback)
+            return None
+
+        if not self._bucket(user.id).try_acquire():
+            self.stats["throttled"] += 1
+            logging.debug(f"Апдейт от {user.id} отброшен: слишком часто")
+            if callback is not None:
+                await self._answer(callback, "Слишком часто, подождите секунду 🙏")
+            return None
+
+        async with self._user_lock(user.id):
+            self.stats["processed"] += 1
+            return await handler(event, data)
+
+    def _is_repeated(self, user_id: int, callback) -> bool:
+        now = time.monotonic()
+        if len(self._recent) > self.max_users:
+            self._recent = {
+                key: seen
+                for key, seen in self._recent.items()
+                if now - seen < self.coalesce_window
+            }
+
+        message_id = callback.message.message_id if callback.message else None
+        key = (user_id, message_id, callback.data)
+        seen = self._recent.get(key)
+        if seen is not None and now - seen < self.coalesce_window:
+            return True
+        self._recent[key] = now
+        return False
+
+    def _bucket(self, user_id: int) -> RateLimiter:
+        bucket = self._buckets.pop(user_id, None)
+        if bucket is None:
+            bucket = RateLimiter(self.rate, self.burst)
+        self._buckets[user_id] = bucket
+        # Давно не писавшие пользователи вытесняются - их bucket всё равно полон
+        while len(self._buckets) > self.max_users:
+            self._buckets.popitem(last=False)
+        return bucket
+
+    def _user_lock(self, user_id: int) -> "_UserLock":
+        return _UserLock(self._locks, user_id)
+
+    @staticmethod
+    async def _answer(callback, text: str | None = None) -> None:
+        try:
+            await callback.answer(text)
+        except Exception as e:
+            logging.debug(f"Не удалось ответить на callback: {e}")
+
+
+class _UserLock:
+    """Замок на пользователя, который удаляется из словаря, когда его никто не ждёт."""
+
+    def __init__(self, locks: dict[int, list], user_id: int):
+        self.locks = locks
+        self.user_id = user_id
+
+    async def __aenter__(self):
+        entry = self.locks.setdefault(self.user_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            await entry[0].acquire()
+        except BaseException:
+            self._release_ref(entry)
+            raise
+
+    async def __aexit__(self, *exc):
+        entry = self.locks[self.user_id]
+        entry[0].release()
+        self._release_ref(entry)
+
+    def _release_ref(self, entry: list) -> None:
+        entry[1] -= 1
+        if entry[1] == 0:
+            del self.locks[self.user_id]
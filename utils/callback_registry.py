@@ -0,0 +1,131 @@
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import CALLBACK_REGISTRY_MAX_SIZE, CALLBACK_REGISTRY_TTL
+from database.orm_query import (
+    orm_delete_expired_button_callbacks,
+    orm_get_button_callback,
+    orm_save_button_callbacks,
+)
+from utils.json_utils import prepare_for_json
+
+
+class CallbackRegistry:
+    """
+    Ограниченный реестр кнопок опубликованных товаров.
+
+    Ключ - product_hash из BuyCallbackData. Записи хранятся в LRU в памяти
+    (не больше max_size, не дольше ttl секунд). Если persistent=True,
+    новые записи копятся и сохраняются в БД одной пачкой через persist().
+    """
+
+    def __init__(
+        self,
+        max_size: int = CALLBACK_REGISTRY_MAX_SIZE,
+        ttl: int = CALLBACK_REGISTRY_TTL,
+        persistent: bool = True,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.persistent = persistent
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+        self._pending: set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _is_expired(self, entry: dict) -> bool:
+        return time.time() - entry["created"] > self.ttl
+
+    def _evict(self) -> None:
+        # Самые старые по использованию записи лежат в начале OrderedDict
+        while len(self._entries) > self.max_size:
+            product_hash, _ = self._entries.popitem(last=False)
+            self._pending.discard(product_hash)
+
+    def register(
+        self, product_hash: str, item: dict, chat_ids: list[int], product_id: int = None
+    ) -> None:
+        """
+        Регистрирует кнопку товара, опубликованного в чатах chat_ids.
+        """
+        entry = self._entries.pop(product_hash, None)
+        known_chats = entry["chat_ids"] if entry and not self._is_expired(entry) else []
+        self._entries[product_hash] = {
+            "product_id": product_id,
+            "item": prepare_for_json(item),
+            "chat_ids": list(dict.fromkeys([*known_chats, *chat_ids])),
+            "created": time.time(),
+        }
+        if self.persistent:
+            self._pending.add(product_hash)
+        self._evict()
+
+    def get(self, product_hash: str) -> dict | None:
+        entry = self._entries.get(product_hash)
+        if entry is None:
+            return None
+        if self._is_expired(entry):
+            del self._entries[product_hash]
+            self._pending.discard(product_hash)
+            return None
+        self._entries.move_to_end(product_hash)
+        return entry
+
+    async def fetch(self, session: AsyncSession, product_hash: str) -> dict | None:
+        """
+        Ищет запись в памяти, а при промахе - в БД (если включено сохранение).
+        """
+        entry = self.get(product_hash)
+        if entry is not None or not self.persistent:
+            return entry
+
+        record = await orm_get_button_callback(session, product_hash)
+        if record is None:
+            return None
+        entry = {
+            "product_id": record.product_id,
+            "item": record.item,
+            "chat_ids": record.chat_ids,
+            "created": record.created.timestamp(),
+        }
+        if self._is_expired(entry):
+            return None
+        self._entries[product_hash] = entry
+        self._evict()
+        return entry
+
+    async def persist(self, session: AsyncSession) -> None:
+        """
+        Сохраняет накопленные записи в БД одним запросом и чистит устаревшие.
+        """
+        if not self.persistent or not self._pending:
+            return
+        entries = [
+            {
+                "product_hash": product_hash,
+                "product_id": self._entries[product_hash]["product_id"],
+                "item": self._entries[product_hash]["item"],
+                "chat_ids": self._entries[product_hash]["chat_ids"],
+                "created": datetime.fromtimestamp(
+                    self._entries[product_hash]["created"]
+                ),
+            }
+            for product_hash in self._pending
+            if product_hash in self._entries
+        ]
+        self._pending.clear()
+        try:
+            await orm_save_button_callbacks(session, entries)
+            await orm_delete_expired_button_callbacks(
+                session, datetime.now() - timedelta(seconds=self.ttl)
+            )
+        except Exception as e:
+            logging.error(f"Ошибка сохранения реестра кнопок: {e}")
+
+
+callback_registry = CallbackRegistry()
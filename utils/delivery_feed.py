@@ -0,0 +1,141 @@
+import logging
+from dataclasses import dataclass
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import InlineKeyboardMarkup
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from config import DELIVERER_ORDERS_PAGE_SIZE
+from database.orm_query import orm_get_delivery_orders_page
+from kbds.inline import get_deliverer_orders_btns
+from utils.sharding import event_bus
+
+
+@dataclass
+class FeedMessage:
+    message_id: int
+    cursor: int
+    backwards: bool
+    order_ids: list[int]
+
+
+class DeliveryFeed:
+    """
+    Лента новых заказов для доставщиков: одно сообщение на доставщика,
+    которое редактируется при листании и когда заказы со страницы принимают.
+
+    Для каждого чата запоминается последнее сообщение ленты и заказы на нём,
+    поэтому при принятии заказа перерисовываются только те ленты,
+    где этот заказ виден. Принятие заказа рассылается через event_bus,
+    чтобы ленты обновились и в других воркерах.
+    """
+
+    def __init__(self, page_size: int = DELIVERER_ORDERS_PAGE_SIZE):
+        self.page_size = page_size
+        self.session_maker: async_sessionmaker | None = None
+        self.bot: Bot | None = None
+        self._messages: dict[int, FeedMessage] = {}
+
+    def setup(self, session_maker: async_sessionmaker, bot: Bot) -> None:
+        self.session_maker = session_maker
+        self.bot = bot
+        event_bus.subscribe("order_taken", self._refresh)
+
+    async def render(
+        self, session: AsyncSession, cursor: int = 0, backwards: bool = False
+    ) -> tuple[str, InlineKeyboardMarkup, int, bool, list[int]]:
+        """
+        Текст и клавиатура страницы ленты.
+        Возвращает также фактические координаты страницы и ID заказов на ней.
+        """
+        page = await orm_get_delivery_orders_page(
+            session, cursor_id=cursor or None, backwards=backwards, limit=self.page_size
+        )
+        if not page and cursor:
+            # Все заказы страницы разобрали - показываем начало ленты
+            cursor, backwards = 0, False
+            page = await orm_get_delivery_orders_page(session, limit=self.page_size)
+
+        order_ids = [order.id for order in page.items]
+        reply_markup = get_deliverer_orders_btns(
+            order_ids=order_ids,
+            cursor=cursor,
+            backwards=backwards,
+            has_previous=page.has_previous(),
+            has_next=page.has_next(),
+        )
+        if not page:
+            return "Нет активных заказов.", reply_markup, cursor, backwards, order_ids
+
+        lines = ["<strong>Активные заказы</strong>\n"]
+        for order in page.items:
+            lines.append(
+                f"📦 Заказ №{order.id} · {order.created.strftime('%d.%m %H:%M')} · "
+                f"{order.total_price} £\n"
+                f"👤 {order.user.first_name or ''} {order.user.last_name or ''}, "
+                f"📞 {order.user.phone or 'телефон не указан'}\n"
+                f"📍 {order.delivery_address}\n"
+            )
+        return "\n".join(lines), reply_markup, cursor, backwards, order_ids
+
+    async def send(self, session: AsyncSession, bot: Bot, chat_id: int) -> None:
+        """Отправляет новое сообщение ленты (старое больше не обновляется)."""
+        text, reply_markup, cursor, backwards, order_ids = await self.render(session)
+        message = await bot.send_message(chat_id, text, reply_markup=reply_markup)
+        self._messages[chat_id] = FeedMessage(
+            message.message_id, cursor, backwards, order_ids
+        )
+
+    async def show(
+        self,
+        session: AsyncSession,
+        bot: Bot,
+        chat_id: int,
+        message_id: int,
+        cursor: int = 0,
+        backwards: bool = False,
+    ) -> None:
+        """Перерисовывает сообщение ленты на указанной странице."""
+        text, reply_markup, cursor, backwards, order_ids = await self.render(
+            session, cursor, backwards
+        )
+        self._messages[chat_id] = FeedMessage(message_id, cursor, backwards, order_ids)
+        try:
+            await bot.edit_message_text(
+                text, chat_id=chat_id, message_id=message_id, reply_markup=reply_markup
+            )
+        except TelegramBadRequest as e:
+            # "message is not modified" - лента не изменилась
+            logging.debug(f"Лента доставщика {chat_id} не обновлена: {e}")
+
+    async def order_taken(self, order_id: int) -> None:
+        """Убирает принятый заказ из всех лент, где он сейчас виден."""
+        await event_bus.publish("order_taken", order_id)
+
+    async def _refresh(self, order_id: int) -> None:
+        chat_ids = [
+            chat_id
+            for chat_id, feed in self._messages.items()
+            if order_id in feed.order_ids
+        ]
+        if not chat_ids:
+            return
+        async with self.session_maker() as session:
+            for chat_id in chat_ids:
+                feed = self._messages[chat_id]
+                try:
+                    await self.show(
+                        session,
+                        self.bot,
+                        chat_id,
+                        feed.message_id,
+                        feed.cursor,
+                        feed.backwards,
+                    )
+                except Exception as e:
+                    logging.error(f"Не удалось обновить ленту доставщика {chat_id}: {e}")
+                    self._messages.pop(chat_id, None)
+
+
+delivery_feed = DeliveryFeed()
@@ -0,0 +1,241 @@
+import asyncio
+import copy
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from config import (
+    FSM_CACHE_SIZE,
+    FSM_CLEANUP_INTERVAL,
+    FSM_FLUSH_DELAY,
+    FSM_FLUSH_RETRY_MAX,
+    FSM_STATE_TTL,
+)
+from database.orm_query import (
+    orm_delete_expired_fsm_records,
+    orm_get_fsm_record,
+    orm_save_fsm_records,
+)
+from utils.json_utils import prepare_for_json
+
+
+@dataclass
+class _Record:
+    state: Optional[str] = None
+    data: Dict[str, Any] = field(default_factory=dict)
+    updated: float = field(default_factory=time.time)
+
+    @property
+    def is_empty(self) -> bool:
+        return self.state is None and not self.data
+
+
+class SqlStorage(BaseStorage):
+    """
+    FSM-хранилище в таблице fsm_records (через общий engine).
+
+    Состояние и данные одного ключа хранятся в одной строке. Изменения
+    сначала попадают в кэш, а в БД уходят пачкой раз в flush_delay секунд:
+    set_state + update_data одного апдейта - одна строка в одном upsert.
+    Сценарии, брошенные дольше ttl секунд, удаляются фоновой очисткой.
+
+    Кэш рассчитан на то, что апдейты одного пользователя обрабатывает
+    один процесс (см. шардирование по from_user.id).
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker,
+        ttl: int = FSM_STATE_TTL,
+        flush_delay: float = FSM_FLUSH_DELAY,
+        cleanup_interval: int = FSM_CLEANUP_INTERVAL,
+        cache_size: int = FSM_CACHE_SIZE,
+        flush_retry_max: float = FSM_FLUSH_RETRY_MAX,
+    ):
+        self.session_maker = session_maker
+        self.ttl = ttl
+        self.flush_delay = flush_delay
+        self.flush_retry_max = flush_retry_max
+        self.cleanup_interval = cleanup_interval
+        self.cache_size = cache_size
+        self.key_builder = DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+        self._cache: OrderedDict[str, _Record] = OrderedDict()
+        self._pending: dict[str, _Record] = {}
+        self._write_lock = asyncio.Lock()
+        self._flush_task: asyncio.Task | None = None
+        self._cleanup_task: asyncio.Task | None = None
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        record = await self._load(self.key_builder.build(key))
+        record.state = state.state if isinstance(state, State) else state
+        self._mark_dirty(self.key_builder.build(key), record)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        record = await self._load(self.key_builder.build(key))
+        return record.state
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        record = await self._load(self.key_builder.build(key))
+        record.data = copy.deepcopy(data)
+        self._mark_dirty(self.key_builder.build(key), record)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        record = await self._load(self.key_builder.build(key))
+        return copy.deepcopy(record.data)
+
+    async def close(self) -> None:
+        if self._cleanup_task:
+            self._cleanup_task.cancel()
+            await asyncio.gather(self._cleanup_task, return_exceptions=True)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """
+        Записывает накопленные изменения в БД.
+
+        Запись, данные которой не сериализуются в JSON, пропускается с ошибкой
+        в логе - иначе она валила бы каждую следующую пачку. Если пачка не
+        записалась, записи сохраняются по одной: не записавшиеся отбрасываются,
+        а если не записалась ни одна (БД недоступна) - все возвращаются в очередь.
+        """
+        async with self._write_lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            records = []
+            deleted_keys = []
+            for key, record in pending.items():
+                if record.is_empty:
+                    deleted_keys.append(key)
+                    continue
+                try:
+                    data = prepare_for_json(record.data)
+                    json.dumps(data)
+                except (TypeError, ValueError) as e:
+                    logging.error(f"Состояние FSM {key} не сохраняется в JSON: {e}")
+                    continue
+                records.append(
+                    {
+                        "key": key,
+                        "state": record.state,
+                        "data": data,
+                        "updated": datetime.fromtimestamp(record.updated),
+                    }
+                )
+            try:
+                await self._save(records, deleted_keys)
+            except Exception as e:
+                logging.warning(f"Пачка состояний FSM не записалась ({e}), пишем по одной")
+                await self._save_one_by_one(pending, records, deleted_keys)
+
+    async def _save(self, records: list[dict], deleted_keys: list[str]) -> None:
+        async with self.session_maker() as session:
+            await orm_save_fsm_records(session, records, deleted_keys)
+
+    async def _save_one_by_one(
+        self, pending: dict[str, _Record], records: list[dict], deleted_keys: list[str]
+    ) -> None:
+        batches = [([record], []) for record in records]
+        if deleted_keys:
+            batches.append(([], deleted_keys))
+        failed = []
+        for batch_records, batch_keys in batches:
+            try:
+                await self._save(batch_records, batch_keys)
+            except Exception as e:
+                keys = [record["key"] for record in batch_records] + batch_keys
+                failed.append((keys, e))
+        if not failed:
+            return
+        if len(failed) == len(batches):
+            # Не записалось ничего - скорее всего, недоступна БД. Не теряем
+            # изменения: более новые записи имеют приоритет
+            for keys, _ in failed:
+                for key in keys:
+                    self._pending.setdefault(key, pending[key])
+            raise failed[-1][1]
+        for keys, error in failed:
+            for key in keys:
+                logging.error(f"Состояние FSM {key} не записано и отброшено: {error}")
+
+    async def cleanup(self) -> int:
+        """Удаляет сценарии, не менявшиеся дольше ttl."""
+        now = time.time()
+        for key, record in list(self._cache.items()):
+            if now - record.updated > self.ttl and key not in self._pending:
+                del self._cache[key]
+        async with self.session_maker() as session:
+            deleted = await orm_delete_expired_fsm_records(
+                session, datetime.now() - timedelta(seconds=self.ttl)
+            )
+        if deleted:
+            logging.info(f"Удалено брошенных состояний FSM: {deleted}")
+        return deleted
+
+    async def _load(self, key: str) -> _Record:
+        record = self._pending.get(key) or self._cache.get(key)
+        if record is not None and time.time() - record.updated > self.ttl:
+            record.state, record.data = None, {}
+        if record is None:
+            async with self.session_maker() as session:
+                row = await orm_get_fsm_record(session, key)
+            record = _Record()
+            if row is not None and (datetime.now() - row.updated).total_seconds() <= self.ttl:
+                record = _Record(row.state, row.data, row.updated.timestamp())
+        self._cache.pop(key, None)
+        self._cache[key] = record
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return record
+
+    def _mark_dirty(self, key: str, record: _Record) -> None:
+        record.updated = time.time()
+        self._pending[key] = record
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._delayed_flush())
+        if self._cleanup_task is None:
+            self._cleanup_task = asyncio.create_task(self._cleanup_loop())
+
+    async def _delayed_flush(self) -> None:
+        """
+        Пишет очередь, пока она не опустеет. Если БД недоступна, записи остаются
+        в очереди и запись повторяется с растущей паузой (до flush_retry_max) -
+        не дожидаясь, пока пользователь снова что-то изменит.
+        """
+        delay = self.flush_delay
+        while self._pending:
+            await asyncio.sleep(delay)
+            try:
+                await self.flush()
+                delay = self.flush_delay
+            except Exception as e:
+                delay = min(max(delay * 2, 1), self.flush_retry_max)
+                logging.error(f"Ошибка записи состояний FSM: {e}. Повтор через {delay:g} с")
+
+    async def _cleanup_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.cleanup_interval)
+            try:
+                await self.cleanup()
+            except Exception as e:
+                logging.error(f"Ошибка очистки состояний FSM: {e}")
+
+
+def create_fsm_storage(session_maker: async_sessionmaker) -> BaseStorage:
+    """
+    FSM_STORAGE=memory - хранилище aiogram в памяти (для тестов и локального запуска),
+    иначе - SqlStorage в основной БД.
+    """
+    if os.getenv("FSM_STORAGE", "sql") == "memory":
+        return MemoryStorage()
+    return SqlStorage(session_maker)
@@ -1,217 +1,175 @@
-import json
-import hashlib
+import asyncio
 import logging
-import random
-from sqlalchemy.ext.asyncio import AsyncSession
-from database.orm_query import orm_check_product_available, orm_get_products
-from utils.json_utils import decimal_default, prepare_for_json
-from config import ADMIN_FILE
-
-
-def save_admins(admins_list):
-    try:
-        with open(ADMIN_FILE, "r", encoding="utf-8") as file:
-            existing_admins = json.load(file)
-    except (FileNotFoundError, json.JSONDecodeError):
-        existing_admins = []
-
+import os
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from database.orm_query import (
+    orm_add_admins,
+    orm_add_goods,
+    orm_add_group_chats,
+    orm_delete_sharing_data,
+    orm_get_admins,
+    orm_get_group_chats,
+    orm_get_products,
+    orm_get_sharing_data,
+    orm_pop_random_good,
+    orm_save_sharing_data,
+)
+from utils.json_storage import get_json_file
+from utils.json_utils import prepare_for_json
+from utils.sharding import event_bus
+from config import (
+    ADDED_GOODS_FILE,
+    ADMIN_FILE,
+    GROUPS_FILE,
+    SHARING_DATA_FILE,
+)
+
+# Админы, чаты рассылки, очередь товаров и данные оформления заказа хранятся в БД,
+# чтобы все воркеры (BOT_WORKERS > 1) видели одни и те же данные.
+# Из прежних JSON-файлов они переносятся один раз при запуске (import_legacy_json).
+
+
+async def save_admins(session: AsyncSession, admins_list):
+    """
+    Добавляет админов. Если список изменился, все воркеры перечитывают его
+    (событие admins_changed).
+    """
     if isinstance(admins_list, int):
         admins_list = [admins_list]
-    for admin_id in admins_list:
-        if admin_id not in existing_admins:
-            existing_admins.append(admin_id)
+    if await orm_add_admins(session, admins_list):
+        await event_bus.publish("admins_changed")
 
-    with open(ADMIN_FILE, "w", encoding="utf-8") as file:
-        json.dump(existing_admins, file, ensure_ascii=False, indent=4)
 
+async def load_admins(session: AsyncSession) -> list:
+    return await orm_get_admins(session)
 
-def save_added_goods(added_good):
-    try:
-        with open("added_goods.json", "r", encoding="utf-8") as file:
-            existing_goods = json.load(file)
-    except FileNotFoundError:
-        existing_goods = []
-    existing_goods.append(added_good)
 
-    with open("added_goods.json", "w", encoding="utf-8") as file:
-        json.dump(existing_goods, file, ensure_ascii=False, indent=4)
+async def load_group_chats(session: AsyncSession) -> list:
+    return await orm_get_group_chats(session)
 
 
-async def get_and_remove_random_item(session: AsyncSession):
+async def add_group_chat(session: AsyncSession, chat_id: int) -> bool:
     """
-    Получает случайный товар из файла или БД, удаляет его из списка и возвращает.
-    Если файл пуст, загружает все товары из базы данных.
+    Добавляет чат в список рассылки. Возвращает False, если чат уже есть.
     """
-    # Загружаем данные из файла
-    goods = []
-    try:
-        with open("added_goods.json", "r", encoding="utf-8") as file:
-            goods = json.load(file)
-        logging.debug(f"Загружено {len(goods)} товаров из файла")
-    except FileNotFoundError:
-        logging.info("Файл added_goods.json не найден, будет создан новый")
-    except json.JSONDecodeError as e:
-        logging.error(f"Ошибка чтения JSON: {e}. Файл будет пересоздан")
-    except Exception as e:
-        logging.error(f"Неожиданная ошибка при чтении файла: {e}")
-
-    # Если товаров нет, загружаем из БД
-    if not goods:
-        try:
-            products = await orm_get_products(session)
-            if not products:
-                logging.error("В базе данных нет товаров")
-                return None
-
-            goods = []
-            for product in products:
-                try:
-                    is_available = await orm_check_product_available(
-                        session, product.id
-                    )
-                    if not is_available or product.name.startswith("Зона доставки"):
-                        logging.info(f"Товар {product.name} недоступен")
-                        continue
-                    item_data = {
-                        "id": product.id,
-                        "name": product.name,
-                        "description": product.description,
-                        "category": product.category.id if product.category else None,
-                        "seller": product.seller.id if product.seller else None,
-                        "purchase_price": product.purchase_price,
-                        "price": product.price,
-                        "image": product.image,
-                    }
-                    goods.append(prepare_for_json(item_data))
-                except Exception as e:
-                    logging.error(
-                        f"Ошибка обработки товара {getattr(product, 'name', 'UNKNOWN')}: {e}"
-                    )
-
-            # Сохраняем в файл
-            try:
-                with open("added_goods.json", "w", encoding="utf-8") as file:
-                    json.dump(
-                        goods,
-                        file,
-                        ensure_ascii=False,
-                        indent=4,
-                        default=decimal_default,
-                    )
-                logging.info(f"Сохранено {len(goods)} товаров в файл")
-            except Exception as e:
-                logging.error(f"Ошибка сохранения товаров в файл: {e}")
-                # Продолжаем работу без сохранения в файл
+    return bool(await orm_add_group_chats(session, [chat_id]))
 
-        except Exception as e:
-            logging.error(f"Ошибка загрузки товаров из БД: {e}")
-            return None
 
-    # Проверяем наличие товаров
-    if not goods:
-        logging.error("Нет доступных товаров для отправки")
-        return None
+async def save_added_goods(session: AsyncSession, added_good):
+    await orm_add_goods(session, [prepare_for_json(added_good)])
 
-    # Выбираем и удаляем случайный товар
-    try:
-        random_item = random.choice(goods)
+
+async def get_and_remove_random_item(session: AsyncSession):
+    """
+    Получает случайный товар из очереди рассылки, удаляет его из очереди и возвращает.
+    Если очередь пуста, заполняет её всеми доступными товарами из БД.
+    """
+    random_item = await orm_pop_random_good(session)
+    if random_item is not None:
         logging.debug(f"Выбран товар: {random_item['name']}")
+        return random_item
 
-        # Удаляем товар из списка
-        goods.remove(random_item)
+    # Очередь пуста - загружаем товары из БД
+    try:
+        products = await orm_get_products(session)
+        if not products:
+            logging.error("В базе данных нет товаров")
+            return None
 
-        # Обновляем файл
-        try:
-            with open("added_goods.json", "w", encoding="utf-8") as file:
-                json.dump(
-                    goods, file, ensure_ascii=False, indent=4, default=decimal_default
+        goods = []
+        for product in products:
+            try:
+                # Доступность уже загружена вместе с товаром - без запроса на каждый
+                if not product.is_available or product.name.startswith("Зона доставки"):
+                    logging.info(f"Товар {product.name} недоступен")
+                    continue
+                item_data = {
+                    "id": product.id,
+                    "name": product.name,
+                    "description": product.description,
+                    "category": product.category.id if product.category else None,
+                    "seller": product.seller.id if product.seller else None,
+                    "purchase_price": product.purchase_price,
+                    "price": product.price,
+                    "image": product.image,
+                }
+                goods.append(prepare_for_json(item_data))
+            except Exception as e:
+                logging.error(
+                    f"Ошибка обработки товара {getattr(product, 'name', 'UNKNOWN')}: {e}"
                 )
-        except Exception as e:
-            logging.error(f"Ошибка обновления файла товаров: {e}")
-            # Продолжаем работу без сохранения изменений
 
-        return random_item
+        await orm_add_goods(session, goods)
+        logging.info(f"В очередь рассылки добавлено {len(goods)} товаров")
 
     except Exception as e:
-        logging.error(f"Ошибка при обработке случайного товара: {e}")
+        logging.error(f"Ошибка загрузки товаров из БД: {e}")
         return None
 
-
-CALLBACK_FILE = "button_callbacks.json"
+    random_item = await orm_pop_random_good(session)
+    if random_item is None:
+        logging.error("Нет доступных товаров для отправки")
+        return None
+    logging.debug(f"Выбран товар: {random_item['name']}")
+    return random_item
 
 
-def generate_callback_data(item, chat_id) -> str:
+async def save_sharing_data(session: AsyncSession, user_id: int, sharing_data: dict):
     """
-    Генерирует уникальный хэш для товара с учетом группы и изображения.
+    Сохраняет данные оформления заказа пользователя для использования в других частях кода.
     """
-    unique_string = f"{item['name']}_{item['price']}_{item['description']}_{chat_id}_{item['image']}"
-    return hashlib.md5(unique_string.encode()).hexdigest()
+    await orm_save_sharing_data(session, user_id, sharing_data)
+    logging.info(f"Данные оформления заказа сохранены для user_id {user_id}")
 
 
-def save_callback_data(callback_data, item, chat_id):
+async def load_sharing_data(session: AsyncSession, user_id) -> dict:
     """
-    Сохраняет соответствие хэша и данных товара в файл.
+    Возвращает данные оформления заказа пользователя (пустой словарь, если их нет).
     """
-    CALLBACK_FILE = "button_callbacks.json"
-    try:
-        with open(CALLBACK_FILE, "r", encoding="utf-8") as file:
-            callbacks = json.load(file)
-    except (FileNotFoundError, json.JSONDecodeError):
-        callbacks = {}
+    return await orm_get_sharing_data(session, int(user_id))
 
-    # Сохраняем хэш и данные товара
-    callbacks[callback_data] = {"item": item, "chat_id": chat_id}
 
-    with open(CALLBACK_FILE, "w", encoding="utf-8") as file:
-        json.dump(callbacks, file, ensure_ascii=False, indent=4)
-
-SHARING_DATA_FILE = "sharing_data.json"
-
-def save_sharing_data(sharing_data):
+async def delete_sharing_data(session: AsyncSession, user_id):
     """
-    Добавляет данные в файл sharing_data.json для использования в других частях кода.
+    Удаляет данные оформления заказа пользователя.
     """
-    try:
-        with open(SHARING_DATA_FILE, "r", encoding="utf-8") as file:
-            existing_data = json.load(file)
-    except (FileNotFoundError, json.JSONDecodeError):
-        existing_data = {}
-
-    # Обновляем существующие данные новыми
-    existing_data.update(sharing_data)
-
-    # Сохраняем обновлённый словарь в файл
-    with open(SHARING_DATA_FILE, "w", encoding="utf-8") as file:
-        json.dump(existing_data, file, ensure_ascii=False, indent=4)
-    logging.info("Данные для шеринга сохранены в файл sharing_data.json")
+    if await orm_delete_sharing_data(session, int(user_id)):
+        logging.info(f"Данные для user_id {user_id} удалены")
+    else:
+        logging.warning(f"Нет данных для user_id {user_id}")
 
 
-def load_sharing_data(user_id) -> dict:
+async def import_legacy_json(session_maker: async_sessionmaker) -> None:
     """
-    Возвращает значение dict_key для конкретного user_id из sharing_data.json.
+    Переносит в БД данные из JSON-файлов прежних версий бота
+    (admins.json, groups.json, added_goods.json, sharing_data.json).
+    Перенесённый файл переименовывается в *.imported, так что перенос однократный.
+    Файлы читаются и переименовываются в пуле потоков, не блокируя event loop.
+    Вызывать в одном процессе до запуска воркеров.
     """
-    with open(SHARING_DATA_FILE, "r", encoding="utf-8") as file:
-        data = json.load(file)
-    user_data = data.get(str(user_id), {})
-    return user_data
-
-def delete_sharing_data(user_id):
-    """
-    Удаляет данные для конкретного user_id из sharing_data.json.
-    """
-    try:
-        with open(SHARING_DATA_FILE, "r", encoding="utf-8") as file:
-            data = json.load(file)
-        if str(user_id) in data:
-            del data[str(user_id)]
-            with open(SHARING_DATA_FILE, "w", encoding="utf-8") as file:
-                json.dump(data, file, ensure_ascii=False, indent=4)
-            logging.info(f"Данные для user_id {user_id} удалены из sharing_data.json")
-        else:
-            logging.warning(f"Нет данных для user_id {user_id} в sharing_data.json")
-    except FileNotFoundError:
-        logging.error("Файл sharing_data.json не найден")
-    except json.JSONDecodeError:
-        logging.error("Ошибка чтения JSON: файл может быть повреждён")
-    except Exception as e:
-        logging.error(f"Неожиданная ошибка: {e}")
\ No newline at end of file
+    async with session_maker() as session:
+
+        async def import_sharing_data(data: dict):
+            for user_id, user_data in data.items():
+                await orm_save_sharing_data(session, int(user_id), user_data)
+
+        importers = {
+            ADMIN_FILE: lambda data: orm_add_admins(session, [int(i) for i in data]),
+            GROUPS_FILE: lambda data: orm_add_group_chats(session, [int(i) for i in data]),
+            ADDED_GOODS_FILE: lambda data: orm_add_goods(session, data),
+            SHARING_DATA_FILE: import_sharing_data,
+        }
+        for path, import_data in importers.items():
+            path = Path(path)
+            # Нет файла или он повреждён - None, такой файл пропускается
+            data = await get_json_file(path, default_factory=lambda: None).read()
+            if data is None:
+                continue
+            await import_data(data)
+            await asyncio.to_thread(
+                os.replace, path, path.with_name(path.name + ".imported")
+            )
+            logging.info(f"Данные из {path} перенесены в БД")
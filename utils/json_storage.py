@@ -0,0 +1,151 @@
+import asyncio
+import copy
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Callable
+
+from utils.json_utils import decimal_default
+
+
+# Задержка перед записью: все изменения, пришедшие за это время, попадут в один write
+FLUSH_DELAY = 0.2
+
+
+def _read_file(path: Path, default_factory: Callable[[], Any]) -> Any:
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return default_factory()
+    except json.JSONDecodeError as e:
+        logging.error(f"Ошибка чтения JSON {path}: {e}. Используется значение по умолчанию")
+        return default_factory()
+
+
+def _write_file_atomic(path: Path, payload: str) -> None:
+    """
+    Атомарная запись: пишем во временный файл в той же папке,
+    делаем fsync и переименовываем поверх старого файла.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=f".{path.name}.", suffix=".tmp", dir=path.parent
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            file.write(payload)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+class JsonFile:
+    """
+    JSON-файл с кэшем в памяти.
+
+    Чтение и запись выполняются в пуле потоков, чтобы не блокировать event loop.
+    Изменения применяются к кэшу под замком (один писатель на файл),
+    а на диск попадают отложенно: пачка изменений за FLUSH_DELAY - одна запись.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        default_factory: Callable[[], Any] = dict,
+        flush_delay: float = FLUSH_DELAY,
+    ):
+        self.path = Path(path)
+        self.default_factory = default_factory
+        self.flush_delay = flush_delay
+        self._data: Any = None
+        self._loaded = False
+        self._dirty = False
+        self._lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+        self._flush_task: asyncio.Task | None = None
+
+    async def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self._data = await asyncio.to_thread(
+                _read_file, self.path, self.default_factory
+            )
+            self._loaded = True
+
+    async def read(self) -> Any:
+        """Возвращает копию содержимого файла."""
+        async with self._lock:
+            await self._ensure_loaded()
+            return copy.deepcopy(self._data)
+
+    async def update(self, mutator: Callable[[Any], Any]) -> Any:
+        """
+        Применяет mutator к данным файла и планирует запись на диск.
+
+        mutator получает текущие данные и изменяет их на месте.
+        Возвращает результат mutator.
+        """
+        async with self._lock:
+            await self._ensure_loaded()
+            result = mutator(self._data)
+            self._mark_dirty()
+            return result
+
+    async def replace(self, data: Any) -> None:
+        """Полностью заменяет содержимое файла."""
+        async with self._lock:
+            self._data = data
+            self._loaded = True
+            self._mark_dirty()
+
+    def _mark_dirty(self) -> None:
+        self._dirty = True
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._delayed_flush())
+
+    async def _delayed_flush(self) -> None:
+        await asyncio.sleep(self.flush_delay)
+        try:
+            await self.flush()
+        except Exception as e:
+            logging.error(f"Ошибка записи файла {self.path}: {e}")
+
+    async def flush(self) -> None:
+        """Записывает накопленные изменения на диск (если они есть)."""
+        async with self._write_lock:
+            async with self._lock:
+                if not self._dirty:
+                    return
+                payload = json.dumps(
+                    self._data, ensure_ascii=False, indent=4, default=decimal_default
+                )
+                self._dirty = False
+            await asyncio.to_thread(_write_file_atomic, self.path, payload)
+
+
+_files: dict[Path, JsonFile] = {}
+
+
+def get_json_file(path: str | Path, default_factory: Callable[[], Any] = dict) -> JsonFile:
+    """
+    Возвращает общий объект JsonFile для пути, чтобы все писатели
+    одного файла сериализовались через один замок.
+    """
+    key = Path(path).resolve()
+    if key not in _files:
+        _files[key] = JsonFile(key, default_factory)
+    return _files[key]
+
+
+async def flush_all() -> None:
+    """Сбрасывает на диск все отложенные изменения (вызывать при остановке бота)."""
+    for json_file in list(_files.values()):
+        await json_file.flush()
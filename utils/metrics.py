@@ -0,0 +1,261 @@
+import bisect
+import functools
+import inspect
+import logging
+import time
+from typing import Any, Callable, Iterable, Mapping
+
+# Границы корзин гистограмм задержки, секунд
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels: Any, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: Any, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: Any) -> None:
+        self._values[labels] = value
+
+
+class Histogram(Metric):
+    """
+    Гистограмма с фиксированными корзинами. observe() - один bisect
+    и пара сложений, поэтому её можно вызывать на каждом запросе.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Iterable[str] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [счётчики по корзинам (последняя - +Inf), сумма]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels: Any) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def time(self, *labels: Any) -> "_Timer":
+        return _Timer(self, labels)
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        for labels, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                bucket_labels = _labels(self.labelnames, labels, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            label_str = _labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {_number(total)}")
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: tuple):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+class Collected(Metric):
+    """
+    Метрика, значения которой читаются при каждом запросе /metrics
+    (например, из словаря stats middleware или из пула соединений).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        kind: str,
+        label: str,
+        collect: Callable[[], Mapping[str, float]],
+    ):
+        super().__init__(name, help, (label,))
+        self.kind = kind
+        self.collect = collect
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        try:
+            values = self.collect()
+        except Exception as e:
+            logging.error(f"Не удалось собрать метрику {self.name}: {e}")
+            return lines
+        for value_label, value in values.items():
+            lines.append(
+                f"{self.name}{_labels(self.labelnames, (value_label,))} {_number(value)}"
+            )
+        return lines
+
+
+class Registry:
+    """Набор метрик бота и их отдача в текстовом формате Prometheus."""
+
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+        self._runner = None
+
+    def _register(self, metric: Metric) -> Any:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Iterable[str] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def collect(
+        self,
+        name: str,
+        help: str,
+        collect: Callable[[], Mapping[str, float]],
+        kind: str = "gauge",
+        label: str = "type",
+    ) -> None:
+        # Повторная регистрация заменяет источник (например, новый экземпляр middleware)
+        self._metrics[name] = Collected(name, help, kind, label, collect)
+
+    def export_stats(self, name: str, help: str, stats: Mapping[str, float]) -> None:
+        """Отдаёт счётчики из словаря stats (UserThrottling, RenderCache и т.п.)."""
+        self.collect(name, help, lambda: dict(stats), kind="counter", label="event")
+
+    def instrument(self, namespace: dict, prefix: str, name: str, help: str) -> None:
+        """
+        Заменяет async-функции модуля с именем на prefix обёртками,
+        которые пишут время выполнения в гистограмму name с меткой function.
+        Вызывается в конце модуля: instrument(globals(), ...).
+        """
+        histogram = self.histogram(name, help, ("function",))
+        for func_name, func in list(namespace.items()):
+            if func_name.startswith(prefix) and inspect.iscoroutinefunction(func):
+                namespace[func_name] = _timed(func, histogram, func_name)
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    async def serve(self, host: str, port: int) -> None:
+        """Запускает HTTP-сервер с метриками на GET /metrics."""
+        from aiohttp import web
+
+        async def handle(request: web.Request) -> web.Response:
+            return web.Response(text=self.render(), content_type="text/plain")
+
+        app = web.Application()
+        app.router.add_get("/metrics", handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        logging.info(f"Метрики доступны на http://{host}:{port}/metrics")
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+def _timed(func, histogram: Histogram, label: str):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - start, label)
+
+    return wrapper
+
+
+def pool_usage(pool) -> dict[str, int]:
+    """Состояние пула соединений SQLAlchemy (у NullPool/StaticPool его нет)."""
+    usage = {}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            usage[name] = method()
+    return usage
+
+
+metrics = Registry()
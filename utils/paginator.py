@@ -40,4 +40,28 @@ class Paginator:
         if self.page > 1:
             self.page -= 1
             return self.__get_slice()
-        raise IndexError(f'Previous page does not exist. Use has_previous() to check before.')
\ No newline at end of file
+        raise IndexError(f'Previous page does not exist. Use has_previous() to check before.')
+
+# Страница keyset-пагинации: соседние страницы ищутся по ключу первого/последнего элемента
+class KeysetPage:
+    def __init__(self, items: list, has_previous: bool, has_next: bool):
+        self.items = items
+        self._has_previous = has_previous
+        self._has_next = has_next
+
+    def __bool__(self):
+        return bool(self.items)
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_next(self):
+        return self._has_next
+
+    @property
+    def first(self):
+        return self.items[0]
+
+    @property
+    def last(self):
+        return self.items[-1]
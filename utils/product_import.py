@@ -0,0 +1,247 @@
+import csv
+import io
+import json
+import logging
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Awaitable, BinaryIO, Callable, Iterable, Iterator
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import PRODUCT_IMPORT_CHUNK, PRODUCT_IMPORT_MAX_ERRORS
+from database.models import Category, Product, Seller
+from database.orm_query import (
+    orm_get_or_create_categories,
+    orm_get_or_create_sellers,
+    orm_upsert_products,
+)
+
+SUPPORTED_SUFFIXES = (".csv", ".json", ".ndjson", ".jsonl")
+
+TRUE_VALUES = {"1", "true", "yes", "да", "+"}
+FALSE_VALUES = {"0", "false", "no", "нет", "-"}
+
+
+@dataclass
+class ImportReport:
+    inserted: int = 0
+    updated: int = 0
+    failed: int = 0
+    errors: list[str] = field(default_factory=list)  # первые PRODUCT_IMPORT_MAX_ERRORS
+
+    def fail(self, line: int | str, reason) -> None:
+        self.failed += 1
+        if len(self.errors) < PRODUCT_IMPORT_MAX_ERRORS:
+            self.errors.append(f"строка {line}: {reason}")
+
+    @property
+    def text(self) -> str:
+        text = (
+            f"Добавлено: {self.inserted}\n"
+            f"Обновлено: {self.updated}\n"
+            f"С ошибками: {self.failed}"
+        )
+        if self.errors:
+            text += "\n\n" + "\n".join(self.errors)
+            if self.failed > len(self.errors):
+                text += f"\n... и ещё {self.failed - len(self.errors)}"
+        return text
+
+
+def read_rows(file: BinaryIO, filename: str) -> Iterator[tuple[int, dict | None]]:
+    """
+    Строки файла по одной: (номер строки, словарь колонок).
+    CSV (разделитель , ; или табуляция, первая строка - заголовки) и NDJSON
+    читаются потоком, .json (массив объектов) - целиком.
+    Для строки NDJSON, которая не разбирается, вместо словаря - None.
+    """
+    suffix = Path(filename).suffix.lower()
+    if suffix not in SUPPORTED_SUFFIXES:
+        raise ValueError(
+            f"Неподдерживаемый формат файла, нужен один из: {', '.join(SUPPORTED_SUFFIXES)}"
+        )
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+
+    if suffix == ".csv":
+        sample = text.read(4096)
+        text.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        # Строка 1 - заголовки
+        yield from enumerate(csv.DictReader(text, dialect=dialect), start=2)
+    elif suffix == ".json":
+        rows = json.load(text)
+        if not isinstance(rows, list):
+            raise ValueError("JSON-файл должен содержать массив товаров")
+        yield from enumerate(rows, start=1)
+    else:
+        for number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield number, json.loads(line)
+            except ValueError:
+                yield number, None
+
+
+def _text(row: dict, column: str, max_length: int | None, required: bool) -> str | None:
+    value = row.get(column)
+    value = str(value).strip() if value is not None else ""
+    if not value:
+        if required:
+            raise ValueError(f"не заполнено поле {column}")
+        return None
+    if max_length and len(value) > max_length:
+        raise ValueError(f"{column} длиннее {max_length} символов")
+    return value
+
+
+def _price(row: dict, column: str) -> Decimal | None:
+    value = row.get(column)
+    if value is None or str(value).strip() == "":
+        return None
+    try:
+        price = Decimal(str(value).replace(",", ".").strip())
+    except InvalidOperation:
+        raise ValueError(f"{column} - не число: {value}")
+    if not price.is_finite() or price <= 0:
+        raise ValueError(f"{column} должна быть положительным числом")
+    return price.quantize(Decimal("0.01"))
+
+
+def validate_row(raw) -> dict:
+    """
+    Проверяет строку файла и приводит её к полям товара.
+    Колонки: name, category, price, image - обязательные, description -
+    обязательная, но может быть пустой; seller, purchase_price (для нового
+    товара по умолчанию равна price), is_available, stock (остаток, "-" - не
+    вести) - нет.
+    """
+    if not isinstance(raw, dict):
+        raise ValueError("строка не является объектом с полями товара")
+    row = {str(key).strip().lower(): value for key, value in raw.items() if key}
+
+    product = {
+        "name": _text(row, "name", Product.name.type.length, required=True),
+        "category": _text(row, "category", Category.name.type.length, required=True),
+        "image": _text(row, "image", Product.image.type.length, required=True),
+    }
+    price = _price(row, "price")
+    if price is None:
+        raise ValueError("не заполнено поле price")
+    product["price"] = price
+    # Без purchase_price закупочная цена существующего товара не меняется,
+    # новому товару orm_upsert_products подставит розничную
+    purchase_price = _price(row, "purchase_price")
+    if purchase_price is not None:
+        product["purchase_price"] = purchase_price
+
+    if "description" not in row:
+        raise ValueError("нет поля description")
+    product["description"] = _text(row, "description", None, required=False) or ""
+    seller = _text(row, "seller", Seller.name.type.length, required=False)
+    if seller:
+        product["seller"] = seller
+    stock = row.get("stock")
+    if stock is not None and str(stock).strip() != "":
+        if str(stock).strip() == "-":
+            product["stock"] = None
+        else:
+            try:
+                product["stock"] = int(str(stock).strip())
+            except ValueError:
+                raise ValueError(f"stock - не целое число: {stock}")
+            if product["stock"] < 0:
+                raise ValueError("stock не может быть отрицательным")
+    available = row.get("is_available")
+    if available is not None and str(available).strip() != "":
+        if isinstance(available, bool):
+            product["is_available"] = available
+        elif str(available).strip().lower() in TRUE_VALUES:
+            product["is_available"] = True
+        elif str(available).strip().lower() in FALSE_VALUES:
+            product["is_available"] = False
+        else:
+            raise ValueError(f"is_available - непонятное значение: {available}")
+    # Наличие по остатку, если не задано явно (как в /stock)
+    if product.get("stock") is not None and "is_available" not in product:
+        product["is_available"] = product["stock"] > 0
+    return product
+
+
+async def _save_chunk(
+    session: AsyncSession, chunk: dict[str, tuple[int, dict]], report: ImportReport
+) -> None:
+    products = [product for _, product in chunk.values()]
+    try:
+        categories = await orm_get_or_create_categories(
+            session, {product["category"] for product in products}
+        )
+        sellers = await orm_get_or_create_sellers(
+            session, {product["seller"] for product in products if "seller" in product}
+        )
+        rows = []
+        for product in products:
+            row = {
+                key: value
+                for key, value in product.items()
+                if key not in ("category", "seller")
+            }
+            row["category_id"] = categories[product["category"]]
+            if "seller" in product:
+                row["seller_id"] = sellers[product["seller"]]
+            rows.append(row)
+        inserted, updated = await orm_upsert_products(session, rows)
+        await session.commit()
+    except SQLAlchemyError as e:
+        await session.rollback()
+        logging.error(f"Импорт товаров: ошибка сохранения пачки: {e}")
+        for line, _ in chunk.values():
+            report.fail(line, f"ошибка БД: {type(e).__name__}")
+        return
+    report.inserted += inserted
+    report.updated += updated
+
+
+async def import_products(
+    session: AsyncSession,
+    rows: Iterable[tuple[int, dict | None]],
+    chunk_size: int = PRODUCT_IMPORT_CHUNK,
+    progress: Callable[[str, int], Awaitable[None]] | None = None,
+) -> ImportReport:
+    """
+    Массовое добавление и обновление товаров (ключ - название).
+
+    Строки проверяются по одной по мере чтения, корректные копятся в пачку
+    по chunk_size. На пачку: категории и продавцы находятся или создаются
+    двумя-тремя запросами, товары сохраняются через orm_upsert_products,
+    пачка коммитится отдельно - ошибка БД в одной пачке не откатывает остальные.
+    Если название встречается в файле несколько раз, побеждает последняя строка.
+    """
+    report = ImportReport()
+    chunk: dict[str, tuple[int, dict]] = {}
+    for line, raw in rows:
+        try:
+            product = validate_row(raw)
+        except ValueError as e:
+            report.fail(line, e)
+            continue
+        chunk.pop(product["name"], None)
+        chunk[product["name"]] = (line, product)
+        if len(chunk) >= chunk_size:
+            await _save_chunk(session, chunk, report)
+            chunk = {}
+            if progress:
+                processed = report.inserted + report.updated + report.failed
+                await progress("products", processed)
+    if chunk:
+        await _save_chunk(session, chunk, report)
+    logging.info(
+        f"Импорт товаров: добавлено {report.inserted}, обновлено {report.updated}, "
+        f"с ошибками {report.failed}"
+    )
+    return report
@@ -0,0 +1,77 @@
+import time
+from collections import OrderedDict
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL, SEARCH_PAGE_SIZE
+from database.orm_query import orm_search_products
+
+
+class ProductSearch:
+    """
+    Поиск товаров для инлайн-режима с коротким кэшем результатов.
+
+    Пока пользователь набирает запрос, Telegram присылает инлайн-запрос
+    на каждую букву, а популярные префиксы ("мол", "молоко") приходят
+    от многих пользователей. Страницы результатов хранятся в LRU по ключу
+    (нормализованный запрос, offset) не дольше ttl секунд, так что изменения
+    товаров видны в поиске с такой задержкой.
+    """
+
+    def __init__(
+        self,
+        ttl: int = SEARCH_CACHE_TTL,
+        max_size: int = SEARCH_CACHE_SIZE,
+        page_size: int = SEARCH_PAGE_SIZE,
+    ):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.page_size = page_size
+        self.stats = {"hits": 0, "misses": 0}
+        self._pages: OrderedDict[tuple[str, int], tuple[float, list[dict]]] = (
+            OrderedDict()
+        )
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    async def search(self, session: AsyncSession, query: str, offset: int = 0) -> list[dict]:
+        """
+        Страница результатов: словари с полями товара, нужными для ответа.
+        Если результатов page_size, возможно есть следующая страница.
+        """
+        key = (self.normalize(query), offset)
+        cached = self._pages.get(key)
+        if cached is not None and time.monotonic() - cached[0] < self.ttl:
+            self._pages.move_to_end(key)
+            self.stats["hits"] += 1
+            return cached[1]
+
+        self.stats["misses"] += 1
+        products = await orm_search_products(
+            session, key[0], offset=offset, limit=self.page_size
+        )
+        # Снимок полей, а не ORM-объекты: они переживут закрытие сессии
+        page = [
+            {
+                "id": product.id,
+                "name": product.name,
+                "description": product.description,
+                "price": product.price,
+                "image": product.image,
+                "is_available": product.is_available,
+            }
+            for product in products
+        ]
+        self._pages.pop(key, None)
+        self._pages[key] = (time.monotonic(), page)
+        while len(self._pages) > self.max_size:
+            self._pages.popitem(last=False)
+        return page
+
+    def clear(self) -> None:
+        self._pages.clear()
+
+
+product_search = ProductSearch()
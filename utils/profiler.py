@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from config import PROFILER_INTERVAL
+
+
+@dataclass
+class ProfileResult:
+    stacks: Counter
+    samples: int
+    duration: float
+    updates: int
+
+    def collapsed(self) -> str:
+        """Стеки в формате collapsed (flamegraph.pl, speedscope, inferno)."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self, top: int = 30) -> str:
+        """Топ функций по собственному (self) и полному (total) времени."""
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for frame in set(frames):
+                total[frame] += count
+
+        samples = self.samples or 1
+        lines = [
+            f"Длительность: {self.duration:.1f} с, выборок: {self.samples}, "
+            f"апдейтов: {self.updates}",
+            "",
+            "   self   total  функция",
+        ]
+        for frame, count in own.most_common(top):
+            lines.append(
+                f"{count / samples:6.1%} {total[frame] / samples:6.1%}  {frame}"
+            )
+        lines += ["", "Топ по полному времени:", "  total  функция"]
+        for frame, count in total.most_common(top):
+            lines.append(f"{count / samples:6.1%}  {frame}")
+        return "\n".join(lines) + "\n"
+
+
+class SamplingProfiler:
+    """
+    Семплирующий профилировщик потока event loop.
+
+    Отдельный поток раз в interval секунд снимает стек потока бота
+    (sys._current_frames) и считает одинаковые стеки. Код бота при этом
+    не трассируется, так что его можно включать в работающем боте.
+    В режиме воркеров профилируется только тот воркер, который принял команду.
+    """
+
+    def __init__(self, interval: float = PROFILER_INTERVAL):
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+        self._done = asyncio.Event()
+        self._updates = 0
+        self._updates_limit: int | None = None
+
+    @property
+    def active(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(
+        self,
+        seconds: float,
+        updates: int | None,
+        report: Callable[[ProfileResult], Awaitable[None]],
+    ) -> None:
+        """
+        Профилирует seconds секунд или до updates обработанных апдейтов
+        (что наступит раньше) и передаёт результат в report.
+        """
+        if self.active:
+            raise RuntimeError("Профилирование уже запущено")
+        self._task = asyncio.create_task(self._run(seconds, updates, report))
+
+    def update_done(self) -> None:
+        """Отмечает обработанный апдейт (вызывается из UpdateMetrics)."""
+        if not self.active:
+            return
+        self._updates += 1
+        if self._updates_limit is not None and self._updates >= self._updates_limit:
+            self._done.set()
+
+    async def _run(self, seconds, updates, report) -> None:
+        self._done = asyncio.Event()
+        self._updates, self._updates_limit = 0, updates
+        stacks: Counter = Counter()
+        stop = threading.Event()
+        sampler = threading.Thread(
+            target=self._sample,
+            args=(threading.get_ident(), stacks, stop),
+            name="sampling-profiler",
+            daemon=True,
+        )
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await asyncio.wait_for(self._done.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            stop.set()
+            await asyncio.to_thread(sampler.join)
+
+        result = ProfileResult(
+            stacks, sum(stacks.values()), time.perf_counter() - started, self._updates
+        )
+        try:
+            await report(result)
+        except Exception as e:
+            logging.error(f"Не удалось отправить результат профилирования: {e}")
+
+    def _sample(self, thread_id: int, stacks: Counter, stop: threading.Event) -> None:
+        labels: dict = {}
+        while not stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                label = labels.get(code)
+                if label is None:
+                    label = labels[code] = (
+                        f"{code.co_name} ({os.path.basename(code.co_filename)}:"
+                        f"{code.co_firstlineno})"
+                    )
+                frames.append(label)
+                frame = frame.f_back
+            if frames:
+                stacks[";".join(reversed(frames))] += 1
+
+
+sampling_profiler = SamplingProfiler()
@@ -0,0 +1,99 @@
+import hashlib
+import logging
+from collections import OrderedDict
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import InlineKeyboardMarkup, InputMediaPhoto, Message
+
+from config import RENDER_CACHE_MAX_SIZE
+
+
+def _fingerprint(value: str | None) -> str:
+    return hashlib.blake2b((value or "").encode("utf-8"), digest_size=8).hexdigest()
+
+
+def render_fingerprint(
+    media: InputMediaPhoto, reply_markup: InlineKeyboardMarkup | None
+) -> tuple[str, str, str]:
+    """Отпечатки картинки, подписи и клавиатуры сообщения."""
+    markup = reply_markup.model_dump_json(exclude_none=True) if reply_markup else None
+    return (
+        _fingerprint(f"{media.type}:{media.media}"),
+        _fingerprint(media.caption),
+        _fingerprint(markup),
+    )
+
+
+class RenderCache:
+    """
+    Помнит, что сейчас показано в сообщениях меню, по ключу (chat_id, message_id).
+
+    edit() сравнивает новое содержимое с показанным и делает минимальный запрос:
+    ничего, edit_reply_markup, edit_caption или edit_media.
+    Работает только если все правки этих сообщений идут через edit().
+    """
+
+    def __init__(self, max_size: int = RENDER_CACHE_MAX_SIZE):
+        self.max_size = max_size
+        self.stats = {"skipped": 0, "markup": 0, "caption": 0, "media": 0}
+        self._rendered: OrderedDict[tuple[int, int], tuple[str, str, str]] = (
+            OrderedDict()
+        )
+
+    def remember(
+        self,
+        message: Message,
+        media: InputMediaPhoto,
+        reply_markup: InlineKeyboardMarkup | None,
+    ) -> None:
+        """Запоминает содержимое только что отправленного сообщения."""
+        self._store(
+            (message.chat.id, message.message_id), render_fingerprint(media, reply_markup)
+        )
+
+    def forget(self, message: Message) -> None:
+        self._rendered.pop((message.chat.id, message.message_id), None)
+
+    async def edit(
+        self,
+        message: Message,
+        media: InputMediaPhoto,
+        reply_markup: InlineKeyboardMarkup | None = None,
+    ) -> None:
+        key = (message.chat.id, message.message_id)
+        new = render_fingerprint(media, reply_markup)
+        old = self._rendered.get(key)
+
+        try:
+            if old == new:
+                self.stats["skipped"] += 1
+            elif old is not None and old[:2] == new[:2]:
+                self.stats["markup"] += 1
+                await message.edit_reply_markup(reply_markup=reply_markup)
+            elif old is not None and old[0] == new[0]:
+                self.stats["caption"] += 1
+                await message.edit_caption(
+                    caption=media.caption,
+                    parse_mode=media.parse_mode,
+                    caption_entities=media.caption_entities,
+                    reply_markup=reply_markup,
+                )
+            else:
+                self.stats["media"] += 1
+                await message.edit_media(media=media, reply_markup=reply_markup)
+        except TelegramBadRequest as e:
+            if "message is not modified" not in str(e):
+                self._rendered.pop(key, None)
+                raise
+            logging.debug(f"Сообщение {key} не изменилось")
+
+        self._store(key, new)
+
+    def _store(self, key: tuple[int, int], fingerprint: tuple[str, str, str]) -> None:
+        self._rendered.pop(key, None)
+        self._rendered[key] = fingerprint
+        while len(self._rendered) > self.max_size:
+            self._rendered.popitem(last=False)
+
+
+render_cache = RenderCache()
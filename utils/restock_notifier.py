@@ -0,0 +1,109 @@
+import asyncio
+import logging
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from config import RESTOCK_PAGE_SIZE
+from database.orm_query import (
+    orm_check_product_available,
+    orm_delete_wait_list_entries,
+    orm_get_product,
+    orm_get_restocked_wait_list_products,
+    orm_get_wait_list_page,
+)
+from kbds.inline import MenuCallBack
+from utils.send_queue import SendQueue, send_queue
+
+
+class RestockNotifier:
+    """
+    Оповещает подписчиков списка ожидания, когда товар снова в наличии.
+
+    Заявки читаются страницами (keyset по wait_list.id), сообщения уходят
+    через общую очередь с ограничением скорости, а доставленные заявки
+    удаляются пачкой после каждой страницы. Если бот упал посреди рассылки,
+    оставшиеся заявки подхватываются при старте через resume().
+    """
+
+    def __init__(self, queue: SendQueue = send_queue, page_size: int = RESTOCK_PAGE_SIZE):
+        self.queue = queue
+        self.page_size = page_size
+        self.session_maker: async_sessionmaker | None = None
+        self._running: dict[int, asyncio.Task] = {}
+
+    def setup(self, session_maker: async_sessionmaker) -> None:
+        self.session_maker = session_maker
+
+    def notify(self, product_id: int) -> None:
+        """Запускает рассылку по товару в фоне (не больше одной на товар)."""
+        task = self._running.get(product_id)
+        if task and not task.done():
+            return
+        self._running[product_id] = asyncio.create_task(self._notify(product_id))
+
+    async def resume(self) -> None:
+        """Возобновляет рассылки, прерванные перезапуском."""
+        async with self.session_maker() as session:
+            product_ids = await orm_get_restocked_wait_list_products(session)
+        for product_id in product_ids:
+            logging.info(f"Возобновляем оповещения о товаре {product_id}")
+            self.notify(product_id)
+
+    async def _notify(self, product_id: int) -> None:
+        try:
+            await self._notify_subscribers(product_id)
+        except Exception as e:
+            logging.error(f"Ошибка оповещения о товаре {product_id}: {e}")
+        finally:
+            self._running.pop(product_id, None)
+
+    async def _notify_subscribers(self, product_id: int) -> None:
+        async with self.session_maker() as session:
+            product = await orm_get_product(session, product_id)
+            if product is None:
+                return
+
+            text = f"🔔 Товар <strong>{product.name}</strong> снова в наличии!"
+            reply_markup = InlineKeyboardMarkup(
+                inline_keyboard=[
+                    [
+                        InlineKeyboardButton(
+                            text="Купить 💵",
+                            callback_data=MenuCallBack(
+                                level=2, menu_name="add_to_cart", product_id=product_id
+                            ).pack(),
+                        )
+                    ]
+                ]
+            )
+
+            after_id = 0
+            sent = 0
+            while True:
+                # Товар могли снова убрать из наличия - оставшиеся заявки ждут следующего раза
+                if not await orm_check_product_available(session, product_id):
+                    break
+
+                page = await orm_get_wait_list_page(
+                    session, product_id, after_id=after_id, limit=self.page_size
+                )
+                if not page:
+                    break
+                after_id = page[-1].id
+
+                futures = [
+                    self.queue.submit(row.user_id, text, reply_markup=reply_markup)
+                    for row in page
+                ]
+                results = await asyncio.gather(*futures)
+                delivered_ids = [
+                    row.id for row, delivered in zip(page, results) if delivered
+                ]
+                await orm_delete_wait_list_entries(session, delivered_ids)
+                sent += len(delivered_ids)
+
+            logging.info(f"Оповещения о товаре {product_id} отправлены: {sent}")
+
+
+restock_notifier = RestockNotifier()
@@ -0,0 +1,242 @@
+import asyncio
+import logging
+import random
+from datetime import datetime, time, timedelta
+from typing import Awaitable, Callable
+
+from aiogram import Bot
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from config import (
+    SCHEDULER_CONCURRENCY,
+    SCHEDULER_MISFIRE_GRACE,
+    SCHEDULER_POLL_INTERVAL,
+)
+from database.models import ScheduledJob
+from database.orm_query import (
+    orm_claim_job,
+    orm_get_due_jobs,
+    orm_get_jobs,
+    orm_get_next_run_time,
+    orm_update_job,
+)
+from utils.sharding import event_bus
+
+
+JobHandler = Callable[[ScheduledJob, async_sessionmaker, Bot], Awaitable[None]]
+
+
+def in_window(moment: time, start: time | None, end: time | None) -> bool:
+    """Проверяет, попадает ли время в окно публикаций (окно может идти через полночь)."""
+    if start is None or end is None:
+        return True
+    if start <= end:
+        return start <= moment <= end
+    return moment >= start or moment <= end
+
+
+def next_window_start(after: datetime, start: time) -> datetime:
+    candidate = datetime.combine(after.date(), start)
+    if candidate <= after:
+        candidate += timedelta(days=1)
+    return candidate
+
+
+def fit_into_window(job: ScheduledJob, moment: datetime) -> datetime:
+    """Переносит момент запуска на начало ближайшего окна, если он вне окна."""
+    if in_window(moment.time(), job.window_start, job.window_end):
+        return moment
+    return next_window_start(moment, job.window_start)
+
+
+def compute_next_run(job: ScheduledJob, after: datetime) -> datetime:
+    """Следующий запуск: интервал задачи ± случайный разброс, с учётом окна."""
+    offset = random.randint(-job.jitter, job.jitter) if job.jitter else 0
+    candidate = after + timedelta(seconds=max(job.interval + offset, 60))
+    return fit_into_window(job, candidate)
+
+
+class Scheduler:
+    """
+    Планировщик периодических задач, хранящихся в таблице scheduled_jobs.
+
+    Время следующего запуска хранится в БД, поэтому после перезапуска
+    планировщик продолжает с того же места. Задачи, пропущенные во время
+    простоя, либо запускаются один раз (misfire_policy="catch_up"),
+    либо переносятся на следующий интервал (misfire_policy="skip").
+    Одновременно выполняется не больше concurrency задач.
+
+    setup() вызывается в каждом процессе, а цикл (start) работает только у лидера.
+    Команды из других воркеров (пересчёт расписания, запуск вне расписания)
+    доходят до цикла через event_bus.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = SCHEDULER_CONCURRENCY,
+        poll_interval: int = SCHEDULER_POLL_INTERVAL,
+        misfire_grace: int = SCHEDULER_MISFIRE_GRACE,
+    ):
+        self.poll_interval = poll_interval
+        self.misfire_grace = misfire_grace
+        self.session_maker: async_sessionmaker | None = None
+        self.bot: Bot | None = None
+        self._handlers: dict[str, JobHandler] = {}
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._running: dict[int, asyncio.Task] = {}
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        self._handlers[kind] = handler
+
+    def is_running(self, job_id: int) -> bool:
+        return job_id in self._running
+
+    def setup(self, session_maker: async_sessionmaker, bot: Bot) -> None:
+        self.session_maker = session_maker
+        self.bot = bot
+        event_bus.subscribe("scheduler_wakeup", self._on_wakeup)
+        event_bus.subscribe("scheduler_run", self._on_run)
+
+    async def start(self) -> None:
+        """Запускает цикл планировщика (только в одном процессе, после setup)."""
+        await self._apply_misfire_policy()
+        self._task = asyncio.create_task(self._loop())
+        logging.info("Планировщик запущен")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        await asyncio.gather(*self._running.values(), return_exceptions=True)
+
+    async def wakeup(self) -> None:
+        """Пересчитать расписание немедленно (например, после изменения задач)."""
+        await event_bus.publish("scheduler_wakeup")
+
+    async def trigger(self, job_id: int) -> None:
+        """
+        Запускает задачу вне расписания в процессе с циклом планировщика.
+        Если задача уже выполняется, повторно она не запускается.
+        """
+        await event_bus.publish("scheduler_run", job_id)
+
+    async def _on_wakeup(self, _=None) -> None:
+        self._wakeup.set()
+
+    async def _on_run(self, job_id: int) -> None:
+        if self._task is None:
+            return  # цикл работает в другом процессе
+        if self.is_running(job_id):
+            logging.info(f"Задача {job_id} уже выполняется, запуск пропущен")
+            return
+        async with self.session_maker() as session:
+            job = await orm_get_jobs(session, job_id=job_id)
+        if job is not None:
+            self._start_job(job)
+
+    async def pause(self, job_id: int) -> None:
+        async with self.session_maker() as session:
+            await orm_update_job(session, job_id, {"is_paused": True})
+        await self.wakeup()
+
+    async def resume(self, job_id: int) -> None:
+        async with self.session_maker() as session:
+            job = await orm_get_jobs(session, job_id=job_id)
+            if job is None:
+                return
+            data = {"is_paused": False}
+            now = datetime.now()
+            if job.next_run < now and job.misfire_policy == "skip":
+                data["next_run"] = compute_next_run(job, now)
+            await orm_update_job(session, job_id, data)
+        await self.wakeup()
+
+    async def _apply_misfire_policy(self) -> None:
+        now = datetime.now()
+        async with self.session_maker() as session:
+            missed_jobs = await orm_get_due_jobs(
+                session, now - timedelta(seconds=self.misfire_grace), limit=None
+            )
+            for job in missed_jobs:
+                if job.misfire_policy == "skip":
+                    next_run = compute_next_run(job, now)
+                    await orm_update_job(session, job.id, {"next_run": next_run})
+                    logging.info(
+                        f"Задача {job.name} пропущена во время простоя, следующий запуск {next_run}"
+                    )
+                # catch_up: задача запустится один раз в ближайшее разрешённое время
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self._run_due_jobs()
+                delay = await self._seconds_until_next()
+            except Exception as e:
+                logging.error(f"Ошибка планировщика: {e}")
+                delay = self.poll_interval
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run_due_jobs(self) -> None:
+        now = datetime.now()
+        async with self.session_maker() as session:
+            for job in await orm_get_due_jobs(session, now):
+                if self.is_running(job.id):
+                    continue
+
+                if not in_window(now.time(), job.window_start, job.window_end):
+                    # Время подошло вне окна публикаций - ждём начала окна
+                    await orm_update_job(
+                        session,
+                        job.id,
+                        {"next_run": next_window_start(now, job.window_start)},
+                    )
+                    continue
+
+                next_run = compute_next_run(job, now)
+                if await orm_claim_job(session, job.id, job.next_run, next_run):
+                    self._start_job(job)
+
+    async def _seconds_until_next(self) -> float:
+        async with self.session_maker() as session:
+            next_run = await orm_get_next_run_time(session)
+        if next_run is None:
+            return self.poll_interval
+        delay = (next_run - datetime.now()).total_seconds()
+        return min(max(delay, 1), self.poll_interval)
+
+    def _start_job(self, job: ScheduledJob) -> None:
+        self._running[job.id] = asyncio.create_task(self._run_job(job))
+
+    async def _run_job(self, job: ScheduledJob) -> None:
+        error = None
+        try:
+            handler = self._handlers.get(job.kind)
+            if handler is None:
+                raise ValueError(f"Нет обработчика для задач типа {job.kind}")
+            async with self._semaphore:
+                logging.info(f"Запуск задачи {job.name}")
+                await handler(job, self.session_maker, self.bot)
+        except Exception as e:
+            error = str(e)
+            logging.error(f"Ошибка задачи {job.name}: {e}")
+        finally:
+            self._running.pop(job.id, None)
+            try:
+                async with self.session_maker() as session:
+                    await orm_update_job(
+                        session,
+                        job.id,
+                        {"last_run": datetime.now(), "last_error": error},
+                    )
+            except Exception as e:
+                logging.error(f"Не удалось сохранить результат задачи {job.name}: {e}")
+
+
+scheduler = Scheduler()
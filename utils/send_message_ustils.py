@@ -1,5 +1,4 @@
 import hashlib
-import json
 import logging
 
 from aiogram import Bot
@@ -9,10 +8,10 @@ from aiogram.utils.deep_linking import create_start_link
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from config import GROUPS_FILE
 from kbds.inline import inline_buttons_kb
 from database.orm_query import orm_get_product_by_name
-from utils.json_operations import save_callback_data
+from utils.callback_registry import callback_registry
+from utils.json_operations import load_group_chats
 
 
 
@@ -30,6 +29,7 @@ async def send_product_message(
     session: AsyncSession,
     bot: Bot,
     product_data: dict,
+    chat_ids: list[int] | None = None,
 ) -> None:
     """
     Формирует и отправляет сообщение о товаре в указанный чат.
@@ -37,12 +37,11 @@ async def send_product_message(
     Args:
         session: Асинхронная сессия SQLAlchemy
         bot: Экземпляр бота AIOGram
-        chat_id: ID чата, куда отправляем сообщение
         product_data: Данные товара (name, description, price, image)
+        chat_ids: ID чатов для отправки (по умолчанию - все чаты рассылки)
     """
 
-    with open(GROUPS_FILE, "r", encoding="utf-8") as file:
-        chats = json.load(file)
+    chats = chat_ids if chat_ids is not None else await load_group_chats(session)
 
 
     # Проверяем обязательные поля
@@ -58,17 +57,18 @@ async def send_product_message(
     )
     product_data["id"] = product_id
 
-    # Формируем callback и сохраняем его
+    # Формируем callback (сохраняется в реестр после рассылки, по нему
+    # start_cmd находит товар, когда пользователь нажимает "Купить")
     callback_data = BuyCallbackData.from_product(
         product_name=product_data["name"],
         product_id=product_id,
-    ).pack()
+    )
 
     
     logging.info(f"ID товара: {product_id}")
 
     # Создаем ссылку для кнопки "Купить"
-    url = await create_start_link(bot, f"add_to_cart_{product_id}")
+    url = await create_start_link(bot, f"buy_{callback_data.product_hash}")
     logging.info(f"Сформированная ссылка: {url}")
 
     # Формируем текст сообщения
@@ -82,9 +82,9 @@ async def send_product_message(
     keyboard = inline_buttons_kb({"Купить": {"url": url}})
 
     # Отправляем сообщение
+    sent_chat_ids = []
     for chat_id in chats:
         try:
-            save_callback_data(callback_data, product_data, chat_id)
             await bot.send_photo(
                 chat_id=chat_id,
                 photo=product_data["image"],
@@ -92,7 +92,18 @@ async def send_product_message(
                 reply_markup=keyboard,
                 parse_mode="HTML",
             )
+            sent_chat_ids.append(chat_id)
             logging.info(f"Отправлено в {chat_id}")
 
         except Exception as e:
-            logging.error(f"Ошибка отправки в {chat_id}: {e}")
\ No newline at end of file
+            logging.error(f"Ошибка отправки в {chat_id}: {e}")
+
+    # Одна запись в реестр на всю рассылку
+    if sent_chat_ids:
+        callback_registry.register(
+            callback_data.product_hash,
+            product_data,
+            sent_chat_ids,
+            product_id=product_id,
+        )
+        await callback_registry.persist(session)
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import time
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramRetryAfter,
+)
+
+from config import TELEGRAM_SEND_RATE, TELEGRAM_SEND_WORKERS
+
+
+class RateLimiter:
+    """
+    Token bucket: не больше rate операций в секунду в среднем,
+    всплеск до burst операций.
+    """
+
+    def __init__(self, rate: float, burst: int | None = None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+    def try_acquire(self) -> bool:
+        """Забирает токен без ожидания. Возвращает False, если токенов нет."""
+        self._refill()
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+
+class SendQueue:
+    """
+    Очередь исходящих сообщений с общим ограничением скорости.
+
+    submit() возвращает future с результатом доставки:
+    True - сообщение доставлено или доставить его невозможно (бот заблокирован),
+    False - временная ошибка, стоит попробовать позже.
+    На TelegramRetryAfter очередь ждёт retry_after и повторяет отправку.
+    """
+
+    def __init__(
+        self,
+        rate: float = TELEGRAM_SEND_RATE,
+        workers: int = TELEGRAM_SEND_WORKERS,
+        max_retries: int = 3,
+    ):
+        self.limiter = RateLimiter(rate)
+        self.workers = workers
+        self.max_retries = max_retries
+        self._queue: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._bot: Bot | None = None
+
+    def start(self, bot: Bot, rate: float | None = None) -> None:
+        """
+        :param rate: Своя скорость для этого процесса (если воркеров несколько,
+                     общий лимит делится между ними).
+        """
+        if self._tasks:
+            return
+        if rate is not None:
+            self.limiter = RateLimiter(rate)
+        self._bot = bot
+        self._queue = asyncio.Queue()
+        self._tasks = [
+            asyncio.create_task(self._worker()) for _ in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, chat_id: int, text: str, **kwargs) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((chat_id, text, kwargs, future))
+        return future
+
+    async def _worker(self) -> None:
+        while True:
+            chat_id, text, kwargs, future = await self._queue.get()
+            try:
+                delivered = await self._send(chat_id, text, kwargs)
+                if not future.done():
+                    future.set_result(delivered)
+            except Exception as e:
+                logging.error(f"Ошибка очереди отправки для {chat_id}: {e}")
+                if not future.done():
+                    future.set_result(False)
+            finally:
+                self._queue.task_done()
+
+    async def _send(self, chat_id: int, text: str, kwargs: dict) -> bool:
+        for _ in range(self.max_retries):
+            await self.limiter.acquire()
+            try:
+                await self._bot.send_message(chat_id, text, **kwargs)
+                return True
+            except TelegramRetryAfter as e:
+                logging.warning(f"Флуд-лимит, ждём {e.retry_after} c")
+                await asyncio.sleep(e.retry_after)
+            except (TelegramForbiddenError, TelegramBadRequest) as e:
+                # Пользователь заблокировал бота или чат недоступен - повтор не поможет
+                logging.info(f"Сообщение для {chat_id} не доставлено: {e}")
+                return True
+        return False
+
+
+send_queue = SendQueue()
@@ -1,9 +1,9 @@
 import decimal
-from datetime import datetime, date
+from datetime import datetime, date, time
 
 
 def custom_serializer(obj):
-    if isinstance(obj, (datetime, date)):
+    if isinstance(obj, (datetime, date, time)):
         return obj.isoformat()
     if isinstance(obj, decimal.Decimal):
         return float(obj)
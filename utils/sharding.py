@@ -0,0 +1,288 @@
+import asyncio
+import logging
+import multiprocessing
+import queue
+import threading
+from collections import defaultdict
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from aiogram import Bot
+
+
+# Поля апдейта, в которых лежит объект с отправителем
+USER_PAYLOAD_KEYS = (
+    "message",
+    "edited_message",
+    "callback_query",
+    "inline_query",
+    "chosen_inline_result",
+    "shipping_query",
+    "pre_checkout_query",
+    "poll_answer",
+    "my_chat_member",
+    "chat_member",
+    "chat_join_request",
+    "message_reaction",
+    "business_message",
+    "edited_business_message",
+)
+
+
+def update_user_id(update: dict) -> int | None:
+    """
+    ID пользователя из "сырого" апдейта (а если пользователя нет - ID чата).
+    """
+    for name in USER_PAYLOAD_KEYS:
+        payload = update.get(name)
+        if not isinstance(payload, dict):
+            continue
+        user = payload.get("from") or payload.get("user")
+        if user:
+            return user["id"]
+        chat = payload.get("chat")
+        if chat:
+            return chat["id"]
+    return None
+
+
+def shard_for(update: dict, workers: int) -> int:
+    """Номер воркера для апдейта: все апдейты одного пользователя идут в один воркер."""
+    user_id = update_user_id(update)
+    key = user_id if user_id is not None else update.get("update_id", 0)
+    return key % workers
+
+
+class KeyedExecutor:
+    """
+    Выполняет задачи конкурентно, но задачи с одним ключом - строго по порядку.
+    Не больше concurrency задач выполняется одновременно
+    и не больше max_pending ждёт в очереди.
+    """
+
+    def __init__(self, concurrency: int, max_pending: int | None = None):
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._pending = asyncio.Semaphore(max_pending or concurrency * 10)
+        self._tails: dict[Any, asyncio.Task] = {}
+
+    async def submit(self, key: Any, job: Callable[[], Awaitable[Any]]) -> None:
+        # Ждём, если очередь переполнена - так воркер не читает апдейты быстрее, чем успевает
+        await self._pending.acquire()
+        previous = self._tails.get(key)
+        task = asyncio.create_task(self._run(previous, job))
+        self._tails[key] = task
+        task.add_done_callback(lambda done: self._forget(key, done))
+
+    def _forget(self, key: Any, task: asyncio.Task) -> None:
+        self._pending.release()
+        if self._tails.get(key) is task:
+            del self._tails[key]
+
+    async def _run(self, previous: asyncio.Task | None, job) -> None:
+        if previous is not None:
+            # Ошибка предыдущей задачи не должна останавливать очередь пользователя
+            await asyncio.wait([previous])
+        async with self._semaphore:
+            try:
+                await job()
+            except Exception as e:
+                logging.error(f"Ошибка обработки апдейта: {e}")
+
+    async def drain(self) -> None:
+        await asyncio.gather(*self._tails.values(), return_exceptions=True)
+
+
+EventHandler = Callable[[Any], Awaitable[None]]
+
+
+class EventBus:
+    """
+    Шина событий между процессами бота.
+
+    В обычном режиме publish() сразу вызывает подписчиков в этом процессе.
+    В режиме нескольких воркеров шина подключается к фронту (connect),
+    и событие доставляется подписчикам во всех воркерах.
+    """
+
+    def __init__(self):
+        self._handlers: dict[str, list[EventHandler]] = defaultdict(list)
+        self._publisher: Callable[[str, Any], None] | None = None
+
+    def subscribe(self, name: str, handler: EventHandler) -> None:
+        self._handlers[name].append(handler)
+
+    def connect(self, publisher: Callable[[str, Any], None]) -> None:
+        self._publisher = publisher
+
+    async def publish(self, name: str, payload: Any = None) -> None:
+        if self._publisher is not None:
+            self._publisher(name, payload)
+        else:
+            await self.dispatch(name, payload)
+
+    async def dispatch(self, name: str, payload: Any = None) -> None:
+        for handler in self._handlers.get(name, []):
+            try:
+                await handler(payload)
+            except Exception as e:
+                logging.error(f"Ошибка обработчика события {name}: {e}")
+
+
+event_bus = EventBus()
+
+
+class Shard:
+    """То, что получает воркер: свой номер, входящие апдейты и доступ к шине событий."""
+
+    def __init__(self, index: int, workers: int, inbox, outbox):
+        self.index = index
+        self.workers = workers
+        self._inbox = inbox
+        self._outbox = outbox
+
+    @property
+    def is_leader(self) -> bool:
+        """Воркер 0 выполняет фоновые задачи, которые нужны в одном экземпляре."""
+        return self.index == 0
+
+    def ready(self) -> None:
+        self._outbox.put(("ready", self.index))
+
+    def publish(self, name: str, payload: Any = None) -> None:
+        self._outbox.put(("event", name, payload))
+
+    async def messages(self) -> AsyncIterator[tuple[str, Any]]:
+        """
+        Входящие сообщения: ("update", dict) или ("event", (name, payload)).
+        Заканчивается, когда фронт останавливает воркеры.
+        """
+        loop = asyncio.get_running_loop()
+        received: asyncio.Queue = asyncio.Queue()
+
+        def pump():
+            while True:
+                item = self._inbox.get()
+                loop.call_soon_threadsafe(received.put_nowait, item)
+                if item is None:
+                    return
+
+        threading.Thread(target=pump, daemon=True).start()
+        while (item := await received.get()) is not None:
+            yield item
+
+
+ShardServe = Callable[[Shard], Awaitable[None]]
+
+
+def _worker_entry(serve: ShardServe, index: int, workers: int, inbox, outbox) -> None:
+    asyncio.run(serve(Shard(index, workers, inbox, outbox)))
+
+
+class ShardRouter:
+    """
+    Фронт: запускает workers процессов и раскладывает по ним апдейты по from_user.id.
+    События воркеров (EventBus) рассылаются всем воркерам.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._context = multiprocessing.get_context("spawn")
+        self._inboxes = [self._context.Queue() for _ in range(workers)]
+        self._outbox = self._context.Queue()
+        self._processes: list = []
+        self._ready = threading.Semaphore(0)
+        self._fanout: threading.Thread | None = None
+
+    def start(self, serve: ShardServe) -> None:
+        for index in range(self.workers):
+            process = self._context.Process(
+                target=_worker_entry,
+                args=(serve, index, self.workers, self._inboxes[index], self._outbox),
+                name=f"bot-worker-{index}",
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+        self._fanout = threading.Thread(target=self._fanout_events, daemon=True)
+        self._fanout.start()
+
+    async def wait_ready(self) -> None:
+        """Ждёт, пока все воркеры выполнят startup."""
+        for _ in range(self.workers):
+            await asyncio.to_thread(self._ready.acquire)
+
+    def route(self, update: dict) -> int:
+        index = shard_for(update, self.workers)
+        self._inboxes[index].put(("update", update))
+        return index
+
+    async def stop(self) -> None:
+        for inbox in self._inboxes:
+            inbox.put(None)
+        for process in self._processes:
+            await asyncio.to_thread(process.join)
+        self._outbox.put(None)
+
+    def _fanout_events(self) -> None:
+        while True:
+            try:
+                item = self._outbox.get(timeout=1)
+            except queue.Empty:
+                continue
+            if item is None:
+                return
+            if item[0] == "ready":
+                self._ready.release()
+            elif item[0] == "event":
+                for inbox in self._inboxes:
+                    inbox.put(("event", item[1:]))
+
+
+async def poll_updates(bot: Bot, router: ShardRouter, allowed_updates: list[str]) -> None:
+    """Long polling на фронте: апдейты не разбираются, а сразу уходят воркерам."""
+    offset = None
+    while True:
+        try:
+            updates = await bot.get_updates(
+                offset=offset, timeout=30, allowed_updates=allowed_updates
+            )
+        except Exception as e:
+            logging.error(f"Ошибка получения апдейтов: {e}")
+            await asyncio.sleep(5)
+            continue
+        for update in updates:
+            router.route(update.model_dump(mode="json", exclude_unset=True, by_alias=True))
+            offset = update.update_id + 1
+
+
+async def serve_webhook(
+    bot: Bot,
+    router: ShardRouter,
+    allowed_updates: list[str],
+    url: str,
+    host: str,
+    port: int,
+    path: str,
+    secret: str | None = None,
+) -> None:
+    """Приём апдейтов через webhook на фронте (aiohttp)."""
+    from aiohttp import web
+
+    async def handle(request: web.Request) -> web.Response:
+        if secret and request.headers.get("X-Telegram-Bot-Api-Secret-Token") != secret:
+            return web.Response(status=401)
+        router.route(await request.json())
+        return web.Response()
+
+    app = web.Application()
+    app.router.add_post(path, handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    await bot.set_webhook(
+        url, allowed_updates=allowed_updates, secret_token=secret, drop_pending_updates=True
+    )
+    logging.info(f"Webhook слушает {host}:{port}{path}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()